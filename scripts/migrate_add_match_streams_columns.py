@@ -7,6 +7,14 @@ Uso:
 
 Funcionalidades:
 - Detecta colunas faltantes: `is_automated`, `viewer_count`, `title` e as adiciona.
+- Adiciona `matches_cache.match_hash` (digest usado para pular partidas inalteradas).
+- Adiciona `matches_cache.temporal_anchor` (referência da janela de 42h) e preenche
+  as linhas existentes a partir de end_at/begin_at.
+- Adiciona `matches_cache.checked_at` (última vez que a partida veio da API) e
+  preenche as linhas existentes com updated_at.
+- Recria a view `cache_stats` sobre checked_at.
+- Cria tabelas novas (ex: `youtube_channel_cache`) e índices ausentes
+  (ex: `(sent, scheduled_time)` usados no envio de lembretes).
 - Suporta DB local (file:./data/bot.db) e remota (libSQL URL) via libsql_client.
 - Faz backup do DB local antes de alterar.
 """
@@ -22,6 +30,14 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 
 
 REQUIRED_COLUMNS = {
+    "matches_cache": {
+        # Digest do conteúdo da partida (cache_matches pula partidas inalteradas)
+        "match_hash": "TEXT",
+        # Referência temporal indexada (limpeza da janela de 42h)
+        "temporal_anchor": "TEXT",
+        # Última vez vista na API (updated_at só muda quando o conteúdo muda)
+        "checked_at": "DATETIME"
+    },
     "match_streams": {
         "is_automated": "BOOLEAN DEFAULT 0",
         "viewer_count": "INTEGER DEFAULT 0",
@@ -33,6 +49,46 @@ REQUIRED_COLUMNS = {
     }
 }
 
+# Tabelas e índices criados após as colunas (IF NOT EXISTS é idempotente)
+REQUIRED_INDEXES = [
+    # Cache de nomes de canais do YouTube (vídeo/handle → canal, com cache negativo)
+    """CREATE TABLE IF NOT EXISTS youtube_channel_cache (
+        identifier TEXT PRIMARY KEY,
+        channel_name TEXT,
+        resolved_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""",
+    # Seleção de lembretes/resultados vencidos: WHERE sent = 0 AND scheduled_time <= ?
+    "CREATE INDEX IF NOT EXISTS idx_reminders_pending ON match_reminders(sent, scheduled_time)",
+    "CREATE INDEX IF NOT EXISTS idx_result_notif_pending ON match_result_notifications(sent, scheduled_time)",
+    # Limpeza temporal: DELETE ... WHERE temporal_anchor < ?
+    "CREATE INDEX IF NOT EXISTS idx_matches_temporal_anchor ON matches_cache(temporal_anchor)",
+    # Fallback de /partidas, staleness e limpeza: WHERE checked_at >= ?
+    "CREATE INDEX IF NOT EXISTS idx_matches_checked_at ON matches_cache(checked_at)",
+    # cache_stats passa a medir checked_at (a view antiga usava updated_at)
+    "DROP VIEW IF EXISTS cache_stats",
+    """CREATE VIEW IF NOT EXISTS cache_stats AS
+    SELECT 
+        COUNT(*) as total_matches,
+        SUM(CASE WHEN status = 'not_started' THEN 1 ELSE 0 END) as upcoming_matches,
+        SUM(CASE WHEN status = 'running' THEN 1 ELSE 0 END) as live_matches,
+        SUM(CASE WHEN status = 'finished' THEN 1 ELSE 0 END) as finished_matches,
+        SUM(CASE WHEN datetime(checked_at) > datetime('now', '-15 minutes') THEN 1 ELSE 0 END) as recently_updated,
+        MIN(checked_at) as oldest_update,
+        MAX(checked_at) as newest_update
+    FROM matches_cache""",
+]
+
+# Preenchimentos únicos executados após os índices (só tocam linhas ainda NULL)
+REQUIRED_BACKFILLS = [
+    # temporal_anchor das partidas gravadas antes da coluna existir (senão a limpeza nunca as expira)
+    """UPDATE matches_cache
+       SET temporal_anchor = strftime('%Y-%m-%dT%H:%M:%SZ', COALESCE(end_at, begin_at))
+       WHERE temporal_anchor IS NULL
+       AND COALESCE(end_at, begin_at) IS NOT NULL""",
+    # checked_at das partidas gravadas antes da coluna existir (parte da última mudança)
+    "UPDATE matches_cache SET checked_at = updated_at WHERE checked_at IS NULL",
+]
+
 
 def backup_local_db(db_path: str) -> str:
     ts = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
@@ -90,6 +146,24 @@ async def migrate_libsql(url: str):
                 await client.close()
                 return False
 
+    for stmt in REQUIRED_INDEXES:
+        try:
+            await client.execute(stmt)
+            logger.info(f"Índice garantido: {stmt}")
+        except Exception as e:
+            logger.error(f"Falha ao criar índice ({stmt}): {e}")
+            await client.close()
+            return False
+
+    for stmt in REQUIRED_BACKFILLS:
+        try:
+            result = await client.execute(stmt)
+            logger.info(f"Backfill: {result.rows_affected} linha(s) preenchidas")
+        except Exception as e:
+            logger.error(f"Falha no backfill ({stmt}): {e}")
+            await client.close()
+            return False
+
     await client.close()
     logger.info("Migração concluída (libsql)")
     return True
@@ -126,6 +200,26 @@ def migrate_sqlite(db_path: str) -> bool:
                 conn.close()
                 return False
 
+    for stmt in REQUIRED_INDEXES:
+        try:
+            conn.execute(stmt)
+            conn.commit()
+            logger.info(f"Índice garantido: {stmt}")
+        except Exception as e:
+            logger.error(f"Falha ao criar índice ({stmt}): {e}")
+            conn.close()
+            return False
+
+    for stmt in REQUIRED_BACKFILLS:
+        try:
+            cursor = conn.execute(stmt)
+            conn.commit()
+            logger.info(f"Backfill: {cursor.rowcount} linha(s) preenchidas")
+        except Exception as e:
+            logger.error(f"Falha no backfill ({stmt}): {e}")
+            conn.close()
+            return False
+
     conn.close()
     logger.info("Migração concluída (sqlite local)")
     return True
@@ -46,7 +46,7 @@ async def restore_matches():
         # Restaurar ao cache
         print(f"\n💾 Armazenando no banco de dados...")
         for match in matches_to_restore:
-            await cache_manager.cache_matches([match], "restore")
+            await cache_manager.cache_matches([match], "restore", defer_streams=False)
             print(f"   ✅ {match.get('id')}: {match.get('name')}")
         
         print(f"\n✅ RESTAURAÇÃO CONCLUÍDA")
@@ -73,7 +73,7 @@ async def test_complete_flow():
     start = datetime.now()
     for match in mock_matches:
         # Simular cache_matches()
-        await cache_mgr.cache_matches([match], "test")
+        await cache_mgr.cache_matches([match], "test", defer_streams=False)
         
         # NOVO: Simular cache_streams()
         if match.get("streams_list"):
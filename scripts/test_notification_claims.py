@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Teste das transições de estado da coluna `sent` (reserva/liquidação)
+0 = pendente → 2 = reservado → 1 = enviado (ou 0 de volta se falhou)
+"""
+
+import asyncio
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import build_db
+from src.database.cache_manager import MatchCacheManager
+from src.services.notification_manager import NotificationManager
+
+PENDING = NotificationManager.SENT_PENDING
+DONE = NotificationManager.SENT_DONE
+CLAIMED = NotificationManager.SENT_CLAIMED
+
+MATCH_ID = 9001
+
+
+async def create_test_database(path: str) -> MatchCacheManager:
+    """Cria um banco temporário com o schema atual e uma partida no cache."""
+    build_db.DB_URL = f"file:{path}"
+    build_db.AUTH_TOKEN = None
+    assert await build_db.create_database(), "Falha ao criar banco de teste"
+    
+    cache_manager = MatchCacheManager(f"file:{path}")
+    client = await cache_manager.get_client()
+    await client.execute(
+        "INSERT INTO matches_cache (match_id, match_data, status) VALUES (?, '{}', 'running')",
+        [MATCH_ID]
+    )
+    return cache_manager
+
+
+async def insert_reminders(client, states):
+    """Insere um lembrete vencido por guild com o estado `sent` informado; retorna os IDs."""
+    await client.execute("DELETE FROM match_reminders")
+    due = (datetime.now() - timedelta(minutes=1)).isoformat()
+    ids = []
+    for guild_id, sent in enumerate(states, 1):
+        result = await client.execute(
+            """INSERT INTO match_reminders (guild_id, match_id, reminder_minutes_before, scheduled_time, sent)
+               VALUES (?, ?, 0, ?, ?)""",
+            [guild_id, MATCH_ID, due, sent]
+        )
+        ids.append(result.last_insert_rowid)
+    return ids
+
+
+async def states_by_id(client, table: str = "match_reminders"):
+    result = await client.execute(f"SELECT id, sent, sent_at FROM {table}")
+    return {row[0]: (row[1], row[2]) for row in result.rows}
+
+
+async def test_claim_only_pending(manager, client):
+    """Testa que a reserva só pega linhas pendentes"""
+    print("\n🔒 TESTE 1: Reserva (0 → 2)")
+    print("=" * 60)
+    
+    ids = await insert_reminders(client, [PENDING, PENDING, DONE, CLAIMED])
+    claimed = await manager._claim_rows(client, "match_reminders", ids)
+    states = await states_by_id(client)
+    
+    assert claimed == {ids[0], ids[1]}, f"IDs reservados: {claimed}"
+    assert states[ids[0]][0] == CLAIMED
+    assert states[ids[1]][0] == CLAIMED
+    assert states[ids[2]][0] == DONE, "Linha já enviada não pode ser reservada de novo"
+    print("✅ PASSOU: Só linhas pendentes foram reservadas\n")
+
+
+async def test_concurrent_claim(manager, client):
+    """Testa que linhas reservadas por outro ciclo entre o SELECT e a reserva não são enviadas"""
+    print("🏁 TESTE 1b: Reserva concorrente")
+    print("=" * 60)
+    
+    ids = await insert_reminders(client, [PENDING, PENDING])
+    sent_guilds = []
+    
+    async def fake_send(guild_id, match_id, match_data, minutes_before, match_streams=None):
+        sent_guilds.append(guild_id)
+        return True
+    
+    original_attach = manager._attach_match_data
+    
+    async def attach_then_race(client_, rows):
+        # Outro ciclo reserva a primeira linha depois do SELECT deste
+        await client.execute("UPDATE match_reminders SET sent = ? WHERE id = ?", [CLAIMED, ids[0]])
+        return await original_attach(client_, rows)
+    
+    manager._send_reminder_notification = fake_send
+    manager._attach_match_data = attach_then_race
+    try:
+        sent = await manager.send_pending_reminders()
+    finally:
+        manager._attach_match_data = original_attach
+    states = await states_by_id(client)
+    
+    assert sent_guilds == [2], f"Só a guild 2 deveria receber, recebeu {sent_guilds}"
+    assert sent == 1
+    assert states[ids[0]][0] == CLAIMED, "Linha do outro ciclo não pode ser alterada"
+    assert states[ids[1]][0] == DONE
+    print("✅ PASSOU: Linha reservada por outro ciclo não foi enviada\n")
+
+
+async def test_reschedule_result(manager, client):
+    """Testa que reagendar um resultado não reabre linhas reservadas ou enviadas"""
+    print("🔁 TESTE 5: Reagendamento de resultado")
+    print("=" * 60)
+    
+    await client.execute("DELETE FROM match_result_notifications")
+    old = "2000-01-01T00:00:00"
+    for guild_id, sent in ((1, PENDING), (2, CLAIMED), (3, DONE)):
+        await client.execute(
+            """INSERT INTO match_result_notifications (guild_id, match_id, scheduled_time, sent)
+               VALUES (?, ?, ?, ?)""",
+            [guild_id, MATCH_ID, old, sent]
+        )
+    for guild_id in (1, 2, 3, 4):
+        assert await manager.schedule_result_notification(guild_id, MATCH_ID)
+    
+    result = await client.execute(
+        "SELECT guild_id, sent, scheduled_time FROM match_result_notifications"
+    )
+    rows = {row[0]: (row[1], row[2]) for row in result.rows}
+    
+    assert rows[1][0] == PENDING and rows[1][1] != old, "Pendente deve ser reagendado"
+    assert rows[2] == (CLAIMED, old), "Linha em envio não pode voltar para a fila"
+    assert rows[3] == (DONE, old), "Resultado já enviado não pode voltar para a fila"
+    assert rows[4][0] == PENDING, "Nova notificação deve ser criada pendente"
+    print("✅ PASSOU: Só linhas pendentes (ou novas) foram agendadas\n")
+
+
+async def test_send_cycle(manager, client):
+    """Testa um ciclo completo: enviados → 1, falhas → 0"""
+    print("📬 TESTE 2: Ciclo de envio (2 → 1 / 2 → 0)")
+    print("=" * 60)
+    
+    ids = await insert_reminders(client, [PENDING, PENDING, PENDING, DONE])
+    
+    async def fake_send(guild_id, match_id, match_data, minutes_before, match_streams=None):
+        # Guild 2 falha; as demais são entregues
+        return guild_id != 2
+    
+    manager._send_reminder_notification = fake_send
+    sent = await manager.send_pending_reminders()
+    states = await states_by_id(client)
+    
+    assert sent == 2, f"Esperado 2 enviados, obteve {sent}"
+    assert states[ids[0]][0] == DONE and states[ids[0]][1]
+    assert states[ids[1]][0] == PENDING, "Falha deve voltar para a fila"
+    assert states[ids[2]][0] == DONE
+    assert not any(sent == CLAIMED for sent, _ in states.values()), "Nenhuma linha pode ficar reservada"
+    print(f"✅ PASSOU: {sent} enviados, 1 liberado para nova tentativa\n")
+
+
+async def test_interrupted_send_stays_claimed(manager, client):
+    """Testa que um envio interrompido (resultado desconhecido) não volta para a fila"""
+    print("⏹️ TESTE 2b: Envio interrompido (2 → 2)")
+    print("=" * 60)
+    
+    ids = await insert_reminders(client, [PENDING, PENDING])
+    
+    async def fake_send(guild_id, match_id, match_data, minutes_before, match_streams=None):
+        # Guild 1: cancelada durante channel.send (DeliveryInterruptedError → None)
+        return None if guild_id == 1 else True
+    
+    manager._send_reminder_notification = fake_send
+    sent = await manager.send_pending_reminders()
+    states = await states_by_id(client)
+    
+    assert sent == 1
+    assert states[ids[0]][0] == CLAIMED, "Envio interrompido não pode voltar para a fila (duplicaria)"
+    assert states[ids[1]][0] == DONE
+    print("✅ PASSOU: Envio interrompido continua reservado\n")
+
+
+async def test_commit_failure_releases_failures(manager, client):
+    """Testa que uma falha ao marcar os enviados não prende as falhas em 2"""
+    print("💥 TESTE 3: Falha ao gravar enviados")
+    print("=" * 60)
+    
+    ids = await insert_reminders(client, [PENDING, PENDING])
+    
+    async def fake_send(guild_id, match_id, match_data, minutes_before, match_streams=None):
+        return guild_id == 1
+    
+    original_batch = client.batch
+    
+    async def failing_batch(statements):
+        # Marcação dos enviados (sent = 1, sent_at) sempre falha
+        if any("sent_at = ?" in sql for sql, _ in statements):
+            raise RuntimeError("banco indisponível")
+        return await original_batch(statements)
+    
+    manager._send_reminder_notification = fake_send
+    client.batch = failing_batch
+    try:
+        sent = await manager.send_pending_reminders()
+    finally:
+        client.batch = original_batch
+    states = await states_by_id(client)
+    
+    assert sent == 0, "Nada deve ser contado como enviado se o commit falhou"
+    assert states[ids[0]][0] == CLAIMED, "Entregue sem commit fica reservado"
+    assert states[ids[1]][0] == PENDING, "Falha deve voltar para a fila mesmo sem o commit dos enviados"
+    print("✅ PASSOU: Falha liberada, entregue continua reservado\n")
+    
+    # Próximo início: reservados viram enviados (nunca duplicar)
+    print("🧾 TESTE 4: Liquidação de reservados (2 → 1)")
+    print("=" * 60)
+    
+    await client.execute(
+        """INSERT INTO match_result_notifications (guild_id, match_id, scheduled_time, sent)
+           VALUES (1, ?, ?, ?)""",
+        [MATCH_ID, datetime.now().isoformat(), CLAIMED]
+    )
+    settled = await manager._settle_claimed_rows()
+    states = await states_by_id(client)
+    results = await states_by_id(client, "match_result_notifications")
+    
+    assert settled == 2, f"Esperado 2 linhas liquidadas, obteve {settled}"
+    assert states[ids[0]][0] == DONE and states[ids[0]][1], "Reservado deve virar enviado com sent_at"
+    assert states[ids[1]][0] == PENDING, "Pendente não é afetado pela liquidação"
+    assert all(sent == DONE for sent, _ in results.values())
+    print(f"✅ PASSOU: {settled} linha(s) liquidada(s) nas duas tabelas\n")
+
+
+async def main():
+    """Executar todos os testes"""
+    print("\n" + "=" * 60)
+    print("🔒 TESTE COMPLETO: RESERVA E LIQUIDAÇÃO DE NOTIFICAÇÕES")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_manager = await create_test_database(str(Path(tmp) / "claims.db"))
+        try:
+            client = await cache_manager.get_client()
+            manager = NotificationManager(None, cache_manager)
+            manager.COMMIT_BACKOFF = 0.01
+            
+            await test_claim_only_pending(manager, client)
+            await test_concurrent_claim(manager, client)
+            await test_send_cycle(manager, client)
+            await test_interrupted_send_stays_claimed(manager, client)
+            await test_commit_failure_releases_failures(manager, client)
+            await test_reschedule_result(manager, client)
+            
+            print("=" * 60)
+            print("✅ TODOS OS TESTES PASSARAM!")
+            print("=" * 60)
+        except Exception as e:
+            print(f"\n✗ ERRO: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+        finally:
+            await cache_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
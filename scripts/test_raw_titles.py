@@ -33,13 +33,11 @@ async def main():
         print("❌ Erro ao obter token")
         return
     
-    streams = await service._search_twitch_api(
-        token=token,
-        query="CCT Europe Betera Esports Leo Team",
-        language="pt",
+    streams = await service.search_streams(
         championship="CCT Europe",
-        team1="Betera Esports",
-        team2="Leo Team"
+        team1_name="Betera Esports",
+        team2_name="Leo Team",
+        language="pt"
     )
     
     print(f"\n❌ Nenhuma stream encontrada (score baixo)")
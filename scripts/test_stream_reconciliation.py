@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Teste da reconciliação de streams (diff contra match_streams)
+Verifica inserts/updates/deletes e a separação PandaScore × busca automática
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import build_db
+from src.database.cache_manager import MatchCacheManager
+
+MATCH_ID = 9002
+
+
+def twitch_stream(channel: str, language: str = "en", main: bool = False, **extra) -> dict:
+    """Stream no formato da API PandaScore."""
+    return {
+        "raw_url": f"https://www.twitch.tv/{channel}",
+        "embed_url": f"https://player.twitch.tv/?channel={channel}",
+        "language": language,
+        "official": True,
+        "main": main,
+        **extra,
+    }
+
+
+async def create_test_database(path: str) -> MatchCacheManager:
+    """Cria um banco temporário com o schema atual e uma partida no cache."""
+    build_db.DB_URL = f"file:{path}"
+    build_db.AUTH_TOKEN = None
+    assert await build_db.create_database(), "Falha ao criar banco de teste"
+    
+    cache_manager = MatchCacheManager(f"file:{path}")
+    client = await cache_manager.get_client()
+    await client.execute(
+        "INSERT INTO matches_cache (match_id, match_data, status) VALUES (?, '{}', 'not_started')",
+        [MATCH_ID]
+    )
+    return cache_manager
+
+
+async def pending_statements(cache_manager, streams_list, source="pandascore"):
+    """Statements que cache_streams executaria agora (sem executar)."""
+    client = await cache_manager.get_client()
+    stored = await cache_manager._fetch_stream_rows(client, [MATCH_ID])
+    return cache_manager._build_stream_statements(MATCH_ID, streams_list, stored[MATCH_ID], source=source)
+
+
+async def stored_streams(cache_manager):
+    """(channel_name → (language, is_main, is_automated)) das linhas gravadas."""
+    streams = await cache_manager.get_match_streams(MATCH_ID)
+    return {s["channel_name"]: (s["language"], s["is_main"], s["is_automated"]) for s in streams}
+
+
+def count_kinds(statements):
+    kinds = [sql.split()[0] for sql, _ in statements]
+    return kinds.count("INSERT"), kinds.count("UPDATE"), kinds.count("DELETE")
+
+
+async def test_insert_and_noop(cache_manager):
+    """Testa gravação inicial e que reenviar a mesma lista não gera statements"""
+    print("\n📡 TESTE 1: Inserção inicial e reenvio inalterado")
+    print("=" * 60)
+    
+    streams = [twitch_stream("esl_csgo", main=True), twitch_stream("gaules", language="pt")]
+    assert count_kinds(await pending_statements(cache_manager, streams)) == (2, 0, 0)
+    assert await cache_manager.cache_streams(MATCH_ID, streams)
+    
+    stored = await stored_streams(cache_manager)
+    assert set(stored) == {"esl_csgo", "gaules"}, f"Streams gravados: {stored}"
+    
+    statements = await pending_statements(cache_manager, streams)
+    assert statements == [], f"Lista inalterada gerou {len(statements)} statement(s)"
+    
+    # Duplicatas pela chave UNIQUE (platform, channel_name): último vence, sem erro
+    duplicated = streams + [twitch_stream("gaules", language="pt")]
+    assert await pending_statements(cache_manager, duplicated) == []
+    print("✅ PASSOU: 2 inserts, reenvio sem nenhum statement\n")
+
+
+async def test_diff(cache_manager):
+    """Testa que só o que mudou é gravado (update, insert e delete)"""
+    print("🔀 TESTE 2: Diff (mudou / novo / sumiu)")
+    print("=" * 60)
+    
+    streams = [
+        twitch_stream("esl_csgo", language="en", main=False),  # mudou (is_main)
+        twitch_stream("ohnepixel"),                             # novo
+        # gaules sumiu
+    ]
+    assert count_kinds(await pending_statements(cache_manager, streams)) == (1, 1, 1)
+    assert await cache_manager.cache_streams(MATCH_ID, streams)
+    
+    stored = await stored_streams(cache_manager)
+    assert set(stored) == {"esl_csgo", "ohnepixel"}, f"Streams gravados: {stored}"
+    assert not stored["esl_csgo"][1], "is_main deveria ter sido atualizado"
+    assert await pending_statements(cache_manager, streams) == []
+    print("✅ PASSOU: +1 ~1 -1 aplicados, estado final estável\n")
+
+
+async def test_sources_are_isolated(cache_manager):
+    """Testa que PandaScore e busca automática não apagam nem sobrescrevem uma à outra"""
+    print("🤖 TESTE 3: Origens isoladas (PandaScore × busca automática)")
+    print("=" * 60)
+    
+    pandascore = [twitch_stream("esl_csgo"), twitch_stream("ohnepixel")]
+    automated = [
+        twitch_stream("fl0m", is_automated=True, viewer_count=1500, title="FaZe vs NAVI"),
+        # Mesmo canal de um stream da PandaScore: não deve sobrescrevê-lo
+        twitch_stream("esl_csgo", language="ru", is_automated=True, viewer_count=99),
+    ]
+    assert await cache_manager.cache_streams(MATCH_ID, automated, source="twitch_search")
+    
+    stored = await stored_streams(cache_manager)
+    assert stored["fl0m"][2], "Stream da busca deve ser marcado como automático"
+    assert stored["esl_csgo"] == ("en", False, False), "Stream da PandaScore foi sobrescrito"
+    
+    # Reenvio da PandaScore inalterado: nenhum statement, automático preservado
+    assert await pending_statements(cache_manager, pandascore) == []
+    
+    # PandaScore removendo um canal não apaga o automático
+    assert count_kinds(await pending_statements(cache_manager, pandascore[:1])) == (0, 0, 1)
+    assert await cache_manager.cache_streams(MATCH_ID, pandascore[:1])
+    stored = await stored_streams(cache_manager)
+    assert set(stored) == {"esl_csgo", "fl0m"}, f"Streams gravados: {stored}"
+    
+    # Busca automática sem o canal antigo apaga só o automático
+    statements = await pending_statements(cache_manager, [twitch_stream("tarik", is_automated=True)], source="twitch_search")
+    assert count_kinds(statements) == (1, 0, 1)
+    print("✅ PASSOU: Cada origem só reconcilia as próprias linhas\n")
+
+
+async def main():
+    """Executar todos os testes"""
+    print("\n" + "=" * 60)
+    print("📡 TESTE COMPLETO: RECONCILIAÇÃO DE STREAMS")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_manager = await create_test_database(str(Path(tmp) / "streams.db"))
+        try:
+            await test_insert_and_noop(cache_manager)
+            await test_diff(cache_manager)
+            await test_sources_are_isolated(cache_manager)
+            
+            print("=" * 60)
+            print("✅ TODOS OS TESTES PASSARAM!")
+            print("=" * 60)
+        except Exception as e:
+            print(f"\n✗ ERRO: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+        finally:
+            await cache_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
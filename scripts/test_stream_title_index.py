@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Teste do índice invertido de títulos (StreamTitleIndex)
+Compara o score do índice com o cálculo título a título (algoritmo original)
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.twitch_search_service import (
+    StreamTitleIndex,
+    TwitchSearchService,
+    extract_keywords,
+)
+
+STREAMS = [
+    {"user_login": "powerligaen", "title": "(ENG) Preasy Mix vs Prestige | POWER Ligaen Season 30", "viewer_count": 2500, "language": "en"},
+    {"user_login": "tck10", "title": "C9 TCK RADIANTE MAIOR BÍCEPS VALORANT 🏆!GROWTH🏆", "viewer_count": 3789, "language": "pt"},
+    {"user_login": "cct_cs", "title": "Betera vs Leo | CCT Europe Series #12 | Playoffs", "viewer_count": 1200, "language": "en"},
+    {"user_login": "leo_drinks", "title": "leo_drinks is back! chill FACEIT grind", "viewer_count": 800, "language": "en"},
+    {"user_login": "gaules", "title": "FURIA x MIBR - IEM Rio 2024 - !sorteio", "viewer_count": 45000, "language": "pt"},
+    {"user_login": "dust2dk", "title": "Dust2.dk Ligaen: Astralis Talent vs Sashi", "viewer_count": 300, "language": "da"},
+    {"user_login": "empty", "title": "", "viewer_count": 0, "language": "en"},
+    {"user_login": "notitle", "viewer_count": 50, "language": "en"},
+    {"user_login": "multiline", "title": "FaZe\nvs NAVI", "viewer_count": 10000, "language": "en"},
+]
+
+QUERIES = [
+    ("Dust2.dk Ligaen", "Prestige", "Preasy Mix"),
+    ("CCT Europe Series", "Betera", "Leo"),
+    ("IEM Rio", "FURIA", "MIBR"),
+    ("BLAST Premier", "FaZe", "NAVI"),
+    ("", "Astralis Talent", ""),
+    ("", "", ""),
+    ("ESL Pro League", "Team Vitality", "G2"),
+]
+
+
+def reference_relevance(title: str, championship: str, team1: str, team2: str) -> int:
+    """Score de relevância calculado título a título (algoritmo anterior ao índice)."""
+    score = 0
+    title_keywords = extract_keywords(title)
+    title_lower = title.lower()
+    found = {"championship": False, "team1": False, "team2": False}
+    
+    groups = (("championship", championship, 10, 5, 0),
+              ("team1", team1, 20, 10, 3),
+              ("team2", team2, 20, 10, 3))
+    for name, text, exact_points, partial_points, min_partial_len in groups:
+        for word in extract_keywords(text):
+            if word in title_keywords:
+                score += exact_points
+                found[name] = True
+            elif word in title_lower and len(word) > min_partial_len:
+                score += partial_points
+                found[name] = True
+    
+    if all(found.values()):
+        score += 200
+    return score
+
+
+def reference_rank(streams, championship, team1, team2, language):
+    """Ranking esperado: mesmas regras de StreamTitleIndex.rank, sem índice."""
+    championship, team1, team2 = (s.lower().strip() for s in (championship, team1, team2))
+    min_score = StreamTitleIndex.MIN_SCORE if (championship or team1 or team2) else 0
+    
+    ranked = []
+    for position, stream in enumerate(streams):
+        relevance = reference_relevance(stream.get("title", "") or "", championship, team1, team2)
+        if relevance < min_score:
+            continue
+        score = relevance + min(stream.get("viewer_count", 0) // 100, 100)
+        if stream.get("language") == language:
+            score += 50
+        ranked.append((score, position))
+    
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return [(score, streams[position]) for score, position in ranked]
+
+
+def test_fixed_queries():
+    """Testa equivalência nos títulos reais conhecidos"""
+    print("\n🔍 TESTE 1: Equivalência em títulos conhecidos")
+    print("=" * 60)
+    
+    index = StreamTitleIndex(STREAMS)
+    for championship, team1, team2 in QUERIES:
+        for language in ("en", "pt"):
+            got = index.rank(championship, team1, team2, language)
+            expected = reference_rank(STREAMS, championship, team1, team2, language)
+            assert got == expected, (
+                f"Ranking divergente para {(championship, team1, team2, language)}:\n"
+                f"   índice:     {[(s, x['user_login']) for s, x in got]}\n"
+                f"   referência: {[(s, x['user_login']) for s, x in expected]}"
+            )
+        print(f"✅ '{championship}' | '{team1}' vs '{team2}'")
+    
+    print("✅ PASSOU: Rankings idênticos\n")
+
+
+def test_best_match():
+    """Testa a escolha final (bônus de +200 vence falsos positivos)"""
+    print("🏆 TESTE 2: Melhor stream")
+    print("=" * 60)
+    
+    service = TwitchSearchService()
+    best = service._find_best_match(STREAMS, "", "en", "CCT Europe Series", "Betera", "Leo")
+    assert best and best["channel_name"] == "cct_cs", f"Esperado cct_cs, obteve {best}"
+    print(f"✅ CCT Europe: {best['channel_name']} (não leo_drinks)")
+    
+    best = service._find_best_match(STREAMS, "", "en", "ESL Pro League", "Team Vitality", "G2")
+    assert best is None, f"Nenhum stream deveria passar do score mínimo, obteve {best}"
+    print("✅ Sem stream relevante: None")
+    print("✅ PASSOU: Escolha do melhor stream OK\n")
+
+
+def test_random_equivalence(rounds: int = 300):
+    """Testa equivalência em títulos e consultas aleatórias (inclui substrings)"""
+    print("🎲 TESTE 3: Equivalência em títulos aleatórios")
+    print("=" * 60)
+    
+    rng = random.Random(42)
+    vocabulary = ["faze", "navi", "navigator", "g2", "vitality", "vit", "ence", "fence",
+                  "iem", "blast", "major", "dust2.dk", "dust2", "ligaen", "cct", "cs2",
+                  "|", "vs", "x", "!drop", "(eng)", "mibr", "furia", "fur"]
+    
+    def phrase(max_words):
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, max_words)))
+    
+    for _ in range(rounds):
+        streams = [
+            {"user_login": f"s{i}", "title": phrase(8),
+             "viewer_count": rng.randint(0, 20000), "language": rng.choice(["en", "pt"])}
+            for i in range(rng.randint(1, 15))
+        ]
+        index = StreamTitleIndex(streams)
+        for _ in range(5):
+            query = (phrase(3), phrase(2), phrase(2), rng.choice(["en", "pt"]))
+            assert index.rank(*query) == reference_rank(streams, *query), f"Divergência em {query}"
+    
+    print(f"✅ PASSOU: {rounds} snapshots × 5 consultas idênticos\n")
+
+
+def main():
+    """Executar todos os testes"""
+    print("\n" + "=" * 60)
+    print("🔍 TESTE COMPLETO: ÍNDICE DE TÍTULOS DE STREAMS")
+    print("=" * 60)
+    
+    try:
+        test_fixed_queries()
+        test_best_match()
+        test_random_equivalence()
+        
+        print("=" * 60)
+        print("✅ TODOS OS TESTES PASSARAM!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n✗ ERRO: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
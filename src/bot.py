@@ -44,6 +44,8 @@ PANDASCORE_API_KEY = os.getenv("PANDASCORE_API_KEY")
 TESTING_GUILD_ID = int(os.getenv("TESTING_GUILD_ID", "0"))
 LIBSQL_URL = os.getenv("LIBSQL_URL", "file:./data/bot.db")
 LIBSQL_AUTH_TOKEN = os.getenv("LIBSQL_AUTH_TOKEN")  # Opcional para banco local
+LIBSQL_REPLICA_PATH = os.getenv("LIBSQL_REPLICA_PATH")  # Opcional: réplica local do banco remoto
+LIBSQL_SYNC_INTERVAL = float(os.getenv("LIBSQL_SYNC_INTERVAL", "60"))
 
 if not DISCORD_TOKEN:
     raise ValueError("❌ DISCORD_TOKEN não configurado no arquivo .env!")
@@ -76,7 +78,12 @@ class HLTVBot(commands.Bot):
         self.api_client = PandaScoreClient(PANDASCORE_API_KEY)
         
         # Inicializar gerenciador de cache (libSQL)
-        self.cache_manager = MatchCacheManager(LIBSQL_URL, LIBSQL_AUTH_TOKEN)
+        self.cache_manager = MatchCacheManager(
+            LIBSQL_URL,
+            LIBSQL_AUTH_TOKEN,
+            replica_path=LIBSQL_REPLICA_PATH,
+            sync_interval=LIBSQL_SYNC_INTERVAL
+        )
         
         # Inicializar gerenciador de notificações ANTES do scheduler
         self.notification_manager = NotificationManager(self, self.cache_manager)
@@ -134,6 +141,9 @@ class HLTVBot(commands.Bot):
         )
         logger.info("🎮 Status: Assistindo partidas de CS2")
         
+        # Carregar configurações dos servidores em memória (refresh periódico)
+        self.cache_manager.guild_configs.start()
+        
         # Iniciar agendador de cache
         logger.info("\n[CACHE SCHEDULER]")
         logger.info("⏰ Iniciando agendador de cache...")
@@ -181,13 +191,20 @@ class HLTVBot(commands.Bot):
         
         # Parar gerenciador de notificações
         self.notification_manager.stop_reminder_loop()
+        await self.notification_manager.delivery.stop()
+        
+        # Parar refresh das configurações de servidores
+        self.cache_manager.guild_configs.stop()
         
         # Fechar cliente da API
         await self.api_client.close()
         
-        # Fechar serviço YouTube
-        from src.services.youtube_service import close_youtube_service
-        await close_youtube_service()
+        # Fechar conexão com o banco (grava streams pendentes; inclui réplica local, se ativa)
+        await self.cache_manager.close()
+        
+        # Fechar transporte HTTP compartilhado (PandaScore, Twitch, YouTube)
+        from src.services.http_transport import close_http_transport
+        await close_http_transport()
         
         await super().close()
         logger.info("✓ Bot encerrado")
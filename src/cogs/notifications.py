@@ -64,6 +64,7 @@ class NotificationsCog(commands.Cog):
                 """,
                 [1 if ativar else 0, 1 if ativar else 0, guild_id]
             )
+            await self.bot.cache_manager.guild_configs.refresh_guild(guild_id)
             
             status = "✅ **Ativadas**" if ativar else "❌ **Desativadas**"
             
@@ -170,6 +171,7 @@ class NotificationsCog(commands.Cog):
                 """,
                 [channel_id, guild_id]
             )
+            await self.bot.cache_manager.guild_configs.refresh_guild(guild_id)
             
             embed = nextcord.Embed(
                 title="✅ Canal Configurado",
@@ -270,6 +272,7 @@ class NotificationsCog(commands.Cog):
                 """,
                 [1 if ativar else 0, guild_id]
             )
+            await self.bot.cache_manager.guild_configs.refresh_guild(guild_id)
             
             status = "✅ **Ativadas**" if ativar else "❌ **Desativadas**"
             
@@ -525,6 +528,7 @@ class NotificationsCog(commands.Cog):
                 """,
                 [fuso_horario, guild_id]
             )
+            await self.bot.cache_manager.guild_configs.refresh_guild(guild_id)
             
             # Obter informações do novo timezone
             tz_abbr = TimezoneManager.get_timezone_abbreviation(fuso_horario)
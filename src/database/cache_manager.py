@@ -3,24 +3,151 @@ Gerenciador de cache para partidas usando libSQL (Turso).
 """
 
 import asyncio
+import bisect
+import hashlib
 import json
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import libsql_client
 
+from src.database.guild_config_cache import GuildConfigCache
+from src.database.temporal_cache import TemporalCacheManager, backfill_temporal_anchor
+from src.database.youtube_channel_cache import YouTubeChannelCache
+from src.database.stream_enrichment import StreamEnrichmentQueue
+
 logger = logging.getLogger(__name__)
 
-# Cache em memória para respostas rápidas
-_memory_cache = {
-    "upcoming": None,
-    "running": None,
-    "finished": None,
-    "stats": None,
-    "last_update": None
-}
+class MatchMemoryIndex:
+    """
+    Índice em memória das partidas cacheadas, chaveado por match_id.
+    
+    Mantém visões por status já ordenadas (upcoming por begin_at ASC, running
+    e resultados por begin_at DESC). Cada visão é uma lista ordenada de
+    (chave, match_id) mantida com bisect: gravar k partidas custa O(k log n)
+    buscas mais o deslocamento da lista, sem reordenar o cache inteiro.
+    """
+    
+    RESULT_STATUSES = ("finished", "canceled", "postponed")
+    
+    # Visões lidas do fim para o começo (begin_at DESC)
+    DESCENDING_VIEWS = ("running", "finished")
+    
+    def __init__(self):
+        self._matches: Dict[int, Dict] = {}
+        # visão -> [(chave de ordenação, match_id)] em ordem crescente
+        self._views: Dict[str, List[Tuple]] = {"upcoming": [], "running": [], "finished": []}
+        # match_id -> (visão, entrada) para remover/mover em O(log n)
+        self._placement: Dict[int, Tuple[str, Tuple]] = {}
+        self.loaded = False
+        self.last_update: Optional[datetime] = None
+    
+    def load(self, matches: List[Dict]):
+        """Substitui todo o conteúdo do índice (carga a frio a partir do banco)."""
+        self._matches = {}
+        self._views = {"upcoming": [], "running": [], "finished": []}
+        self._placement = {}
+        for match in matches:
+            match_id = match.get("id")
+            if match_id:
+                self._matches[match_id] = match
+                self._place(match_id, match, sort=False)
+        
+        for entries in self._views.values():
+            entries.sort()
+        self.loaded = True
+        self.last_update = datetime.now()
+    
+    def upsert_many(self, matches: List[Dict]):
+        """Insere/atualiza partidas no índice a partir do lote recém gravado."""
+        for match in matches:
+            match_id = match.get("id")
+            if match_id:
+                self._unplace(match_id)
+                self._matches[match_id] = match
+                self._place(match_id, match)
+        self.last_update = datetime.now()
+    
+    def remove_many(self, match_ids: List[int]):
+        """Remove partidas do índice (ex: apagadas do banco)."""
+        for match_id in match_ids:
+            if self._matches.pop(match_id, None) is not None:
+                self._unplace(match_id)
+        self.last_update = datetime.now()
+    
+    def invalidate(self):
+        """Força nova carga a frio na próxima leitura."""
+        self.loaded = False
+    
+    def get(self, view: str, limit: int) -> List[Dict]:
+        """Retorna as primeiras `limit` partidas de uma visão."""
+        entries = self._views.get(view, [])
+        if limit <= 0:
+            return []
+        if view in self.DESCENDING_VIEWS:
+            selected = reversed(entries[-limit:])
+        else:
+            selected = entries[:limit]
+        return [self._matches[match_id] for _, match_id in selected]
+    
+    @classmethod
+    def _view_for(cls, match: Dict) -> Optional[str]:
+        status = match.get("status")
+        if status == "not_started":
+            return "upcoming"
+        if status == "running":
+            return "running"
+        if status in cls.RESULT_STATUSES:
+            return "finished"
+        return None
+    
+    def _place(self, match_id: int, match: Dict, sort: bool = True):
+        view = self._view_for(match)
+        if view is None:
+            return
+        
+        begin_at = match.get("begin_at")
+        if view in self.DESCENDING_VIEWS:
+            # Lida de trás para frente: sem begin_at ("") fica no fim da visão
+            key = (begin_at or "",)
+        else:
+            # Partidas sem begin_at ficam no fim da visão
+            key = (begin_at is None, begin_at or "")
+        
+        entry = (key, match_id)
+        if sort:
+            bisect.insort(self._views[view], entry)
+        else:
+            self._views[view].append(entry)
+        self._placement[match_id] = (view, entry)
+    
+    def _unplace(self, match_id: int):
+        placement = self._placement.pop(match_id, None)
+        if placement is None:
+            return
+        
+        view, entry = placement
+        entries = self._views[view]
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+
+# Índice em memória para respostas rápidas
+_memory_index = MatchMemoryIndex()
+
+
+def compute_match_digest(match: Dict) -> str:
+    """
+    Calcula um digest estável do conteúdo de uma partida.
+    
+    Serializa com chaves ordenadas para que a mesma partida gere sempre o
+    mesmo hash, independente da ordem dos campos retornada pela API.
+    """
+    canonical = json.dumps(match, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
 
 
 class MatchCacheManager:
@@ -29,121 +156,354 @@ class MatchCacheManager:
     # Timeout para queries (3 segundos para não quebrar discord interactions)
     QUERY_TIMEOUT = 3.0
     
-    def __init__(self, db_url: str, auth_token: Optional[str] = None):
+    # Máximo de parâmetros por cláusula IN (...) (limite de variáveis do SQLite)
+    IN_CHUNK_SIZE = 500
+    
+    # Colunas de matches_cache posteriores ao schema original (ver _ensure_schema)
+    MATCHES_CACHE_COLUMNS = {
+        "match_hash": "TEXT",
+        "temporal_anchor": "TEXT",
+        "checked_at": "DATETIME",
+    }
+    
+    def __init__(
+        self,
+        db_url: str,
+        auth_token: Optional[str] = None,
+        replica_path: Optional[str] = None,
+        sync_interval: float = 60.0
+    ):
         """
         Inicializa o gerenciador de cache.
         
         Args:
             db_url: URL do banco libSQL (file:path.db ou libsql://...)
             auth_token: Token de autenticação (opcional, necessário para Turso remoto)
+            replica_path: Arquivo local para réplica embutida do banco remoto (opcional).
+                Leituras passam a ser locais e escritas são encaminhadas ao primário.
+            sync_interval: Intervalo (segundos) de sincronização da réplica local
         """
         self.db_url = db_url
         self.auth_token = auth_token
+        self.replica_path = replica_path
+        self.sync_interval = sync_interval
         self._lock = asyncio.Lock()
+        self._client_lock = asyncio.Lock()
         self._client = None
         
+        # Configurações de servidores em memória (timezone, canal, flags)
+        self.guild_configs = GuildConfigCache(self)
+        
+        # Nomes de canais do YouTube (resolvidos fora da escrita do cache)
+        self.youtube_channels = YouTubeChannelCache(self)
+        
+        # Gravação de streams em segundo plano (só quando o conjunto muda)
+        self.stream_queue = StreamEnrichmentQueue(self)
+        
         logger.info(f"📦 MatchCacheManager inicializado: {db_url}")
+        if replica_path:
+            logger.info(f"   🔁 Réplica local: {replica_path} (sync a cada {sync_interval:.0f}s)")
     
     async def get_client(self):
-        """Obtém ou cria cliente libSQL."""
+        """Obtém ou cria cliente libSQL (réplica local embutida se configurada)."""
         if self._client is None:
-            if self.auth_token:
-                self._client = libsql_client.create_client(
-                    url=self.db_url,
-                    auth_token=self.auth_token
-                )
-            else:
-                self._client = libsql_client.create_client(url=self.db_url)
+            # Abertura assíncrona (réplica, checagem do schema): evitar que duas chamadas abram dois clientes
+            async with self._client_lock:
+                if self._client is None:
+                    client = await self._open_client()
+                    await self._ensure_schema(client)
+                    self._client = client
         return self._client
     
+    async def _open_client(self):
+        if self.replica_path and not self.db_url.startswith("file:"):
+            try:
+                from src.database.replica_client import EmbeddedReplicaClient
+                return await EmbeddedReplicaClient.open(
+                    self.replica_path,
+                    sync_url=self.db_url,
+                    auth_token=self.auth_token,
+                    sync_interval=self.sync_interval
+                )
+            except ImportError:
+                logger.warning("⚠️ Pacote 'libsql' não instalado - réplica local desativada, usando banco remoto")
+            except Exception as e:
+                logger.error(f"✗ Erro ao abrir réplica local ({e}) - usando banco remoto")
+        
+        if self.auth_token:
+            return libsql_client.create_client(
+                url=self.db_url,
+                auth_token=self.auth_token
+            )
+        return libsql_client.create_client(url=self.db_url)
+    
+    async def _ensure_schema(self, client):
+        """
+        Adiciona em bancos existentes as colunas de matches_cache que o código grava.
+        
+        Idempotente (PRAGMA table_info + ALTER TABLE só do que falta). Se não
+        for possível, falha na abertura do cliente com instrução de migração
+        em vez de todo cache_matches quebrar com "no such column".
+        """
+        try:
+            result = await client.execute("PRAGMA table_info(matches_cache)")
+            existing = {row[1] for row in result.rows}
+            if not existing:
+                return  # Banco novo: schema.sql cria a tabela completa
+            
+            for column, definition in self.MATCHES_CACHE_COLUMNS.items():
+                if column not in existing:
+                    await client.execute(f"ALTER TABLE matches_cache ADD COLUMN {column} {definition}")
+                    logger.warning(f"🛠️ Coluna matches_cache.{column} adicionada (banco anterior à migração)")
+            
+            # Limpeza temporal indexada: índice + anchor das linhas antigas
+            await client.execute(
+                "CREATE INDEX IF NOT EXISTS idx_matches_temporal_anchor ON matches_cache(temporal_anchor)"
+            )
+            await backfill_temporal_anchor(client)
+            
+            # Última vez vista na API: linhas antigas partem da última mudança
+            await client.execute(
+                "CREATE INDEX IF NOT EXISTS idx_matches_checked_at ON matches_cache(checked_at)"
+            )
+            await client.execute(
+                "UPDATE matches_cache SET checked_at = updated_at WHERE checked_at IS NULL"
+            )
+        except Exception as e:
+            raise RuntimeError(
+                f"Schema de matches_cache desatualizado ({e}); "
+                f"rode scripts/migrate_add_match_streams_columns.py"
+            ) from e
+    
     async def close(self):
-        """Fecha conexão com o banco."""
+        """Grava os streams ainda na fila e fecha conexão com o banco."""
+        await self.stream_queue.stop()
+        await self.youtube_channels.close()
         if self._client:
             await self._client.close()
             self._client = None
     
-    async def cache_matches(self, matches: List[Dict], update_type: str = "all") -> Dict:
+    async def cache_matches(
+        self,
+        matches: List[Dict],
+        update_type: str = "all",
+        defer_streams: bool = True
+    ) -> Dict:
         """
         Armazena partidas no cache.
         
+        Todas as escritas do lote (partidas e log) são enviadas em um único
+        batch libSQL (uma transação, um round trip). Se o batch falhar, cada
+        partida é regravada no seu próprio batch para isolar o erro.
+        
+        Os streams (streams_list) nunca entram no batch das partidas (uma
+        linha inválida em match_streams não pode desfazer a partida): são
+        enfileirados em stream_queue, que grava só as partidas cujo conjunto
+        de streams mudou. Scripts avulsos que não chamam close() devem usar
+        defer_streams=False para gravar os streams antes de retornar.
+        
+        Partidas cujo digest (match_hash) não mudou não são regravadas, então
+        updated_at só avança quando o conteúdo da partida realmente muda.
+        checked_at (última vez que a partida veio da API) avança sempre, com
+        um UPDATE por bloco de IDs inalterados no mesmo batch.
+        
         Args:
             matches: Lista de partidas da API
             update_type: Tipo de atualização (upcoming, running, past, all)
+            defer_streams: Se False, grava os streams antes de retornar (fora do lock)
             
         Returns:
-            Dict com estatísticas da operação
+            Dict com estatísticas da operação (inclui "added_ids": IDs das
+            partidas que não existiam no cache)
         """
-        stats = {"updated": 0, "added": 0, "errors": 0}
+        stats = {"updated": 0, "added": 0, "unchanged": 0, "errors": 0, "added_ids": []}
         
         async with self._lock:
             try:
                 client = await self.get_client()
                 
+                # Deduplicar por ID (última versão vence, como no upsert sequencial)
+                batch_matches = {}
                 for match in matches:
+                    match_id = match.get("id")
+                    if match_id:
+                        batch_matches[match_id] = match
+                
+                # Uma única consulta para saber quais partidas já existem (e seus digests)
+                existing_hashes = await self._fetch_existing_match_hashes(client, list(batch_matches))
+                existing_ids = set(existing_hashes)
+                
+                # Montar statements agrupados por partida
+                statements_by_match = []
+                unchanged_ids = []
+                for match_id, match in batch_matches.items():
                     try:
-                        match_id = match.get("id")
-                        if not match_id:
+                        match_hash = compute_match_digest(match)
+                        if existing_hashes.get(match_id) == match_hash:
+                            stats["unchanged"] += 1
+                            unchanged_ids.append(match_id)
                             continue
                         
-                        match_data = json.dumps(match)
-                        status = match.get("status", "not_started")
-                        tournament_name = match.get("tournament", {}).get("name")
-                        begin_at = match.get("begin_at")
-                        end_at = match.get("end_at")
-                        
-                        # Verificar se existe
-                        result = await client.execute(
-                            "SELECT match_id FROM matches_cache WHERE match_id = ?",
-                            [match_id]
-                        )
-                        exists = len(result.rows) > 0
-                        
-                        # Inserir ou atualizar
-                        await client.execute("""
-                            INSERT INTO matches_cache 
-                                (match_id, match_data, status, tournament_name, begin_at, end_at, updated_at)
-                            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                            ON CONFLICT(match_id) DO UPDATE SET
-                                match_data = excluded.match_data,
-                                status = excluded.status,
-                                tournament_name = excluded.tournament_name,
-                                begin_at = excluded.begin_at,
-                                end_at = excluded.end_at,
-                                updated_at = CURRENT_TIMESTAMP
-                        """, [match_id, match_data, status, tournament_name, begin_at, end_at])
-                        
-                        # Cachear streams da partida se disponível
-                        streams_list = match.get("streams_list", [])
-                        if streams_list:
-                            await self.cache_streams(match_id, streams_list, source="pandascore")
-                        
-                        if exists:
-                            stats["updated"] += 1
-                        else:
-                            stats["added"] += 1
-                            
+                        statements_by_match.append((match_id, [self._build_match_upsert(match, match_hash)]))
                     except Exception as e:
-                        logger.error(f"✗ Erro ao cachear partida {match.get('id')}: {e}")
+                        logger.error(f"✗ Erro ao preparar partida {match_id}: {e}")
                         stats["errors"] += 1
                 
-                # Registrar atualização
-                await client.execute("""
+                log_sql = """
                     INSERT INTO cache_update_log 
                         (update_type, matches_updated, matches_added, status, completed_at)
                     VALUES (?, ?, ?, 'success', CURRENT_TIMESTAMP)
-                """, [update_type, stats["updated"], stats["added"]])
+                """
+                checked_statements = self._build_checked_updates(unchanged_ids)
                 
-                # Atualizar cache em memória para respostas rápidas
                 try:
-                    await self._update_memory_cache(client)
+                    # Caminho rápido: lote inteiro + log em um único batch
+                    updated = sum(1 for match_id, _ in statements_by_match if match_id in existing_ids)
+                    added = len(statements_by_match) - updated
+                    all_statements = [stmt for _, stmts in statements_by_match for stmt in stmts]
+                    all_statements.extend(checked_statements)
+                    all_statements.append((log_sql, [update_type, updated, added]))
+                    await client.batch(all_statements)
+                    stats["updated"] += updated
+                    stats["added"] += added
+                    stats["added_ids"].extend(
+                        match_id for match_id, _ in statements_by_match if match_id not in existing_ids
+                    )
+                    written = [batch_matches[match_id] for match_id, _ in statements_by_match]
+                except Exception as e:
+                    logger.warning(f"⚠️ Batch de {len(statements_by_match)} partidas falhou ({e}), gravando individualmente...")
+                    written = []
+                    for match_id, statements in statements_by_match:
+                        try:
+                            await client.batch(statements)
+                            written.append(batch_matches[match_id])
+                            if match_id in existing_ids:
+                                stats["updated"] += 1
+                            else:
+                                stats["added"] += 1
+                                stats["added_ids"].append(match_id)
+                        except Exception as match_error:
+                            logger.error(f"✗ Erro ao cachear partida {match_id}: {match_error}")
+                            stats["errors"] += 1
+                    
+                    if checked_statements:
+                        try:
+                            await client.batch(checked_statements)
+                        except Exception as checked_error:
+                            logger.warning(f"⚠️ Erro ao marcar partidas inalteradas como verificadas: {checked_error}")
+                    
+                    # Registrar atualização
+                    await client.execute(log_sql, [update_type, stats["updated"], stats["added"]])
+                
+                # Atualizar índice em memória apenas com o lote gravado
+                try:
+                    if _memory_index.loaded:
+                        _memory_index.upsert_many(written)
+                    else:
+                        await self._load_memory_index(client)
                 except Exception as e:
                     logger.warning(f"⚠️ Erro ao atualizar cache em memória: {e}")
                 
-                return stats
+                # Streams das partidas presentes no banco (inalteradas ou recém-gravadas)
+                stored_matches = (
+                    [match for match_id, match in batch_matches.items() if match_id in existing_ids]
+                    + [match for match in written if match.get("id") not in existing_ids]
+                )
                 
             except Exception as e:
                 logger.error(f"✗ Erro ao atualizar cache: {e}")
                 raise
+        
+        # Partidas já estão gravadas: erro nos streams só é registrado
+        try:
+            if defer_streams:
+                self.stream_queue.submit_many(stored_matches)
+            else:
+                await self.stream_queue.write_now(stored_matches)
+        except Exception as e:
+            logger.error(f"✗ Erro ao enfileirar streams de {len(stored_matches)} partida(s): {e}")
+        
+        return stats
+    
+    async def _fetch_existing_match_hashes(self, client, match_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Retorna {match_id: match_hash} para os IDs que já estão em matches_cache.
+        
+        Usa uma consulta IN (...) por bloco de IN_CHUNK_SIZE IDs em vez de
+        um SELECT por partida. match_hash é None para linhas antigas sem digest.
+        """
+        existing = {}
+        for i in range(0, len(match_ids), self.IN_CHUNK_SIZE):
+            chunk = match_ids[i:i + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            result = await client.execute(
+                f"SELECT match_id, match_hash FROM matches_cache WHERE match_id IN ({placeholders})",
+                chunk
+            )
+            existing.update({row[0]: row[1] for row in result.rows})
+        return existing
+    
+    def _build_checked_updates(self, match_ids: List[int]) -> List[Tuple[str, List]]:
+        """Monta UPDATEs de checked_at (partidas inalteradas) em blocos de IN_CHUNK_SIZE IDs."""
+        statements = []
+        for i in range(0, len(match_ids), self.IN_CHUNK_SIZE):
+            chunk = match_ids[i:i + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            statements.append((
+                f"UPDATE matches_cache SET checked_at = CURRENT_TIMESTAMP WHERE match_id IN ({placeholders})",
+                chunk
+            ))
+        return statements
+    
+    @staticmethod
+    def _build_match_upsert(
+        match: Dict,
+        match_hash: Optional[str] = None,
+        overwrite: bool = True,
+        default_status: str = "not_started"
+    ) -> Tuple[str, List]:
+        """
+        Monta o statement de upsert de uma partida em matches_cache.
+        
+        Args:
+            match: Dados da partida
+            match_hash: Digest do conteúdo (calculado se None)
+            overwrite: Se False, não altera uma partida já existente (DO NOTHING)
+            default_status: Status gravado quando a partida não tem status
+        """
+        if match_hash is None:
+            match_hash = compute_match_digest(match)
+        
+        if overwrite:
+            on_conflict = """DO UPDATE SET
+                match_data = excluded.match_data,
+                match_hash = excluded.match_hash,
+                status = excluded.status,
+                tournament_name = excluded.tournament_name,
+                begin_at = excluded.begin_at,
+                end_at = excluded.end_at,
+                temporal_anchor = excluded.temporal_anchor,
+                updated_at = CURRENT_TIMESTAMP,
+                checked_at = CURRENT_TIMESTAMP"""
+        else:
+            on_conflict = "DO NOTHING"
+        
+        return (f"""
+            INSERT INTO matches_cache 
+                (match_id, match_data, match_hash, status, tournament_name, begin_at, end_at,
+                 temporal_anchor, updated_at, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ON CONFLICT(match_id) {on_conflict}
+        """, [
+            match.get("id"),
+            json.dumps(match),
+            match_hash,
+            match.get("status", default_status),
+            (match.get("tournament") or {}).get("name"),
+            match.get("begin_at"),
+            match.get("end_at"),
+            TemporalCacheManager.format_anchor(match)
+        ])
     
     async def get_cached_matches(
         self,
@@ -156,7 +516,7 @@ class MatchCacheManager:
         
         Args:
             status: Filtrar por status (not_started, running, finished, ou 'results' para finished+canceled+postponed)
-            hours: Últimas X horas
+            hours: Partidas vistas na API nas últimas X horas (checked_at)
             limit: Limite de resultados
             
         Returns:
@@ -175,7 +535,7 @@ class MatchCacheManager:
                         SELECT match_data
                         FROM matches_cache
                         WHERE status IN ('finished', 'canceled', 'postponed')
-                          AND updated_at >= ?
+                          AND checked_at >= ?
                         ORDER BY COALESCE(begin_at, updated_at) DESC
                         LIMIT ?
                     """, [cutoff, limit]),
@@ -187,7 +547,7 @@ class MatchCacheManager:
                         SELECT match_data
                         FROM matches_cache
                         WHERE status = ?
-                          AND updated_at >= ?
+                          AND checked_at >= ?
                         ORDER BY begin_at ASC
                         LIMIT ?
                     """, [status, cutoff, limit]),
@@ -198,7 +558,7 @@ class MatchCacheManager:
                     client.execute("""
                         SELECT match_data
                         FROM matches_cache
-                        WHERE updated_at >= ?
+                        WHERE checked_at >= ?
                         ORDER BY begin_at ASC
                         LIMIT ?
                     """, [cutoff, limit]),
@@ -220,7 +580,7 @@ class MatchCacheManager:
         Remove partidas antigas do cache.
         
         Args:
-            hours: Remover partidas finalizadas há mais de X horas
+            hours: Remover partidas finalizadas (ou não vistas na API) há mais de X horas
             
         Returns:
             Número de partidas removidas
@@ -233,11 +593,12 @@ class MatchCacheManager:
             result = await client.execute("""
                 DELETE FROM matches_cache
                 WHERE status = 'finished'
-                  AND (end_at < ? OR updated_at < ?)
+                  AND (end_at < ? OR checked_at < ?)
                 RETURNING match_id
             """, [cutoff, cutoff])
             
             deleted = len(result.rows)
+            self.remove_from_memory_index([row[0] for row in result.rows])
             return deleted
             
         except Exception as e:
@@ -277,7 +638,7 @@ class MatchCacheManager:
         Verifica se o cache está desatualizado.
         
         Args:
-            minutes: Minutos desde última atualização
+            minutes: Minutos desde a última vez que alguma partida veio da API
             
         Returns:
             True se desatualizado
@@ -289,7 +650,7 @@ class MatchCacheManager:
             
             result = await client.execute("""
                 SELECT COUNT(*) as count FROM matches_cache
-                WHERE updated_at >= ?
+                WHERE checked_at >= ?
             """, [cutoff])
             
             count = result.rows[0]["count"]
@@ -299,65 +660,42 @@ class MatchCacheManager:
             logger.error(f"✗ Erro ao verificar cache: {e}")
             return True
     
-    async def _update_memory_cache(self, client):
-        """Atualiza cache em memória com dados do banco para respostas rápidas."""
-        global _memory_cache
+    async def _load_memory_index(self, client, timeout: float = 10.0) -> bool:
+        """
+        Carga a frio do índice em memória a partir do banco.
         
+        Só é necessária na primeira leitura/escrita (ou após invalidate_memory_index);
+        depois disso o índice é atualizado incrementalmente por cache_matches.
+        """
         try:
-            logger.debug("🔄 Iniciando atualização do cache em memória...")
-            
-            # Próximas partidas
-            logger.debug("  1. Buscando upcoming...")
-            result = await asyncio.wait_for(
-                client.execute("""
-                    SELECT match_data FROM matches_cache
-                    WHERE status = 'not_started'
-                    ORDER BY begin_at ASC LIMIT 50
-                """),
-                timeout=10.0
-            )
-            _memory_cache["upcoming"] = [
-                json.loads(row["match_data"]) for row in result.rows
-            ]
-            logger.debug(f"    ✓ {len(_memory_cache['upcoming'])} upcoming matches")
-            
-            # Partidas ao vivo
-            logger.debug("  2. Buscando running...")
+            logger.debug("🔄 Carregando índice em memória do banco...")
             result = await asyncio.wait_for(
-                client.execute("""
-                    SELECT match_data FROM matches_cache
-                    WHERE status = 'running'
-                    ORDER BY begin_at DESC LIMIT 10
-                """),
-                timeout=10.0
+                client.execute("SELECT match_data FROM matches_cache"),
+                timeout=timeout
             )
-            _memory_cache["running"] = [
-                json.loads(row["match_data"]) for row in result.rows
-            ]
-            logger.debug(f"    ✓ {len(_memory_cache['running'])} running matches")
-            
-            # Resultados recentes (finished + canceled + postponed)
-            logger.debug("  3. Buscando finished...")
-            result = await asyncio.wait_for(
-                client.execute("""
-                    SELECT match_data FROM matches_cache
-                    WHERE status IN ('finished', 'canceled', 'postponed')
-                    ORDER BY begin_at DESC LIMIT 20
-                """),
-                timeout=10.0
-            )
-            _memory_cache["finished"] = [
-                json.loads(row["match_data"]) for row in result.rows
-            ]
-            logger.debug(f"    ✓ {len(_memory_cache['finished'])} finished matches")
-            
-            _memory_cache["last_update"] = datetime.now()
-            logger.debug("✓ Cache em memória atualizado com sucesso")
+            _memory_index.load([json.loads(row["match_data"]) for row in result.rows])
+            logger.debug(f"✓ Índice em memória carregado ({len(result.rows)} partidas)")
+            return True
             
         except asyncio.TimeoutError:
-            logger.warning("⚠️ Timeout ao atualizar cache em memória")
+            logger.warning("⚠️ Timeout ao carregar cache em memória")
         except Exception as e:
-            logger.error(f"✗ Erro ao atualizar cache em memória: {e}")
+            logger.error(f"✗ Erro ao carregar cache em memória: {e}")
+        return False
+    
+    def remove_from_memory_index(self, match_ids: List[int]):
+        """Remove do índice em memória partidas apagadas do banco."""
+        if match_ids:
+            _memory_index.remove_many(match_ids)
+    
+    def add_to_memory_index(self, matches: List[Dict]):
+        """Adiciona ao índice em memória partidas gravadas fora de cache_matches."""
+        if matches and _memory_index.loaded:
+            _memory_index.upsert_many(matches)
+    
+    def invalidate_memory_index(self):
+        """Força recarga do índice em memória (ex: após inserções fora de cache_matches)."""
+        _memory_index.invalidate()
     
     async def get_cached_matches_fast(self, status: str, limit: int = 50) -> List[Dict]:
         """
@@ -368,22 +706,26 @@ class MatchCacheManager:
             limit: Limite de resultados
             
         Returns:
-            Lista de partidas (pode estar vazia se nunca foi atualizado)
+            Lista de partidas (pode estar vazia se o índice não pôde ser carregado)
         """
-        global _memory_cache
-        
         if status == "not_started":
             status = "upcoming"
         
-        matches = _memory_cache.get(status) or []
-        return matches[:limit]
+        if not _memory_index.loaded:
+            client = await self.get_client()
+            await self._load_memory_index(client, timeout=self.QUERY_TIMEOUT)
+        
+        return _memory_index.get(status, limit)
     
     async def cache_streams(self, match_id: int, streams_list: List[Dict], source: str = "pandascore") -> bool:
         """
         Armazena streams de uma partida no cache.
         
-        ⚠️ IMPORTANTE: NÃO usa self._lock aqui! É chamado dentro de cache_matches()
-        que já tem o lock, para evitar deadlock.
+        Reconcilia com as linhas atuais (inserts, updates e deletes só do que
+        mudou, em um batch); streams da outra origem não são apagados.
+        
+        ⚠️ IMPORTANTE: NÃO usa self._lock aqui (a fila de streams e a busca
+        automática gravam fora de cache_matches).
         
         Args:
             match_id: ID da partida
@@ -401,77 +743,11 @@ class MatchCacheManager:
             
             client = await self.get_client()
             
-            # Limpar streams antigos da partida
-            await client.execute(
-                "DELETE FROM match_streams WHERE match_id = ?",
-                [match_id]
-            )
-            
-            # Mapa de emojis de origem
-            source_emoji = {
-                "pandascore": "🌐",  # API
-                "twitch_search": "🔍",  # Busca manual
-            }
-            emoji = source_emoji.get(source, "📡")
-            source_label = "PandaScore API" if source == "pandascore" else "Busca Manual (Twitch)"
-            
-            # Inserir novos streams
-            cached_count = 0
-            for stream in streams_list:
-                # Garantir que tem raw_url
-                raw_url = stream.get("raw_url", "").strip()
-                if not raw_url:
-                    logger.warning(f"   ⚠️  Stream sem raw_url em match {match_id}: {stream}")
-                    continue
-                
-                platform = self._extract_platform(raw_url)
-                channel_name = self._extract_channel_name(raw_url)
-                
-                # 🎥 NOVO: Para YouTube, tentar buscar o nome real do canal via API
-                # Isso cobre: watch?v=..., youtu.be/..., @channel, c/channel, etc
-                if platform == "youtube":
-                    try:
-                        from src.services.youtube_service import get_youtube_service
-                        youtube_svc = get_youtube_service()
-                        real_channel_name = await youtube_svc.get_channel_name(raw_url)
-                        if real_channel_name:
-                            # Atualizar com nome real
-                            old_name = channel_name
-                            channel_name = real_channel_name
-                            logger.info(f"   🎥 YouTube: '{old_name}' → '{real_channel_name}' (Match {match_id})")
-                        else:
-                            logger.debug(f"   🎥 Não foi possível obter nome real para: {raw_url}")
-                    except Exception as e:
-                        logger.warning(f"   ⚠️  Erro ao buscar nome do canal YouTube: {e}")
-                        # Continua com o nome extraído, não falha
-                
-                # Debug: log de cada stream sendo cacheado com origem
-                logger.debug(f"   {emoji} Match {match_id}: {platform} / {channel_name} ({stream.get('language')}) [{source_label}]")
-                
-                # Usar embed_url se tiver, senão usar raw_url como fallback
-                url_for_db = stream.get("embed_url") or raw_url
-                
-                await client.execute(
-                    """INSERT INTO match_streams 
-                       (match_id, platform, channel_name, url, raw_url, language, is_official, is_main, is_automated, viewer_count, title)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    [
-                        match_id,
-                        platform,
-                        channel_name,
-                        url_for_db,
-                        raw_url,
-                        stream.get("language", "unknown"),
-                        1 if stream.get("official", False) else 0,
-                        1 if stream.get("main", False) else 0,
-                        1 if stream.get("is_automated", False) else 0,
-                        stream.get("viewer_count", 0) or 0,
-                        stream.get("title", "") or ""
-                    ]
-                )
-                cached_count += 1
-            
-            logger.info(f"   {emoji} {cached_count} stream(s) cacheado(s) para match {match_id} [{source_label}]")
+            await self._resolve_youtube_channels(streams_list)
+            stored = await self._fetch_stream_rows(client, [match_id])
+            statements = self._build_stream_statements(match_id, streams_list, stored[match_id], source=source)
+            if statements:
+                await client.batch(statements)
             return True
             
         except asyncio.TimeoutError:
@@ -481,6 +757,209 @@ class MatchCacheManager:
                 logger.error(f"✗ Erro ao cachear streams: {e}")
                 return False
     
+    async def _resolve_youtube_channels(self, streams) -> None:
+        """Resolve (em lote, com cache persistente) os canais das streams do YouTube."""
+        urls = {
+            (stream.get("raw_url") or "").strip()
+            for stream in streams
+        }
+        urls = [url for url in urls if url and self._extract_platform(url) == "youtube"]
+        if not urls:
+            return
+        
+        try:
+            await self.youtube_channels.resolve(urls)
+        except Exception as e:
+            logger.warning(f"   ⚠️  Erro ao resolver canais do YouTube: {e}")
+    
+    # Colunas gravadas em match_streams (ordem dos valores de _build_stream_rows)
+    STREAM_COLUMNS = (
+        "platform", "channel_name", "url", "raw_url", "language",
+        "is_official", "is_main", "is_automated", "viewer_count", "title"
+    )
+    
+    @staticmethod
+    def _stream_source_label(source: str) -> Tuple[str, str]:
+        """Emoji e descrição da origem dos streams (para logs)."""
+        # Mapa de emojis de origem
+        source_emoji = {
+            "pandascore": "🌐",  # API
+            "twitch_search": "🔍",  # Busca manual
+        }
+        emoji = source_emoji.get(source, "📡")
+        source_label = "PandaScore API" if source == "pandascore" else "Busca Manual (Twitch)"
+        return emoji, source_label
+    
+    def _build_stream_rows(
+        self,
+        match_id: int,
+        streams_list: List[Dict],
+        source: str = "pandascore"
+    ) -> List[Tuple]:
+        """
+        Normaliza os streams da API nas linhas de match_streams (sem I/O).
+        
+        Canais do YouTube usam os nomes já resolvidos em youtube_channels.
+        
+        Args:
+            match_id: ID da partida
+            streams_list: Lista de streams da API PandaScore
+            source: Origem dos streams ('pandascore' ou 'twitch_search')
+            
+        Returns:
+            Lista de tuplas na ordem de STREAM_COLUMNS
+        """
+        emoji, source_label = self._stream_source_label(source)
+        
+        rows = []
+        for stream in streams_list:
+            # Garantir que tem raw_url
+            raw_url = stream.get("raw_url", "").strip()
+            if not raw_url:
+                logger.warning(f"   ⚠️  Stream sem raw_url em match {match_id}: {stream}")
+                continue
+            
+            platform = self._extract_platform(raw_url)
+            channel_name = self._extract_channel_name(raw_url)
+            
+            # 🎥 Para YouTube, usar o nome real do canal já resolvido (cache em memória)
+            # Isso cobre: watch?v=..., youtu.be/..., @channel, c/channel, etc
+            if platform == "youtube":
+                real_channel_name = self.youtube_channels.lookup(raw_url)
+                if real_channel_name:
+                    logger.debug(f"   🎥 YouTube: '{channel_name}' → '{real_channel_name}' (Match {match_id})")
+                    channel_name = real_channel_name
+                else:
+                    logger.debug(f"   🎥 Nome real ainda não resolvido para: {raw_url}")
+            
+            # Debug: log de cada stream sendo cacheado com origem
+            logger.debug(f"   {emoji} Match {match_id}: {platform} / {channel_name} ({stream.get('language')}) [{source_label}]")
+            
+            rows.append((
+                platform,
+                channel_name,
+                # Usar embed_url se tiver, senão usar raw_url como fallback
+                stream.get("embed_url") or raw_url,
+                raw_url,
+                stream.get("language", "unknown"),
+                1 if stream.get("official", False) else 0,
+                1 if stream.get("main", False) else 0,
+                1 if stream.get("is_automated", False) else 0,
+                stream.get("viewer_count", 0) or 0,
+                stream.get("title", "") or ""
+            ))
+        
+        return rows
+    
+    @staticmethod
+    def _normalize_stream_row(values) -> Tuple:
+        """Linha do banco no formato de _build_stream_rows (BOOLEAN/NULL normalizados)."""
+        (platform, channel_name, url, raw_url, language,
+         is_official, is_main, is_automated, viewer_count, title) = values
+        return (
+            platform, channel_name, url, raw_url, language,
+            1 if is_official else 0,
+            1 if is_main else 0,
+            1 if is_automated else 0,
+            viewer_count or 0,
+            title or ""
+        )
+    
+    async def _fetch_stream_rows(self, client, match_ids: List[int]) -> Dict[int, Dict[Tuple[str, str], Tuple]]:
+        """
+        Linhas atuais de match_streams por partida, indexadas por (platform, channel_name).
+        
+        Uma consulta IN (...) por bloco de IN_CHUNK_SIZE partidas.
+        """
+        stored: Dict[int, Dict[Tuple[str, str], Tuple]] = {match_id: {} for match_id in match_ids}
+        columns = ", ".join(self.STREAM_COLUMNS)
+        
+        for start in range(0, len(match_ids), self.IN_CHUNK_SIZE):
+            chunk = match_ids[start:start + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            result = await client.execute(
+                f"SELECT match_id, {columns} FROM match_streams WHERE match_id IN ({placeholders})",
+                chunk
+            )
+            for row in result.rows:
+                normalized = self._normalize_stream_row(row[1:])
+                stored[int(row[0])][(normalized[0], normalized[1])] = normalized
+        
+        return stored
+    
+    def _build_stream_statements(
+        self,
+        match_id: int,
+        streams_list: List[Dict],
+        stored: Dict[Tuple[str, str], Tuple],
+        source: str = "pandascore"
+    ) -> List[Tuple[str, List]]:
+        """
+        Monta os statements que levam os streams de uma partida ao estado novo.
+        
+        Diff contra as linhas atuais por (platform, channel_name), a chave
+        UNIQUE da tabela: INSERT do que é novo, UPDATE do que mudou e DELETE
+        do que sumiu — apenas entre as linhas da mesma origem (PandaScore =
+        is_automated 0, busca automática = 1). Streams da PandaScore
+        inalterados não geram nenhum statement e não apagam as automáticas.
+        
+        Não executa nada: o chamador envia os statements em um batch.
+        
+        Args:
+            match_id: ID da partida
+            streams_list: Lista de streams da API PandaScore
+            stored: Linhas atuais da partida (ver _fetch_stream_rows)
+            source: Origem dos streams ('pandascore' ou 'twitch_search')
+            
+        Returns:
+            Lista de tuplas (sql, args); vazia se nada mudou
+        """
+        automated = 0 if source == "pandascore" else 1
+        
+        # Deduplicar pela chave UNIQUE (último vence)
+        incoming = {}
+        for row in self._build_stream_rows(match_id, streams_list, source=source):
+            incoming[(row[0], row[1])] = row
+        
+        statements = []
+        inserted = updated = deleted = 0
+        
+        for key, row in incoming.items():
+            current = stored.get(key)
+            if current is None:
+                statements.append((
+                    """INSERT INTO match_streams 
+                       (match_id, platform, channel_name, url, raw_url, language, is_official, is_main, is_automated, viewer_count, title)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [match_id, *row]
+                ))
+                inserted += 1
+            elif current != row:
+                # A busca automática não sobrescreve um stream da PandaScore com o mesmo canal
+                if automated and not current[7]:
+                    continue
+                statements.append((
+                    """UPDATE match_streams
+                       SET url = ?, raw_url = ?, language = ?, is_official = ?, is_main = ?,
+                           is_automated = ?, viewer_count = ?, title = ?, updated_at = CURRENT_TIMESTAMP
+                       WHERE match_id = ? AND platform = ? AND channel_name = ?""",
+                    [*row[2:], match_id, row[0], row[1]]
+                ))
+                updated += 1
+        
+        for key, current in stored.items():
+            if key not in incoming and current[7] == automated:
+                statements.append((
+                    "DELETE FROM match_streams WHERE match_id = ? AND platform = ? AND channel_name = ?",
+                    [match_id, key[0], key[1]]
+                ))
+                deleted += 1
+        
+        if statements:
+            emoji, source_label = self._stream_source_label(source)
+            logger.info(f"   {emoji} Streams do match {match_id}: +{inserted} ~{updated} -{deleted} [{source_label}]")
+        return statements
+    
     async def get_match_streams(self, match_id: int) -> List[Dict]:
         """
         Obtém streams de uma partida do cache.
@@ -505,22 +984,7 @@ class MatchCacheManager:
                 timeout=self.QUERY_TIMEOUT
             )
             
-            streams = []
-            for row in result.rows:
-                streams.append({
-                    "platform": row[0],
-                    "channel_name": row[1],
-                    "url": row[2],
-                    "raw_url": row[3],
-                    "language": row[4],
-                    "is_official": bool(row[5]),
-                    "is_main": bool(row[6]),
-                    "is_automated": bool(row[7]) if row[7] is not None else False,
-                    "viewer_count": row[8] if row[8] is not None else 0,
-                    "title": row[9] if row[9] is not None else ""
-                })
-            
-            return streams
+            return [self._stream_dict(row) for row in result.rows]
             
         except asyncio.TimeoutError:
             logger.warning(f"⏱️ Timeout ao buscar streams para match {match_id}")
@@ -529,10 +993,68 @@ class MatchCacheManager:
             logger.error(f"✗ Erro ao buscar streams: {e}")
             return []
     
+    async def get_streams_for_matches(self, match_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Obtém os streams de várias partidas (mesmo formato e ordem de get_match_streams).
+        
+        Uma consulta IN (...) por bloco de IN_CHUNK_SIZE partidas em vez de
+        uma por partida; partidas sem streams (ou com erro) ficam com [].
+        
+        Args:
+            match_ids: IDs das partidas
+            
+        Returns:
+            Dict match_id -> lista de streams
+        """
+        streams_by_match: Dict[int, List[Dict]] = {match_id: [] for match_id in match_ids}
+        try:
+            client = await self.get_client()
+            
+            for start in range(0, len(match_ids), self.IN_CHUNK_SIZE):
+                chunk = match_ids[start:start + self.IN_CHUNK_SIZE]
+                placeholders = ", ".join("?" for _ in chunk)
+                result = await asyncio.wait_for(
+                    client.execute(
+                        f"""SELECT match_id, platform, channel_name, url, raw_url, language, is_official, is_main, is_automated, viewer_count, title
+                           FROM match_streams
+                           WHERE match_id IN ({placeholders})
+                           ORDER BY match_id, is_main DESC, is_official DESC, language ASC""",
+                        chunk
+                    ),
+                    timeout=self.QUERY_TIMEOUT
+                )
+                for row in result.rows:
+                    streams_by_match[int(row[0])].append(self._stream_dict(row[1:]))
+            
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Timeout ao buscar streams de {len(match_ids)} partida(s)")
+        except Exception as e:
+            logger.error(f"✗ Erro ao buscar streams: {e}")
+        
+        return streams_by_match
+    
+    @staticmethod
+    def _stream_dict(row) -> Dict:
+        """Linha de match_streams (colunas de get_match_streams) no formato dos embeds."""
+        return {
+            "platform": row[0],
+            "channel_name": row[1],
+            "url": row[2],
+            "raw_url": row[3],
+            "language": row[4],
+            "is_official": bool(row[5]),
+            "is_main": bool(row[6]),
+            "is_automated": bool(row[7]) if row[7] is not None else False,
+            "viewer_count": row[8] if row[8] is not None else 0,
+            "title": row[9] if row[9] is not None else ""
+        }
+    
     async def get_guild_timezone(self, guild_id: int) -> Optional[str]:
         """
         Obtém o timezone configurado para um servidor (guild).
         
+        Lido do GuildConfigCache (sem query ao banco após a carga inicial).
+        
         Args:
             guild_id: ID do servidor Discord
             
@@ -540,19 +1062,9 @@ class MatchCacheManager:
             Timezone (ex: 'America/Sao_Paulo') ou None se não configurado
         """
         try:
-            client = await self.get_client()
-            
-            result = await asyncio.wait_for(
-                client.execute(
-                    "SELECT timezone FROM guild_config WHERE guild_id = ?",
-                    [guild_id]
-                ),
-                timeout=self.QUERY_TIMEOUT
-            )
-            
-            if result.rows and len(result.rows) > 0:
-                timezone = result.rows[0][0]
-                return timezone if timezone else None
+            config = await self.guild_configs.get(guild_id)
+            if config:
+                return config.get("timezone") or None
             
             return None
             
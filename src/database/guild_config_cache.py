@@ -0,0 +1,156 @@
+"""
+Cache em memória da tabela guild_config.
+
+Carrega todas as configurações de servidores uma vez na inicialização e é
+atualizado pelos comandos que escrevem em guild_config. Um refresh periódico
+funciona como rede de segurança para escritas feitas fora do bot.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from nextcord.ext import tasks
+
+logger = logging.getLogger(__name__)
+
+_CONFIG_COLUMNS = (
+    "guild_id",
+    "notification_channel_id",
+    "notify_upcoming",
+    "notify_live",
+    "notify_results",
+    "language",
+    "timezone",
+)
+
+
+def _row_to_config(row) -> Dict:
+    """Converte uma linha de guild_config em dict (libSQL pode retornar bytes em TEXT)."""
+    config = {}
+    for idx, column in enumerate(_CONFIG_COLUMNS):
+        value = row[idx]
+        if isinstance(value, bytes):
+            value = value.decode()
+        config[column] = value
+    return config
+
+
+class GuildConfigCache:
+    """Cache read-through de guild_config com invalidação nas escritas."""
+    
+    # Intervalo do refresh completo de segurança
+    REFRESH_MINUTES = 10
+    
+    def __init__(self, cache_manager):
+        """
+        Inicializa o cache de configurações.
+        
+        Args:
+            cache_manager: MatchCacheManager (fornece o cliente libSQL)
+        """
+        self.cache_manager = cache_manager
+        self._configs: Dict[int, Dict] = {}
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+    
+    async def load(self) -> int:
+        """
+        Carrega todas as linhas de guild_config.
+        
+        Returns:
+            Número de servidores carregados
+        """
+        async with self._load_lock:
+            client = await self.cache_manager.get_client()
+            result = await asyncio.wait_for(
+                client.execute(f"SELECT {', '.join(_CONFIG_COLUMNS)} FROM guild_config"),
+                timeout=10.0
+            )
+            self._configs = {config["guild_id"]: config for config in map(_row_to_config, result.rows)}
+            self.loaded = True
+            logger.debug(f"⚙️ {len(self._configs)} configuração(ões) de servidor carregada(s)")
+            return len(self._configs)
+    
+    async def get(self, guild_id: int) -> Optional[Dict]:
+        """
+        Obtém a configuração de um servidor.
+        
+        Depois da carga inicial, um servidor ausente do cache não tem
+        configuração (toda escrita do bot passa por refresh_guild).
+        
+        Args:
+            guild_id: ID do servidor Discord
+        
+        Returns:
+            Dict com as colunas de guild_config ou None
+        """
+        if not self.loaded:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao carregar configurações de servidores: {e}")
+                return await self._fetch_guild(guild_id)
+        return self._configs.get(guild_id)
+    
+    async def refresh_guild(self, guild_id: int) -> Optional[Dict]:
+        """
+        Relê a configuração de um servidor após uma escrita em guild_config.
+        
+        Args:
+            guild_id: ID do servidor Discord
+        
+        Returns:
+            Configuração atualizada ou None
+        """
+        config = await self._fetch_guild(guild_id)
+        if config:
+            self._configs[guild_id] = config
+        else:
+            self._configs.pop(guild_id, None)
+        return config
+    
+    def get_guild_ids(self, *flags: str) -> List[int]:
+        """
+        Lista servidores com pelo menos uma das flags ativas.
+        
+        Args:
+            flags: Colunas booleanas (ex: 'notify_upcoming', 'notify_live')
+        
+        Returns:
+            Lista de guild_ids
+        """
+        return [
+            guild_id for guild_id, config in self._configs.items()
+            if any(config.get(flag) for flag in flags)
+        ]
+    
+    async def _fetch_guild(self, guild_id: int) -> Optional[Dict]:
+        client = await self.cache_manager.get_client()
+        result = await asyncio.wait_for(
+            client.execute(
+                f"SELECT {', '.join(_CONFIG_COLUMNS)} FROM guild_config WHERE guild_id = ?",
+                [guild_id]
+            ),
+            timeout=self.cache_manager.QUERY_TIMEOUT
+        )
+        return _row_to_config(result.rows[0]) if result.rows else None
+    
+    @tasks.loop(minutes=REFRESH_MINUTES)
+    async def refresh_task(self):
+        """Recarrega todas as configurações periodicamente (rede de segurança)."""
+        try:
+            count = await self.load()
+            logger.info(f"⚙️ Configurações de servidores recarregadas ({count})")
+        except Exception as e:
+            logger.error(f"✗ Erro ao recarregar configurações de servidores: {e}")
+    
+    def start(self):
+        """Inicia o refresh periódico (a primeira execução faz a carga inicial)."""
+        if not self.refresh_task.is_running():
+            self.refresh_task.start()
+    
+    def stop(self):
+        """Para o refresh periódico."""
+        if self.refresh_task.is_running():
+            self.refresh_task.cancel()
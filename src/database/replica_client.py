@@ -0,0 +1,174 @@
+"""
+Cliente libSQL com réplica local embutida (embedded replica).
+
+Mantém um arquivo SQLite local sincronizado com o primário remoto (Turso):
+leituras são servidas do disco local e escritas são encaminhadas ao primário.
+Expõe a mesma interface usada do libsql_client (execute, batch, close), então
+o resto do bot não precisa saber qual cliente está em uso.
+
+Requer o pacote opcional `libsql` (pip install libsql).
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from libsql_client import ResultSet, Row
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddedReplicaClient:
+    """Adaptador assíncrono para uma conexão `libsql` com réplica local."""
+    
+    def __init__(
+        self,
+        local_path: str,
+        sync_url: str,
+        auth_token: Optional[str] = None,
+        sync_interval: float = 60.0
+    ):
+        """
+        Prepara o cliente sem abrir a conexão (use `await EmbeddedReplicaClient.open(...)`).
+        
+        Args:
+            local_path: Caminho do arquivo SQLite local da réplica
+            sync_url: URL do primário remoto (libsql://...)
+            auth_token: Token de autenticação do Turso
+            sync_interval: Intervalo (segundos) da sincronização em background
+        
+        Raises:
+            ImportError: Se o pacote `libsql` não estiver instalado
+        """
+        import libsql
+        
+        self._libsql = libsql
+        self.local_path = local_path
+        self.sync_url = sync_url
+        self.auth_token = auth_token
+        self.sync_interval = sync_interval
+        self._conn = None
+        # A conexão não é thread-safe: uma única thread executa todas as operações
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="libsql-replica")
+        self._closed = False
+    
+    @classmethod
+    async def open(
+        cls,
+        local_path: str,
+        sync_url: str,
+        auth_token: Optional[str] = None,
+        sync_interval: float = 60.0
+    ) -> "EmbeddedReplicaClient":
+        """
+        Abre a réplica local e faz a sincronização inicial com o primário.
+        
+        A conexão e o primeiro sync (que pode baixar o banco inteiro) rodam
+        na thread da réplica, sem bloquear o event loop (e o heartbeat do
+        Discord) durante a inicialização.
+        
+        Args:
+            local_path: Caminho do arquivo SQLite local da réplica
+            sync_url: URL do primário remoto (libsql://...)
+            auth_token: Token de autenticação do Turso
+            sync_interval: Intervalo (segundos) da sincronização em background
+        
+        Returns:
+            Cliente pronto para uso
+        
+        Raises:
+            ImportError: Se o pacote `libsql` não estiver instalado
+        """
+        client = cls(local_path, sync_url, auth_token=auth_token, sync_interval=sync_interval)
+        try:
+            await client._run(client._connect_sync)
+        except BaseException:
+            client._executor.shutdown(wait=False)
+            raise
+        
+        logger.info(f"🔁 Réplica local sincronizada: {local_path} ← {sync_url} (a cada {sync_interval:.0f}s)")
+        return client
+    
+    def _connect_sync(self):
+        Path(self.local_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = self._libsql.connect(
+            self.local_path,
+            sync_url=self.sync_url,
+            auth_token=self.auth_token or "",
+            sync_interval=self.sync_interval
+        )
+        self._conn.sync()
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def _execute_sync(self, sql: str, args: Optional[Sequence] = None) -> ResultSet:
+        cursor = self._conn.execute(sql, tuple(args or ()))
+        return self._to_result_set(cursor)
+    
+    @staticmethod
+    def _to_result_set(cursor) -> ResultSet:
+        """Converte um cursor libsql no ResultSet do libsql_client (acesso por índice ou nome)."""
+        columns = tuple(col[0] for col in (cursor.description or ()))
+        column_idxs = {name: idx for idx, name in enumerate(columns)}
+        rows = [Row(column_idxs, tuple(values)) for values in cursor.fetchall()] if columns else []
+        return ResultSet(columns, rows, cursor.rowcount, cursor.lastrowid)
+    
+    def _execute_and_commit(self, sql: str, args: Optional[Sequence] = None) -> ResultSet:
+        try:
+            result = self._execute_sync(sql, args)
+            if self._conn.in_transaction:
+                self._conn.commit()
+            return result
+        except Exception:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+    
+    def _batch_sync(self, statements: List) -> List[ResultSet]:
+        try:
+            results = []
+            for stmt in statements:
+                if isinstance(stmt, str):
+                    results.append(self._execute_sync(stmt))
+                elif hasattr(stmt, "sql"):
+                    results.append(self._execute_sync(stmt.sql, stmt.args))
+                else:
+                    sql, args = stmt[0], (stmt[1] if len(stmt) > 1 else None)
+                    results.append(self._execute_sync(sql, args))
+            if self._conn.in_transaction:
+                self._conn.commit()
+            return results
+        except Exception:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+    
+    async def execute(self, sql: str, args: Optional[Sequence] = None) -> ResultSet:
+        """Executa um statement (leitura local; escrita encaminhada ao primário)."""
+        return await self._run(self._execute_and_commit, sql, args)
+    
+    async def batch(self, statements: List) -> List[ResultSet]:
+        """Executa vários statements em uma única transação."""
+        return await self._run(self._batch_sync, statements)
+    
+    async def sync(self):
+        """Força sincronização imediata da réplica local com o primário."""
+        await self._run(self._conn.sync)
+    
+    async def close(self):
+        """Fecha a conexão e libera a thread da réplica."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._run(self._conn.close)
+        finally:
+            self._executor.shutdown(wait=False)
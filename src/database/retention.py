@@ -0,0 +1,111 @@
+"""
+🧹 Retenção das tabelas de notificações
+Remove lembretes/resultados já enviados ou órfãos em blocos limitados e
+compacta o banco em seguida.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Tabelas compactadas (mesma semântica de sent/sent_at/scheduled_time)
+NOTIFICATION_TABLES = ("match_reminders", "match_result_notifications")
+
+
+async def _count_rows(client, table: str) -> int:
+    result = await client.execute(f"SELECT COUNT(*) FROM {table}")
+    return result.rows[0][0] if result.rows else 0
+
+
+async def _delete_in_chunks(client, table: str, where: str, args: list, chunk_size: int, max_chunks: int) -> int:
+    """Apaga as linhas que atendem `where` em blocos de `chunk_size` (no máximo `max_chunks` blocos)."""
+    deleted = 0
+    for _ in range(max_chunks):
+        result = await client.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {where} LIMIT ?)",
+            args + [chunk_size]
+        )
+        affected = result.rows_affected or 0
+        deleted += affected
+        if affected < chunk_size:
+            break
+        
+        # Ceder o event loop entre blocos (envios e comandos continuam fluindo)
+        await asyncio.sleep(0)
+    
+    return deleted
+
+
+async def compact_notification_tables(
+    client,
+    sent_retention_hours: int = 48,
+    orphan_grace_hours: int = 6,
+    chunk_size: int = 500,
+    max_chunks: int = 200
+) -> Dict:
+    """
+    Remove notificações que não serão mais usadas e compacta o banco.
+    
+    - Enviadas (sent = 1) há mais de `sent_retention_hours`
+    - Órfãs: a partida já saiu de matches_cache e o horário passou há mais
+      de `orphan_grace_hours` (nunca poderão ser enviadas)
+    
+    Args:
+        client: Cliente libSQL
+        sent_retention_hours: Horas mantidas após o envio (para diagnóstico)
+        orphan_grace_hours: Tolerância antes de apagar linhas sem partida em cache
+        chunk_size: Linhas apagadas por statement
+        max_chunks: Limite de blocos por tabela em uma execução
+    
+    Returns:
+        Dict com estatísticas por tabela (total_before, deleted_sent,
+        deleted_orphans, total_after)
+    """
+    stats = {}
+    
+    now = datetime.now()
+    sent_cutoff = (now - timedelta(hours=sent_retention_hours)).isoformat()
+    orphan_cutoff = (now - timedelta(hours=orphan_grace_hours)).isoformat()
+    
+    try:
+        for table in NOTIFICATION_TABLES:
+            table_stats = {"total_before": await _count_rows(client, table)}
+            
+            table_stats["deleted_sent"] = await _delete_in_chunks(
+                client, table,
+                "sent = 1 AND sent_at < ?", [sent_cutoff],
+                chunk_size, max_chunks
+            )
+            
+            table_stats["deleted_orphans"] = await _delete_in_chunks(
+                client, table,
+                f"scheduled_time < ? AND NOT EXISTS "
+                f"(SELECT 1 FROM matches_cache mc WHERE mc.match_id = {table}.match_id)",
+                [orphan_cutoff],
+                chunk_size, max_chunks
+            )
+            
+            table_stats["total_after"] = await _count_rows(client, table)
+            stats[table] = table_stats
+            
+            logger.info(f"🧹 {table}: {table_stats['total_before']} → {table_stats['total_after']} "
+                       f"({table_stats['deleted_sent']} enviadas, {table_stats['deleted_orphans']} órfãs)")
+        
+        # Compactação: incremental_vacuum só tem efeito com auto_vacuum=INCREMENTAL;
+        # optimize atualiza as estatísticas do planner. Nem todo servidor libSQL aceita PRAGMAs.
+        deleted_total = sum(s["deleted_sent"] + s["deleted_orphans"] for s in stats.values())
+        if deleted_total > 0:
+            for pragma in ("PRAGMA incremental_vacuum", "PRAGMA optimize"):
+                try:
+                    await client.execute(pragma)
+                except Exception as e:
+                    logger.debug(f"   {pragma} não suportado: {e}")
+        
+        return stats
+    
+    except Exception as e:
+        logger.error(f"✗ Erro durante compactação das notificações: {e}")
+        raise
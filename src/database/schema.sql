@@ -6,12 +6,15 @@ CREATE TABLE IF NOT EXISTS matches_cache (
     id INTEGER PRIMARY KEY,
     match_id INTEGER UNIQUE NOT NULL,
     match_data TEXT NOT NULL,  -- JSON serializado da partida
+    match_hash TEXT,           -- Digest SHA-1 do JSON canônico (detecta mudanças)
+    temporal_anchor TEXT,      -- end_at ou begin_at em UTC ('YYYY-MM-DDTHH:MM:SSZ'), janela de 42h
     status TEXT NOT NULL,      -- not_started, running, finished
     tournament_name TEXT,
     begin_at DATETIME,
     end_at DATETIME,
     cached_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Última mudança de conteúdo
+    checked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP   -- Última vez que veio da API (mesmo inalterada)
 );
 
 -- Índices para melhor performance
@@ -19,6 +22,8 @@ CREATE INDEX IF NOT EXISTS idx_matches_status ON matches_cache(status);
 CREATE INDEX IF NOT EXISTS idx_matches_begin_at ON matches_cache(begin_at);
 CREATE INDEX IF NOT EXISTS idx_matches_cached_at ON matches_cache(cached_at);
 CREATE INDEX IF NOT EXISTS idx_matches_updated_at ON matches_cache(updated_at);
+CREATE INDEX IF NOT EXISTS idx_matches_checked_at ON matches_cache(checked_at);
+CREATE INDEX IF NOT EXISTS idx_matches_temporal_anchor ON matches_cache(temporal_anchor);
 
 -- Tabela de configuração de guilds (servidores)
 CREATE TABLE IF NOT EXISTS guild_config (
@@ -70,7 +75,7 @@ CREATE TABLE IF NOT EXISTS match_reminders (
     match_id INTEGER NOT NULL,
     reminder_minutes_before INTEGER NOT NULL,  -- 60, 30, 15, 5, 0 (em tempo real)
     scheduled_time DATETIME NOT NULL,           -- quando enviar o lembrete
-    sent BOOLEAN DEFAULT 0,                     -- se o lembrete foi enviado
+    sent BOOLEAN DEFAULT 0,                     -- 0 = pendente, 1 = enviado, 2 = reservado (envio em andamento)
     sent_at DATETIME,
     FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id) ON DELETE CASCADE,
     UNIQUE(guild_id, match_id, reminder_minutes_before)
@@ -80,6 +85,8 @@ CREATE INDEX IF NOT EXISTS idx_reminders_guild ON match_reminders(guild_id);
 CREATE INDEX IF NOT EXISTS idx_reminders_match ON match_reminders(match_id);
 CREATE INDEX IF NOT EXISTS idx_reminders_scheduled_time ON match_reminders(scheduled_time);
 CREATE INDEX IF NOT EXISTS idx_reminders_sent ON match_reminders(sent);
+-- Seleção dos lembretes vencidos (WHERE sent = 0 AND scheduled_time <= ?)
+CREATE INDEX IF NOT EXISTS idx_reminders_pending ON match_reminders(sent, scheduled_time);
 
 -- Tabela para notificações de RESULTADO de partidas finalizadas
 CREATE TABLE IF NOT EXISTS match_result_notifications (
@@ -87,7 +94,7 @@ CREATE TABLE IF NOT EXISTS match_result_notifications (
     guild_id INTEGER NOT NULL,
     match_id INTEGER NOT NULL,
     scheduled_time DATETIME NOT NULL,  -- Quando enviar (geralmente NOW)
-    sent BOOLEAN DEFAULT 0,            -- Se a notificação foi enviada
+    sent BOOLEAN DEFAULT 0,            -- 0 = pendente, 1 = enviada, 2 = reservada (envio em andamento)
     sent_at DATETIME,                  -- Quando foi enviada
     FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id) ON DELETE CASCADE,
     UNIQUE(guild_id, match_id)         -- Uma notificação por partida por guild
@@ -97,6 +104,8 @@ CREATE INDEX IF NOT EXISTS idx_result_notif_guild ON match_result_notifications(
 CREATE INDEX IF NOT EXISTS idx_result_notif_match ON match_result_notifications(match_id);
 CREATE INDEX IF NOT EXISTS idx_result_notif_scheduled ON match_result_notifications(scheduled_time);
 CREATE INDEX IF NOT EXISTS idx_result_notif_sent ON match_result_notifications(sent);
+-- Seleção dos resultados vencidos (WHERE sent = 0 AND scheduled_time <= ?)
+CREATE INDEX IF NOT EXISTS idx_result_notif_pending ON match_result_notifications(sent, scheduled_time);
 
 -- Tabela para cache de streams de partidas
 CREATE TABLE IF NOT EXISTS match_streams (
@@ -123,6 +132,13 @@ CREATE INDEX IF NOT EXISTS idx_streams_official ON match_streams(is_official);
 CREATE INDEX IF NOT EXISTS idx_streams_main ON match_streams(is_main);
 CREATE INDEX IF NOT EXISTS idx_streams_language ON match_streams(language);
 
+-- Cache persistente de nomes de canais do YouTube (evita reconsultar a API a cada ciclo)
+CREATE TABLE IF NOT EXISTS youtube_channel_cache (
+    identifier TEXT PRIMARY KEY,    -- ID do vídeo, @handle, c:custom ou id:canal
+    channel_name TEXT,              -- NULL = vídeo não encontrado (cache negativo)
+    resolved_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Tabela de logs de atualização do cache
 CREATE TABLE IF NOT EXISTS cache_update_log (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -170,7 +186,7 @@ SELECT
     SUM(CASE WHEN status = 'not_started' THEN 1 ELSE 0 END) as upcoming_matches,
     SUM(CASE WHEN status = 'running' THEN 1 ELSE 0 END) as live_matches,
     SUM(CASE WHEN status = 'finished' THEN 1 ELSE 0 END) as finished_matches,
-    SUM(CASE WHEN datetime(updated_at) > datetime('now', '-15 minutes') THEN 1 ELSE 0 END) as recently_updated,
-    MIN(updated_at) as oldest_update,
-    MAX(updated_at) as newest_update
+    SUM(CASE WHEN datetime(checked_at) > datetime('now', '-15 minutes') THEN 1 ELSE 0 END) as recently_updated,
+    MIN(checked_at) as oldest_update,
+    MAX(checked_at) as newest_update
 FROM matches_cache;
@@ -0,0 +1,160 @@
+"""
+Fila de gravação de streams das partidas (fora de cache_matches).
+
+cache_matches só enfileira o streams_list de cada partida; um worker em
+segundo plano junta os envios (último por partida vence), resolve os canais
+do YouTube em lote, compara com as linhas já gravadas em match_streams e
+grava apenas as diferenças (inserts/updates/deletes), em um único batch.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEnrichmentQueue:
+    """Fila deduplicada por match_id que grava streams só quando mudam."""
+    
+    # Espera após o primeiro envio para juntar os streams de um ciclo inteiro
+    FLUSH_DELAY = 0.5
+    
+    def __init__(self, cache_manager):
+        """
+        Inicializa a fila.
+        
+        Args:
+            cache_manager: MatchCacheManager (cliente libSQL e normalização dos streams)
+        """
+        self.cache_manager = cache_manager
+        # match_id -> (streams_list, source)
+        self._pending: Dict[int, Tuple[List[Dict], str]] = {}
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+        
+        # Métricas
+        self.submitted = 0
+        self.written = 0
+        self.unchanged = 0
+    
+    def submit(self, match_id: int, streams_list: List[Dict], source: str = "pandascore"):
+        """Enfileira os streams de uma partida (substitui um envio pendente da mesma partida)."""
+        if not match_id or not streams_list:
+            return
+        
+        self._pending[match_id] = (streams_list, source)
+        self.submitted += 1
+        self._idle.clear()
+        self._wake.set()
+        self._ensure_worker()
+    
+    def submit_many(self, matches: List[Dict], source: str = "pandascore"):
+        """Enfileira o streams_list de cada partida que tiver streams."""
+        for match in matches:
+            if match.get("streams_list"):
+                self.submit(match.get("id"), match["streams_list"], source=source)
+    
+    async def write_now(self, matches: List[Dict], source: str = "pandascore"):
+        """Grava os streams das partidas imediatamente, sem passar pela fila."""
+        pending = {
+            match["id"]: (match["streams_list"], source)
+            for match in matches
+            if match.get("id") and match.get("streams_list")
+        }
+        self.submitted += len(pending)
+        try:
+            await self._process(pending)
+        except Exception as e:
+            logger.error(f"✗ Erro ao gravar streams de {len(pending)} partida(s): {e}")
+    
+    def _ensure_worker(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker(), name="stream-enrichment")
+    
+    async def flush(self, timeout: float = 30.0):
+        """Aguarda até a fila esvaziar (ex: antes de desligar)."""
+        if self._pending or not self._idle.is_set():
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ {len(self._pending)} partida(s) com streams não gravados")
+    
+    async def stop(self):
+        """Grava o que estiver pendente e encerra o worker."""
+        await self.flush()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    def get_stats(self) -> Dict:
+        """Retorna contadores da fila (pendentes, enviados, gravados, inalterados)."""
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "written": self.written,
+            "unchanged": self.unchanged,
+        }
+    
+    async def _worker(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.FLUSH_DELAY)
+            self._wake.clear()
+            
+            pending, self._pending = self._pending, {}
+            try:
+                await self._process(pending)
+            except Exception as e:
+                logger.error(f"✗ Erro ao gravar streams de {len(pending)} partida(s): {e}")
+            
+            if not self._pending:
+                self._idle.set()
+    
+    async def _process(self, pending: Dict[int, Tuple[List[Dict], str]]):
+        if not pending:
+            return
+        
+        cache_manager = self.cache_manager
+        
+        # Canais do YouTube de todas as partidas em um único lote
+        await cache_manager._resolve_youtube_channels(
+            stream for streams_list, _ in pending.values() for stream in streams_list
+        )
+        
+        client = await cache_manager.get_client()
+        stored = await cache_manager._fetch_stream_rows(client, list(pending))
+        
+        statements_by_match = []
+        for match_id, (streams_list, source) in pending.items():
+            statements = cache_manager._build_stream_statements(
+                match_id, streams_list, stored[match_id], source=source
+            )
+            if not statements:
+                self.unchanged += 1
+                continue
+            
+            statements_by_match.append((match_id, statements))
+        
+        if not statements_by_match:
+            logger.debug(f"📡 Streams inalterados em {len(pending)} partida(s)")
+            return
+        
+        try:
+            await client.batch([stmt for _, stmts in statements_by_match for stmt in stmts])
+            self.written += len(statements_by_match)
+        except Exception as e:
+            # Isolar a partida com erro (ex: canal duplicado) sem perder as demais
+            logger.warning(f"⚠️ Batch de streams falhou ({e}), gravando por partida...")
+            for match_id, statements in statements_by_match:
+                try:
+                    await client.batch(statements)
+                    self.written += 1
+                except Exception as match_error:
+                    logger.error(f"✗ Erro ao gravar streams do match {match_id}: {match_error}")
+        
+        logger.info(f"📡 Streams: {len(statements_by_match)} partida(s) com mudanças, "
+                   f"{len(pending) - len(statements_by_match)} inalteradas")
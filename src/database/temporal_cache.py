@@ -3,13 +3,20 @@
 Mantém o cache com cobertura de exatamente 42 horas usando datas da API
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
-import json
 
 logger = logging.getLogger(__name__)
 
+# Formato de temporal_anchor (UTC, ordenável como texto)
+ANCHOR_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Paginação de ensure_temporal_coverage
+COVERAGE_PREFETCH_PAGES = 3
+MAX_COVERAGE_PAGES = 20
+
 
 class TemporalCacheManager:
     """Gerencia cache com cobertura temporal de 42 horas."""
@@ -75,6 +82,24 @@ class TemporalCacheManager:
         
         return None
     
+    @staticmethod
+    def format_anchor(match: Dict) -> Optional[str]:
+        """
+        Retorna o anchor da partida no formato da coluna temporal_anchor.
+        
+        Args:
+            match: Dados da partida
+            
+        Returns:
+            String UTC 'YYYY-MM-DDTHH:MM:SSZ' ou None
+        """
+        anchor = TemporalCacheManager.get_match_temporal_anchor(match)
+        if not anchor:
+            return None
+        if anchor.tzinfo is None:
+            anchor = anchor.replace(tzinfo=timezone.utc)
+        return anchor.astimezone(timezone.utc).strftime(ANCHOR_FORMAT)
+    
     @staticmethod
     def is_within_temporal_window(match: Dict) -> bool:
         """
@@ -95,21 +120,56 @@ class TemporalCacheManager:
         return start_time <= anchor <= end_time
 
 
+# Preenche temporal_anchor das linhas gravadas antes da coluna existir
+TEMPORAL_ANCHOR_BACKFILL_SQL = f"""
+    UPDATE matches_cache
+    SET temporal_anchor = strftime('{ANCHOR_FORMAT}', COALESCE(end_at, begin_at))
+    WHERE temporal_anchor IS NULL
+    AND COALESCE(end_at, begin_at) IS NOT NULL
+"""
+
+
+async def backfill_temporal_anchor(client) -> int:
+    """
+    Preenche temporal_anchor de linhas antigas (NULL) a partir de end_at/begin_at.
+    
+    Sem isso o DELETE indexado de cleanup_expired_cache nunca expira essas
+    linhas. Usa o índice de temporal_anchor (IS NULL), então é barato
+    quando não há nada a preencher.
+    
+    Args:
+        client: Cliente libSQL
+        
+    Returns:
+        Número de linhas preenchidas
+    """
+    result = await client.execute(TEMPORAL_ANCHOR_BACKFILL_SQL)
+    filled = result.rows_affected or 0
+    if filled:
+        logger.info(f"🕐 temporal_anchor preenchido em {filled} partida(s) antigas")
+    return filled
+
+
 async def cleanup_expired_cache(client) -> Dict:
     """
     Remove partidas mais antigas que 42 horas do cache.
     
+    Usa a coluna indexada temporal_anchor: um único DELETE por faixa de
+    índice, sem ler nem decodificar match_data. Partidas futuras (anchor
+    depois de agora) são mantidas.
+    
     Args:
         client: Cliente libSQL
         
     Returns:
-        Dict com estatísticas da limpeza
+        Dict com estatísticas da limpeza (inclui "deleted_ids")
     """
     stats = {
         "total_before": 0,
         "deleted": 0,
         "by_status": {},
-        "total_after": 0
+        "total_after": 0,
+        "deleted_ids": []
     }
     
     try:
@@ -119,46 +179,34 @@ async def cleanup_expired_cache(client) -> Dict:
         
         logger.info(f"🧹 Iniciando limpeza temporal de cache ({stats['total_before']} partidas)")
         
-        # Buscar todas as partidas
-        result = await client.execute("SELECT match_id, match_data, status FROM matches_cache")
+        # Preencher anchor de linhas antigas (gravadas antes da coluna existir)
+        await backfill_temporal_anchor(client)
         
         cutoff_time, _ = TemporalCacheManager.get_temporal_window()
-        cutoff_iso = cutoff_time.isoformat() + "Z"
+        cutoff = cutoff_time.strftime(ANCHOR_FORMAT)
         
-        deleted_count = 0
+        # Partidas sem anchor (sem end_at/begin_at) são mantidas, como antes
+        result = await client.execute(
+            "DELETE FROM matches_cache WHERE temporal_anchor < ? RETURNING match_id, status",
+            [cutoff]
+        )
         
-        for match_id, match_data_json, status in result.rows:
-            try:
-                match_data = json.loads(match_data_json)
-                
-                # Checar se está fora da janela
-                if not TemporalCacheManager.is_within_temporal_window(match_data):
-                    await client.execute(
-                        "DELETE FROM matches_cache WHERE match_id = ?",
-                        [match_id]
-                    )
-                    deleted_count += 1
-                    
-                    # Contabilizar por status
-                    if status not in stats["by_status"]:
-                        stats["by_status"][status] = 0
-                    stats["by_status"][status] += 1
-                    
-                    anchor = TemporalCacheManager.get_match_temporal_anchor(match_data)
-                    logger.debug(f"   🗑️ Deletado: {match_id} ({status}) - Anchor: {anchor}")
-                    
-            except Exception as e:
-                logger.error(f"✗ Erro ao processar match {match_id}: {e}")
-        
-        stats["deleted"] = deleted_count
+        for match_id, status in result.rows:
+            stats["deleted_ids"].append(match_id)
+            
+            # Contabilizar por status
+            if status not in stats["by_status"]:
+                stats["by_status"][status] = 0
+            stats["by_status"][status] += 1
+            
+            logger.debug(f"   🗑️ Deletado: {match_id} ({status})")
         
-        # Contar depois
-        result = await client.execute("SELECT COUNT(*) as count FROM matches_cache")
-        stats["total_after"] = result.rows[0][0] if result.rows else 0
+        stats["deleted"] = len(stats["deleted_ids"])
+        stats["total_after"] = stats["total_before"] - stats["deleted"]
         
         logger.info(f"✅ Limpeza concluída:")
         logger.info(f"   Antes: {stats['total_before']} partidas")
-        logger.info(f"   Deletadas: {deleted_count}")
+        logger.info(f"   Deletadas: {stats['deleted']}")
         logger.info(f"   Depois: {stats['total_after']} partidas")
         logger.info(f"   Por status: {stats['by_status']}")
         
@@ -177,7 +225,9 @@ async def ensure_temporal_coverage(
 ) -> Dict:
     """
     Garante que o cache tem cobertura temporal mínima.
-    Busca mais dados da API se necessário.
+    Busca mais dados da API se necessário: páginas em janelas paralelas de
+    COVERAGE_PREFETCH_PAGES, parando quando a partida mais antiga retornada
+    sai da janela de minimum_hours. Cada página é gravada em um único batch.
     
     Args:
         client: Cliente libSQL
@@ -186,12 +236,16 @@ async def ensure_temporal_coverage(
         target_partition_hours: Partição para busca (busca em blocos de X horas)
         
     Returns:
-        Dict com estatísticas de cobertura
+        Dict com estatísticas de cobertura (inclui "added_matches": partidas inseridas)
     """
+    # Import tardio: cache_manager importa este módulo
+    from src.database.cache_manager import MatchCacheManager
+    
     stats = {
         "current_coverage_hours": 0,
         "pages_fetched": 0,
         "matches_added": 0,
+        "added_matches": [],
         "coverage_status": "unknown",
         "oldest_match": None,
         "newest_match": None
@@ -247,78 +301,100 @@ async def ensure_temporal_coverage(
             stats["coverage_status"] = "empty"
         
         # 2. Buscar mais dados até atingir cobertura
-        logger.info(f"🔍 Buscando partidas para atingir {minimum_hours}h de cobertura...")
+        # A API retorna finished ordenadas por -end_at: basta paginar até a
+        # partida mais antiga da página passar do limite de minimum_hours.
+        boundary = datetime.now(timezone.utc) - timedelta(hours=minimum_hours)
+        boundary_str = boundary.strftime(ANCHOR_FORMAT)
+        logger.info(f"🔍 Buscando partidas para atingir {minimum_hours}h de cobertura (até {boundary_str})...")
         
-        page = 1
         total_added = 0
+        added_matches = []
+        page = 1
+        reached_boundary = False
         
-        while stats["current_coverage_hours"] < minimum_hours and page <= 20:
-            logger.info(f"   📄 Página {page}...")
-            
-            # Buscar página de finished
-            page_matches = await api_client.get_past_matches(per_page=100, page=page)
+        while not reached_boundary and page <= MAX_COVERAGE_PAGES:
+            # Pré-buscar uma janela de páginas em paralelo
+            window = list(range(page, min(page + COVERAGE_PREFETCH_PAGES, MAX_COVERAGE_PAGES + 1)))
+            logger.info(f"   📄 Páginas {window[0]}-{window[-1]}...")
             
-            if not page_matches:
-                logger.info(f"   Fim da API (página {page} vazia)")
-                break
+            responses = await asyncio.gather(
+                *(api_client.get_past_matches(per_page=100, page=p, priority="backfill") for p in window),
+                return_exceptions=True
+            )
             
-            # Armazenar matches
-            inserted = 0
-            for match in page_matches:
-                # Usar INSERT com ON CONFLICT para não duplicar
-                match_id = match.get("id")
-                match_data = json.dumps(match)
-                status = match.get("status", "finished")
-                tournament_name = match.get("tournament", {}).get("name")
-                begin_at = match.get("begin_at")
-                end_at = match.get("end_at")
+            for page_number, page_matches in zip(window, responses):
+                stats["pages_fetched"] += 1
                 
-                await client.execute("""
-                    INSERT INTO matches_cache 
-                        (match_id, match_data, status, tournament_name, begin_at, end_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ON CONFLICT(match_id) DO NOTHING
-                """, [match_id, match_data, status, tournament_name, begin_at, end_at])
+                if isinstance(page_matches, Exception):
+                    logger.error(f"   ✗ Erro na página {page_number}: {page_matches}")
+                    reached_boundary = True
+                    break
                 
-                inserted += 1
-                total_added += 1
-            
-            logger.info(f"      ✅ {inserted} partidas adicionadas")
-            
-            # Recalcular cobertura
-            result = await client.execute("""
-                SELECT 
-                    MIN(CASE 
-                        WHEN end_at IS NOT NULL THEN end_at
-                        WHEN begin_at IS NOT NULL THEN begin_at
-                        ELSE updated_at
-                    END) as oldest_timestamp,
-                    MAX(CASE 
-                        WHEN end_at IS NOT NULL THEN end_at
-                        WHEN begin_at IS NOT NULL THEN begin_at
-                        ELSE updated_at
-                    END) as newest_timestamp
-                FROM matches_cache
-            """)
-            
-            if result.rows and result.rows[0][0]:
-                oldest_str, newest_str = result.rows[0]
-                oldest = TemporalCacheManager.parse_api_datetime(oldest_str)
-                newest = TemporalCacheManager.parse_api_datetime(newest_str)
+                if not page_matches:
+                    logger.info(f"   Fim da API (página {page_number} vazia)")
+                    reached_boundary = True
+                    break
                 
-                if oldest and newest:
-                    # Garantir que ambos são timezone-aware para subtração
-                    if oldest.tzinfo is None:
-                        oldest = oldest.replace(tzinfo=timezone.utc)
-                    if newest.tzinfo is None:
-                        newest = newest.replace(tzinfo=timezone.utc)
+                # Só gravar o que está dentro da janela (o resto seria apagado na próxima limpeza)
+                in_window = []
+                for match in page_matches:
+                    anchor = TemporalCacheManager.format_anchor(match)
+                    if anchor and anchor < boundary_str:
+                        reached_boundary = True
+                        continue
+                    in_window.append(match)
+                
+                if in_window:
+                    # Uma transação por página (um round trip); mesmo statement de
+                    # cache_matches, com match_hash, para o próximo ciclo não regravar
+                    results = await client.batch([
+                        MatchCacheManager._build_match_upsert(match, overwrite=False, default_status="finished")
+                        for match in in_window
+                    ])
                     
-                    current_coverage = (newest - oldest).total_seconds() / 3600
-                    stats["current_coverage_hours"] = round(current_coverage, 1)
+                    inserted = [match for match, res in zip(in_window, results) if res.rows_affected]
+                    added_matches.extend(inserted)
+                    total_added += len(inserted)
+                    logger.info(f"      ✅ Página {page_number}: {len(inserted)} partidas adicionadas")
+                
+                if reached_boundary:
+                    logger.info(f"   🏁 Limite de {minimum_hours}h alcançado na página {page_number}")
+                    break
             
-            page += 1
-            stats["pages_fetched"] += 1
+            page = window[-1] + 1
+        
+        # Recalcular cobertura uma única vez
+        result = await client.execute("""
+            SELECT 
+                MIN(CASE 
+                    WHEN end_at IS NOT NULL THEN end_at
+                    WHEN begin_at IS NOT NULL THEN begin_at
+                    ELSE updated_at
+                END) as oldest_timestamp,
+                MAX(CASE 
+                    WHEN end_at IS NOT NULL THEN end_at
+                    WHEN begin_at IS NOT NULL THEN begin_at
+                    ELSE updated_at
+                END) as newest_timestamp
+            FROM matches_cache
+        """)
+        
+        if result.rows and result.rows[0][0]:
+            oldest_str, newest_str = result.rows[0]
+            oldest = TemporalCacheManager.parse_api_datetime(oldest_str)
+            newest = TemporalCacheManager.parse_api_datetime(newest_str)
+            
+            if oldest and newest:
+                # Garantir que ambos são timezone-aware para subtração
+                if oldest.tzinfo is None:
+                    oldest = oldest.replace(tzinfo=timezone.utc)
+                if newest.tzinfo is None:
+                    newest = newest.replace(tzinfo=timezone.utc)
+                
+                current_coverage = (newest - oldest).total_seconds() / 3600
+                stats["current_coverage_hours"] = round(current_coverage, 1)
         
+        stats["added_matches"] = added_matches
         stats["matches_added"] = total_added
         
         if stats["current_coverage_hours"] >= minimum_hours:
@@ -0,0 +1,204 @@
+"""
+Cache persistente de nomes de canais do YouTube.
+
+Mapeia o identificador extraído da URL (vídeo, @handle, c:custom, id:canal)
+para o nome do canal, em memória e na tabela youtube_channel_cache, com TTL
+e cache negativo (vídeos inexistentes/privados não são consultados de novo
+a cada ciclo). Vídeos desconhecidos são resolvidos em lote (videos.list com
+até 50 IDs) antes de a escrita do cache começar: a montagem dos statements
+só faz lookups em memória.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from src.services.youtube_service import YouTubeService, get_youtube_service
+
+logger = logging.getLogger(__name__)
+
+
+class YouTubeChannelCache:
+    """Cache identificador → nome de canal do YouTube (memória + tabela)."""
+    
+    # Nomes de canal quase nunca mudam; "não encontrado" é revisto antes
+    POSITIVE_TTL = 7 * 24 * 3600
+    NEGATIVE_TTL = 6 * 3600
+    
+    # Quanto a escrita espera por vídeos novos antes de seguir com o nome provisório
+    RESOLVE_TIMEOUT = 3.0
+    
+    def __init__(self, cache_manager):
+        """
+        Inicializa o cache de canais.
+        
+        Args:
+            cache_manager: MatchCacheManager (fornece o cliente libSQL)
+        """
+        self.cache_manager = cache_manager
+        # identificador -> (nome ou None, expira em time.monotonic())
+        self._names: Dict[str, Tuple[Optional[str], float]] = {}
+        self._load_lock = asyncio.Lock()
+        self._resolve_lock = asyncio.Lock()
+        # Resoluções em andamento (referência forte até terminarem; aguardadas em close())
+        self._tasks: Set[asyncio.Task] = set()
+        self.loaded = False
+    
+    @staticmethod
+    def _is_video(identifier: str) -> bool:
+        return not identifier.startswith(("@", "c:", "id:"))
+    
+    def _remember(self, identifier: str, name: Optional[str], age: float = 0.0):
+        ttl = self.POSITIVE_TTL if name else self.NEGATIVE_TTL
+        self._names[identifier] = (name, time.monotonic() + ttl - age)
+    
+    def _fresh(self, identifier: str) -> bool:
+        entry = self._names.get(identifier)
+        return entry is not None and entry[1] > time.monotonic()
+    
+    async def load(self) -> int:
+        """
+        Carrega as entradas ainda válidas da tabela para a memória.
+        
+        Returns:
+            Número de entradas carregadas
+        """
+        async with self._load_lock:
+            if self.loaded:
+                return len(self._names)
+            
+            try:
+                client = await self.cache_manager.get_client()
+                result = await client.execute(
+                    """
+                    SELECT identifier, channel_name,
+                           (julianday('now') - julianday(resolved_at)) * 86400 AS age_seconds
+                    FROM youtube_channel_cache
+                    WHERE (channel_name IS NOT NULL AND resolved_at > datetime('now', ?))
+                       OR resolved_at > datetime('now', ?)
+                    """,
+                    [f"-{self.POSITIVE_TTL} seconds", f"-{self.NEGATIVE_TTL} seconds"]
+                )
+                
+                for row in result.rows:
+                    self._remember(row[0], row[1], float(row[2] or 0))
+                
+                logger.info(f"🎥 {len(result.rows)} canais do YouTube carregados do cache")
+            except Exception as e:
+                logger.error(f"✗ Erro ao carregar cache de canais do YouTube: {e}")
+            
+            self.loaded = True
+            return len(self._names)
+    
+    def lookup(self, url: str) -> Optional[str]:
+        """
+        Nome do canal já resolvido para a URL (somente memória, sem I/O).
+        
+        Args:
+            url: URL do YouTube
+        
+        Returns:
+            Nome do canal ou None se desconhecido/não encontrado
+        """
+        identifier = YouTubeService._extract_channel_id_from_url(url)
+        if not identifier:
+            return None
+        entry = self._names.get(identifier)
+        return entry[0] if entry else None
+    
+    async def resolve(self, urls: Iterable[str]) -> None:
+        """
+        Garante em memória o nome do canal das URLs informadas.
+        
+        Handles e custom URLs são resolvidos pela própria URL. Vídeos que
+        não estão em cache são buscados em lote na API; se isso passar de
+        RESOLVE_TIMEOUT a busca continua em segundo plano (a escrita usa o
+        nome provisório e as linhas de match_streams são corrigidas depois).
+        
+        Args:
+            urls: URLs de streams do YouTube
+        """
+        if not self.loaded:
+            await self.load()
+        
+        pending_videos: Dict[str, Set[str]] = {}
+        for url in urls:
+            identifier = YouTubeService._extract_channel_id_from_url(url)
+            if not identifier or self._fresh(identifier):
+                continue
+            
+            if self._is_video(identifier):
+                pending_videos.setdefault(identifier, set()).add(url)
+            else:
+                self._remember(identifier, await YouTubeService._extract_channel_name_fallback(url))
+        
+        if not pending_videos or not get_youtube_service().api_key:
+            return
+        
+        task = asyncio.create_task(self._resolve_videos(pending_videos))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=self.RESOLVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ {len(pending_videos)} vídeo(s) do YouTube ainda sendo resolvidos em segundo plano")
+    
+    async def close(self, timeout: float = 10.0):
+        """Aguarda as resoluções em segundo plano (ex: antes de fechar o banco)."""
+        if not self._tasks:
+            return
+        
+        tasks = list(self._tasks)
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⏱️ {len(pending)} resolução(ões) do YouTube canceladas ao encerrar")
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _resolve_videos(self, pending_videos: Dict[str, Set[str]]):
+        """Busca os vídeos na API (lote), persiste o resultado e corrige nomes provisórios."""
+        async with self._resolve_lock:
+            # Outro resolve concorrente pode ter buscado os mesmos vídeos
+            pending_videos = {vid: urls for vid, urls in pending_videos.items() if not self._fresh(vid)}
+            if not pending_videos:
+                return
+            
+            names = await get_youtube_service().get_channel_names(list(pending_videos))
+            if not names:
+                return
+            
+            statements = []
+            for video_id, name in names.items():
+                self._remember(video_id, name)
+                statements.append((
+                    """
+                    INSERT INTO youtube_channel_cache (identifier, channel_name, resolved_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(identifier) DO UPDATE SET
+                        channel_name = excluded.channel_name,
+                        resolved_at = excluded.resolved_at
+                    """,
+                    [video_id, name]
+                ))
+                
+                if name:
+                    # Linhas gravadas com o nome provisório antes da resolução
+                    for url in pending_videos.get(video_id, ()):
+                        statements.append((
+                            """
+                            UPDATE OR IGNORE match_streams SET channel_name = ?
+                            WHERE platform = 'youtube' AND raw_url = ? AND channel_name <> ?
+                            """,
+                            [name, url, name]
+                        ))
+            
+            try:
+                client = await self.cache_manager.get_client()
+                await client.batch(statements)
+            except Exception as e:
+                logger.error(f"✗ Erro ao gravar cache de canais do YouTube: {e}")
+            
+            found = sum(1 for name in names.values() if name)
+            logger.info(f"🎥 {len(names)} vídeo(s) do YouTube resolvidos em lote ({found} com canal)")
@@ -4,12 +4,16 @@ Agendador para atualização periódica do cache usando Discord Tasks.
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone
+from typing import Dict
 from nextcord.ext import tasks
 
 from src.services.pandascore_service import PandaScoreClient
+from src.services.http_transport import get_http_transport
 from src.database.cache_manager import MatchCacheManager
 from src.database.temporal_cache import cleanup_expired_cache, ensure_temporal_coverage
+from src.database.retention import compact_notification_tables
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +48,11 @@ def format_timestamp_with_tz(timestamp_str):
 class CacheScheduler:
     """Gerencia a atualização periódica do cache usando Discord Tasks."""
     
+    # Prazo total (segundos) para as requisições paralelas da atualização completa
+    FETCH_DEADLINE = 30.0
+    # Validade (segundos) do snapshot de partidas finished compartilhado entre as verificações
+    FINISHED_SNAPSHOT_TTL = 60.0
+    
     def __init__(self, api_client: PandaScoreClient, cache_manager: MatchCacheManager, notification_manager=None):
         """
         Inicializa o agendador.
@@ -58,90 +67,135 @@ class CacheScheduler:
         self.notification_manager = notification_manager
         self.is_running = False
         
+        # Snapshot das partidas finished recentes (match_id -> partida)
+        self._finished_snapshot: Dict[int, Dict] = {}
+        self._finished_snapshot_pages = 0
+        self._finished_snapshot_at = 0.0
+        self._finished_snapshot_lock = asyncio.Lock()
+        
         logger.info("⏰ CacheScheduler inicializado (Discord Tasks)")
     
+    async def _fetch_all_sources(self):
+        """
+        Busca upcoming, running, past e canceladas em paralelo.
+        
+        Cada endpoint é isolado: falha ou timeout de um não descarta os
+        demais. Endpoints que não respondem dentro de FETCH_DEADLINE são
+        cancelados e aguardados (não ficam rodando no próximo ciclo).
+        
+        Returns:
+            Tupla (lista de partidas, dict fonte -> lista ou None se falhou)
+        """
+        sources = {
+            "upcoming": (self.api_client.get_upcoming_matches(per_page=50), "partidas próximas"),
+            "running": (self.api_client.get_running_matches(), "partidas ao vivo"),
+            "past": (self.api_client.get_past_matches(hours=24, per_page=20), "partidas finalizadas"),
+            "canceled": (self.api_client.get_canceled_matches(per_page=20), "partidas canceladas/adiadas"),
+        }
+        tasks_by_source = {
+            name: asyncio.create_task(coro) for name, (coro, _) in sources.items()
+        }
+        
+        _, pending = await asyncio.wait(tasks_by_source.values(), timeout=self.FETCH_DEADLINE)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        all_matches = []
+        results = {}
+        for name, task in tasks_by_source.items():
+            label = sources[name][1]
+            results[name] = None
+            
+            if task in pending:
+                logger.error(f"  ✗ Timeout ao buscar {label} ({self.FETCH_DEADLINE:.0f}s)")
+                continue
+            
+            try:
+                matches = task.result()
+                all_matches.extend(matches)
+                results[name] = matches
+                logger.info(f"  ✓ {len(matches)} {label} obtidas")
+            except Exception as e:
+                logger.error(f"  ✗ Erro ao buscar {label}: {e}")
+        
+        return all_matches, results
+    
+    async def get_recent_finished(self, pages: int = 1) -> Dict[int, Dict]:
+        """
+        Retorna as partidas finished recentes indexadas por ID.
+        
+        A resposta da API é reaproveitada por FINISHED_SNAPSHOT_TTL segundos,
+        então as verificações de transição dentro do mesmo minuto
+        compartilham uma única busca. Um snapshot com mais páginas atende
+        pedidos menores. Buscas vazias ou com erro não são guardadas.
+        
+        Args:
+            pages: Número de páginas de 100 partidas a cobrir
+            
+        Returns:
+            Dict match_id -> partida
+        """
+        async with self._finished_snapshot_lock:
+            age = time.monotonic() - self._finished_snapshot_at
+            if age < self.FINISHED_SNAPSHOT_TTL and self._finished_snapshot_pages >= pages:
+                return self._finished_snapshot
+            
+            finished = {}
+            for page in range(1, pages + 1):
+                page_matches = await self.api_client.get_past_matches(hours=24, per_page=100, page=page)
+                finished.update((m.get('id'), m) for m in page_matches)
+                if not page_matches:
+                    break
+            
+            # Só respostas com partidas viram snapshot: uma busca vazia (ou que
+            # falhou, lançando exceção) é refeita na próxima chamada
+            if finished:
+                self._finished_snapshot = finished
+                self._finished_snapshot_pages = pages
+                self._finished_snapshot_at = time.monotonic()
+            return finished
+    
     async def update_all_matches(self):
         """
         Atualiza todas as partidas (upcoming, running, past e canceladas).
-        Usa lock para evitar overlaps com update_live_matches.
+        
+        As requisições à API rodam em paralelo e fora do lock; o lock só é
+        mantido na fase de validação/escrita, evitando overlaps com
+        update_live_matches sem bloqueá-lo durante o I/O de rede.
         """
+        logger.info("🔄 Iniciando atualização completa do cache...")
+        
+        try:
+            all_matches, results = await self._fetch_all_sources()
+        except Exception as e:
+            logger.error(f"✗ Erro ao buscar partidas da API: {e}")
+            return
+        
         # Evitar race condition com update_live_matches
         async with _cache_update_lock:
             try:
-                logger.info("🔄 Iniciando atualização completa do cache...")
-                
-                all_matches = []
-                
-                # Buscar partidas próximas
-                try:
-                    upcoming = await self.api_client.get_upcoming_matches(per_page=50)
-                    all_matches.extend(upcoming)
-                    logger.info(f"  ✓ {len(upcoming)} partidas próximas obtidas")
-                except Exception as e:
-                    logger.error(f"  ✗ Erro ao buscar partidas próximas: {e}")
-                
-                # Buscar partidas ao vivo
-                try:
-                    running = await self.api_client.get_running_matches()
-                    all_matches.extend(running)
-                    logger.info(f"  ✓ {len(running)} partidas ao vivo obtidas")
-                except Exception as e:
-                    logger.error(f"  ✗ Erro ao buscar partidas ao vivo: {e}")
-                
-                # Buscar partidas passadas (finalizadas)
-                try:
-                    past = await self.api_client.get_past_matches(hours=24, per_page=20)
-                    all_matches.extend(past)
-                    logger.info(f"  ✓ {len(past)} partidas finalizadas obtidas")
-                except Exception as e:
-                    logger.error(f"  ✗ Erro ao buscar partidas finalizadas: {e}")
-                
-                # Buscar partidas canceladas/adiadas
-                try:
-                    canceled = await self.api_client.get_canceled_matches(per_page=20)
-                    all_matches.extend(canceled)
-                    logger.info(f"  ✓ {len(canceled)} partidas canceladas/adiadas obtidas")
-                except Exception as e:
-                    logger.error(f"  ✗ Erro ao buscar partidas canceladas/adiadas: {e}")
-                
                 # 🔥 VALIDAÇÃO DE TRANSIÇÕES DE ESTADO
-                # Detecta partidas que mudaram de running → finished
-                await self.validate_state_transitions(all_matches)
+                # Detecta partidas que mudaram de running → finished.
+                # Sem a lista de ao vivo (rate limit/timeout) toda partida em cache
+                # pareceria ter saído de running: pular até o próximo ciclo.
+                if results["running"] is not None:
+                    await self.validate_state_transitions(all_matches)
+                else:
+                    logger.warning("⚠️ Partidas ao vivo indisponíveis: validação de transições adiada")
                 
                 # Cachear todas as partidas
                 if all_matches:
                     stats = await self.cache_manager.cache_matches(all_matches, "all")
-                    logger.info(f"✓ Cache atualizado: {stats['added']} novas, {stats['updated']} atualizadas")
-                    
-                    # 🚀 NOVA OTIMIZAÇÃO: Cachear streams das partidas com streams_list
-                    streams_cached = 0
-                    for match in all_matches:
-                        if match.get("streams_list"):
-                            try:
-                                await self.cache_manager.cache_streams(match["id"], match["streams_list"], source="pandascore")
-                                streams_cached += 1
-                            except Exception as e:
-                                logger.debug(f"Erro ao cachear streams do match {match.get('id')}: {e}")
-                    
-                    if streams_cached > 0:
-                        logger.info(f"  📡 {streams_cached} partidas com streams cacheadas")
+                    logger.info(f"✓ Cache atualizado: {stats['added']} novas, {stats['updated']} atualizadas, "
+                               f"{stats['unchanged']} inalteradas")
                     
-                    # Agendar lembretes para as novas partidas
-                    if self.notification_manager and stats['added'] > 0:
-                        for match in all_matches:
-                            try:
-                                # Agendar para todos os servidores que têm notificações ativadas
-                                client = await self.cache_manager.get_client()
-                                result = await client.execute(
-                                    "SELECT guild_id FROM guild_config WHERE notify_upcoming = 1 OR notify_live = 1"
-                                )
-                                
-                                if result.rows:
-                                    for row in result.rows:
-                                        guild_id = row[0]
-                                        await self.notification_manager.setup_reminders_for_match(guild_id, match)
-                            except Exception as e:
-                                logger.error(f"Erro ao agendar lembretes: {e}")
+                    # Agendar lembretes apenas para as partidas novas (em lote)
+                    if self.notification_manager and stats['added_ids']:
+                        added_ids = set(stats['added_ids'])
+                        new_matches = [m for m in all_matches if m.get('id') in added_ids]
+                        await self.notification_manager.schedule_reminders_bulk(new_matches)
                 else:
                     logger.warning("⚠️ Nenhuma partida obtida da API")
                 
@@ -155,6 +209,7 @@ class CacheScheduler:
                 try:
                     client = await self.cache_manager.get_client()
                     cleanup_stats = await cleanup_expired_cache(client)
+                    self.cache_manager.remove_from_memory_index(cleanup_stats["deleted_ids"])
                     logger.info(f"   ✅ Limpeza temporal concluída")
                 except Exception as e:
                     logger.error(f"   ✗ Erro na limpeza temporal: {e}")
@@ -172,6 +227,8 @@ class CacheScheduler:
                                f"Status: {coverage_stats['coverage_status']}")
                     if coverage_stats['matches_added'] > 0:
                         logger.info(f"   ✅ {coverage_stats['matches_added']} novas partidas adicionadas")
+                        # Inserções diretas no banco: refletir no índice em memória
+                        self.cache_manager.add_to_memory_index(coverage_stats['added_matches'])
                 except Exception as e:
                     logger.error(f"   ✗ Erro ao garantir cobertura: {e}")
                 
@@ -181,6 +238,17 @@ class CacheScheduler:
                            f"{stats.get('live_matches', 0)} ao vivo | "
                            f"{stats.get('upcoming_matches', 0)} próximas")
                 
+                api_cache = self.api_client.get_cache_stats()
+                logger.info(f"🌐 Cache HTTP PandaScore: {api_cache['hits']} hits | "
+                           f"{api_cache['not_modified']} não modificadas (304) | {api_cache['misses']} misses | "
+                           f"{api_cache['coalesced']} compartilhadas | {api_cache['rate_limited']} limitadas | "
+                           f"{api_cache['tokens']} tokens")
+                
+                transport = get_http_transport().get_stats()
+                logger.info(f"🔌 Pool HTTP: {transport['requests']} requisições | "
+                           f"{transport['connections_created']} conexões novas / {transport['connections_reused']} reutilizadas | "
+                           f"latência média {transport['avg_latency']}s (connect {transport['avg_connect']}s)")
+                
             except Exception as e:
                 logger.error(f"✗ Erro na atualização do cache: {e}")
                 import traceback
@@ -203,7 +271,7 @@ class CacheScheduler:
             # Buscar partidas em cache que estão com status 'running'
             client = await self.cache_manager.get_client()
             result = await client.execute(
-                "SELECT match_id, status FROM matches_cache WHERE status = 'running' AND updated_at > datetime('now', '-7 days')"
+                "SELECT match_id, status FROM matches_cache WHERE status = 'running' AND checked_at > datetime('now', '-7 days')"
             )
             
             cached_running = {row[0]: row[1] for row in (result.rows or [])}
@@ -220,32 +288,32 @@ class CacheScheduler:
             
             logger.warning(f"🔄 {len(missing_ids)} partida(s) não encontrada na atualização (possível mudança de estado)")
             
-            # Para cada partida desaparecida, procurar novo status em all_matches
-            # Ela pode estar com status diferente agora (finished, canceled, etc)
+            # Buscar finished UMA VEZ para todas as partidas desaparecidas
+            # Elas podem estar com status diferente agora (finished, canceled, etc)
+            try:
+                finished_dict = await self.get_recent_finished()
+            except Exception as e:
+                logger.error(f"   ✗ Erro ao buscar partidas finished: {e}")
+                return
+            
             for match_id in missing_ids:
                 logger.info(f"   🔍 Procurando partida {match_id} em finished/canceled...")
                 
                 try:
-                    # Buscar em finished
-                    finished = await self.api_client.get_past_matches(hours=24, per_page=100)
-                    
-                    found = False
-                    for match in finished:
-                        if match.get('id') == match_id:
-                            old_status = cached_running[match_id]
-                            new_status = match.get('status')
-                            
-                            logger.warning(f"      🔴 TRANSIÇÃO: {old_status} → {new_status}")
-                            logger.warning(f"         Match: {match.get('name')}")
-                            logger.warning(f"         Resultado: {match.get('results', [])}")
-                            
-                            # Atualizar no cache
-                            await self.cache_manager.cache_matches([match], "state_transition")
-                            logger.info(f"      ✅ Cache atualizado!")
-                            found = True
-                            break
+                    match = finished_dict.get(match_id)
                     
-                    if not found:
+                    if match:
+                        old_status = cached_running[match_id]
+                        new_status = match.get('status')
+                        
+                        logger.warning(f"      🔴 TRANSIÇÃO: {old_status} → {new_status}")
+                        logger.warning(f"         Match: {match.get('name')}")
+                        logger.warning(f"         Resultado: {match.get('results', [])}")
+                        
+                        # Atualizar no cache
+                        await self.cache_manager.cache_matches([match], "state_transition")
+                        logger.info(f"      ✅ Cache atualizado!")
+                    else:
                         logger.warning(f"      ⚠️  Partida {match_id} não encontrada em finished")
                         logger.info(f"         (Pode estar com status diferente ou removida da API)")
                 
@@ -273,19 +341,6 @@ class CacheScheduler:
                     stats = await self.cache_manager.cache_matches(running, "running")
                     logger.info(f"✓ {len(running)} partidas ao vivo atualizadas")
                     
-                    # 🚀 NOVA OTIMIZAÇÃO: Cachear streams das partidas ao vivo
-                    streams_cached = 0
-                    for match in running:
-                        if match.get("streams_list"):
-                            try:
-                                await self.cache_manager.cache_streams(match["id"], match["streams_list"], source="pandascore")
-                                streams_cached += 1
-                            except Exception as e:
-                                logger.debug(f"Erro ao cachear streams do match {match.get('id')}: {e}")
-                    
-                    if streams_cached > 0:
-                        logger.info(f"  📡 {streams_cached} streams ao vivo cacheadas")
-                    
                     # �🔥 VALIDAÇÃO IMEDIATA: Verificar se alguma running virou finished
                     await self.check_running_to_finished_transitions(running)
                 else:
@@ -317,14 +372,13 @@ class CacheScheduler:
             # IDs que estão RUNNING na API agora
             running_ids_now = {m.get('id') for m in running_matches}
             
-            # Buscar partidas finished recentes (últimas 2h)
-            finished = await self.api_client.get_past_matches(hours=2, per_page=50)
-            finished_dict = {m.get('id'): m for m in finished}
+            # Buscar partidas finished recentes (snapshot compartilhado)
+            finished_dict = await self.get_recent_finished()
             
             # Buscar IDs que estão RUNNING no cache
             client = await self.cache_manager.get_client()
             result = await client.execute(
-                "SELECT match_id FROM matches_cache WHERE status = 'running' AND updated_at > datetime('now', '-7 days')"
+                "SELECT match_id FROM matches_cache WHERE status = 'running' AND checked_at > datetime('now', '-7 days')"
             )
             cached_running_ids = {row[0] for row in (result.rows or [])}
             
@@ -376,12 +430,12 @@ class CacheScheduler:
             # Buscar partidas running há mais de 2 horas
             client = await self.cache_manager.get_client()
             result = await client.execute("""
-                SELECT id, match_id, begin_at, updated_at 
+                SELECT id, match_id, begin_at, checked_at 
                 FROM matches_cache 
                 WHERE status = 'running' 
-                AND datetime(updated_at) < datetime('now', '-2 hours')
-                AND updated_at > datetime('now', '-7 days')
-                ORDER BY updated_at ASC
+                AND datetime(checked_at) < datetime('now', '-2 hours')
+                AND checked_at > datetime('now', '-7 days')
+                ORDER BY checked_at ASC
             """)
             
             stuck_matches = result.rows if result.rows else []
@@ -392,9 +446,8 @@ class CacheScheduler:
             
             logger.warning(f"⚠️  {len(stuck_matches)} partida(s) travada(s) detectada(s)")
             
-            # 🔥 OTIMIZAÇÃO: Buscar finished UMA VEZ para todas
-            finished = await self.api_client.get_past_matches(hours=24, per_page=100)
-            finished_dict = {m.get('id'): m for m in finished}
+            # 🔥 OTIMIZAÇÃO: Buscar finished UMA VEZ para todas (snapshot compartilhado)
+            finished_dict = await self.get_recent_finished()
             
             if not finished_dict:
                 logger.warning("⚠️  API não retornou partidas finished para validar")
@@ -403,7 +456,7 @@ class CacheScheduler:
             # Procurar cada partida travada em finished
             for stuck in stuck_matches:
                 match_id = stuck[1]  # match_id
-                old_updated = stuck[3]  # updated_at
+                old_updated = stuck[3]  # checked_at (última vez vista na API)
                 
                 # Problema 8: Usar format_timestamp_with_tz para melhor legibilidade
                 formatted_time = format_timestamp_with_tz(old_updated)
@@ -458,14 +511,14 @@ class CacheScheduler:
             
             client = await self.cache_manager.get_client()
             
-            # Buscar partidas em cache com status 'running' e sem atualização recente (>1min)
+            # Buscar partidas em cache com status 'running' não vistas na API recentemente (>1min)
             # Essas podem ter terminado
             result = await client.execute("""
-                SELECT match_id, match_data, updated_at
+                SELECT match_id, match_data, checked_at
                 FROM matches_cache
                 WHERE status = 'running'
-                AND datetime(updated_at) < datetime('now', '-1 minute')
-                AND updated_at > datetime('now', '-7 days')
+                AND datetime(checked_at) < datetime('now', '-1 minute')
+                AND checked_at > datetime('now', '-7 days')
                 LIMIT 20
             """)
             
@@ -481,15 +534,8 @@ class CacheScheduler:
             # IMPORTANTE: Buscar MÚLTIPLAS PÁGINAS para não perder partidas recentes
             # As partidas podem estar na página 2 ou 3 dependendo do volume
             try:
-                finished_matches = []
                 # Buscar as 3 primeiras páginas (300 partidas) para garantir cobertura
-                for page in range(1, 4):
-                    page_matches = await self.api_client.get_past_matches(hours=24, per_page=100, page=page)
-                    finished_matches.extend(page_matches)
-                    if not page_matches:
-                        break
-                
-                finished_ids = {m.get('id'): m for m in finished_matches}
+                finished_ids = await self.get_recent_finished(pages=3)
                 logger.info(f"   📊 Checando contra {len(finished_ids)} partidas finished (páginas 1-3)")
             except Exception as e:
                 logger.error(f"   ✗ Erro ao buscar finished: {e}")
@@ -497,7 +543,7 @@ class CacheScheduler:
             
             # Comparar
             transitioned = []
-            for match_id, match_data, updated_at in suspect_running:
+            for match_id, match_data, checked_at in suspect_running:
                 if match_id in finished_ids:
                     finished_match = finished_ids[match_id]
                     transitioned.append((match_id, finished_match))
@@ -510,6 +556,12 @@ class CacheScheduler:
             
             logger.warning(f"🎯 {len(transitioned)} transição(ões) confirmada(s)!")
             
+            # Servidores com resultados ativos (uma leitura do cache por ciclo)
+            guild_configs = self.cache_manager.guild_configs
+            if not guild_configs.loaded:
+                await guild_configs.load()
+            result_guild_ids = guild_configs.get_guild_ids("notify_results")
+            
             # Atualizar cache e agendar notificações
             for match_id, finished_match in transitioned:
                 # Atualizar cache
@@ -519,19 +571,12 @@ class CacheScheduler:
                 # Agendar notificação de resultado para TODOS os guilds
                 if self.notification_manager:
                     try:
-                        client = await self.cache_manager.get_client()
-                        result = await client.execute(
-                            "SELECT guild_id FROM guild_config WHERE notify_results = 1"
-                        )
-                        
-                        if result.rows:
-                            for row in result.rows:
-                                guild_id = row[0]
-                                await self.notification_manager.schedule_result_notification(
-                                    guild_id,
-                                    match_id
-                                )
-                                logger.info(f"      📬 Notificação agendada para guild {guild_id}")
+                        for guild_id in result_guild_ids:
+                            await self.notification_manager.schedule_result_notification(
+                                guild_id,
+                                match_id
+                            )
+                            logger.info(f"      📬 Notificação agendada para guild {guild_id}")
                     except Exception as e:
                         logger.error(f"      ✗ Erro ao agendar notificação: {e}")
         
@@ -552,6 +597,21 @@ class CacheScheduler:
         """Task para detecção rápida de partidas finalizadas."""
         await self.check_running_to_finished_transitions_fast()
     
+    # Task: Compactação das tabelas de notificações a cada 6 horas
+    @tasks.loop(hours=6, count=None)
+    async def compaction_task(self):
+        """Task para remover lembretes/resultados enviados ou órfãos."""
+        await self.compact_notifications()
+    
+    async def compact_notifications(self):
+        """Executa a retenção de match_reminders / match_result_notifications."""
+        try:
+            logger.info("🧹 Compactando tabelas de notificações...")
+            client = await self.cache_manager.get_client()
+            await compact_notification_tables(client)
+        except Exception as e:
+            logger.error(f"✗ Erro na compactação de notificações: {e}")
+    
     @update_all_task.before_loop
     async def before_update_all(self):
         """Aguarda o bot estar pronto antes de iniciar a task."""
@@ -563,6 +623,11 @@ class CacheScheduler:
         """Aguarda o bot estar pronto antes de iniciar a task."""
         await asyncio.sleep(2)
     
+    @compaction_task.before_loop
+    async def before_compaction(self):
+        """Deixa a primeira atualização do cache rodar antes da compactação."""
+        await asyncio.sleep(60)
+    
     def start(self):
         """Inicia as tasks."""
         if self.is_running:
@@ -573,6 +638,7 @@ class CacheScheduler:
         self.update_all_task.start()
         self.check_finished_task.start()
         self.populate_streams_task.start()
+        self.compaction_task.start()
         
         self.is_running = True
         
@@ -580,6 +646,7 @@ class CacheScheduler:
         logger.info("  • Atualização completa: a cada 3 minutos")
         logger.info("  • Verificação de resultados: a cada 1 minuto")
         logger.info("  • Busca automática de streams: a cada 10 minutos")
+        logger.info("  • Compactação de notificações: a cada 6 horas")
         logger.info("  • Primeira execução: em 2 segundos")
     
     def stop(self):
@@ -591,6 +658,7 @@ class CacheScheduler:
         # Parar tasks do Discord
         self.update_all_task.cancel()
         self.check_finished_task.cancel()
+        self.compaction_task.cancel()
         
         self.is_running = False
         logger.info("✓ Agendador parado")
@@ -631,9 +699,9 @@ class CacheScheduler:
         Útil quando PandaScore não retorna link direto mas stream está disponível.
         
         Fluxo:
-        1. Buscar matches ao vivo (running) ou próximos (not_started)
-        2. Para cada match: verificar se tem raw_url
-        3. Se não tem: buscar na Twitch automaticamente
+        1. Buscar matches ao vivo (running) ou próximos (not_started) sem raw_url
+        2. Buscar UMA VEZ o snapshot da categoria Counter-Strike na Twitch
+        3. Pontuar cada match contra o snapshot (em memória)
         4. Se encontrar: armazenar no cache
         """
         try:
@@ -658,7 +726,7 @@ class CacheScheduler:
                     WHERE s.match_id = m.match_id AND s.raw_url IS NOT NULL
                 )
                 ORDER BY m.begin_at ASC
-                LIMIT 20
+                LIMIT 100
                 """
             )
             
@@ -668,6 +736,12 @@ class CacheScheduler:
             
             logger.info(f"🔍 Encontrados {len(result.rows)} matches sem streams")
             
+            # Uma busca por ciclo (paginada); o scoring por match é local
+            snapshot = await twitch_service.get_category_snapshot()
+            if not snapshot:
+                logger.info("📺 Nenhuma stream de Counter-Strike ao vivo na Twitch")
+                return
+            
             imported_count = 0
             
             for row in result.rows:
@@ -702,7 +776,8 @@ class CacheScheduler:
                         championship=championship,
                         team1_name=team1,
                         team2_name=team2,
-                        language="pt"
+                        language="pt",
+                        snapshot=snapshot
                     )
                     
                     if stream_result:
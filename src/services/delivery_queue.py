@@ -0,0 +1,307 @@
+"""
+Fila de entrega de mensagens no Discord com limite de taxa.
+
+Um pool fixo de workers consome a fila e envia as mensagens em paralelo,
+respeitando um token bucket por canal (rota POST /channels/{id}/messages)
+e um bucket global do bot. Uma mensagem de canal sem token (ou aguardando
+nova tentativa) é reagendada sem ocupar um worker, então um canal
+limitado não atrasa os demais.
+
+Só são repetidos erros em que a mensagem com certeza não foi publicada e
+que o cliente HTTP do nextcord não repete sozinho (falha de conexão, 5xx
+fora de 500/502/504). 429 já foi repetido pelo nextcord, e timeouts ou
+conexões derrubadas no meio podem ter publicado a mensagem: repetir
+duplicaria o aviso. Pelo mesmo motivo, uma mensagem cujo envio foi
+cancelado no meio (stop()) termina em DeliveryInterruptedError, não em
+falha: o chamador não deve reenviá-la.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import nextcord
+
+logger = logging.getLogger(__name__)
+
+# Status que o cliente HTTP do nextcord já repete internamente antes de lançar HTTPException
+NEXTCORD_RETRIED_STATUSES = {429, 500, 502, 504}
+
+
+class DeliveryInterruptedError(Exception):
+    """O envio foi cancelado durante channel.send: a mensagem pode ter sido publicada."""
+
+
+class TokenBucket:
+    """Token bucket assíncrono: até `capacity` envios a cada `per` segundos."""
+    
+    def __init__(self, capacity: int, per: float):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def try_acquire(self) -> float:
+        """
+        Consome um token se houver, sem esperar.
+        
+        Returns:
+            0.0 se o token foi consumido, senão os segundos até o próximo token
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+    
+    async def acquire(self):
+        """Aguarda até haver um token disponível e o consome."""
+        while True:
+            # A espera é calculada sob o lock, mas o sleep acontece fora dele
+            async with self._lock:
+                wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+    
+    @property
+    def idle(self) -> bool:
+        """True se o bucket já recuperou todos os tokens (pode ser descartado)."""
+        elapsed = time.monotonic() - self._updated_at
+        return self._tokens + elapsed * self.rate >= self.capacity
+
+
+class DeliveryQueue:
+    """Pool de workers que entrega embeds nos canais respeitando rate limits."""
+    
+    # Limites do Discord: 5 mensagens / 5s por canal e ~50 requisições/s globais
+    CHANNEL_CAPACITY = 5
+    CHANNEL_PERIOD = 5.0
+    GLOBAL_CAPACITY = 45
+    GLOBAL_PERIOD = 1.0
+    
+    MAX_RETRIES = 3
+    BACKOFF_BASE = 1.0
+    
+    def __init__(self, workers: int = 8, max_queue: int = 1000):
+        """
+        Inicializa a fila de entrega.
+        
+        Args:
+            workers: Número de envios simultâneos
+            max_queue: Tamanho máximo da fila (submit aguarda quando cheia)
+        """
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_queue = max_queue
+        self._worker_tasks = []
+        self._global_bucket = TokenBucket(self.GLOBAL_CAPACITY, self.GLOBAL_PERIOD)
+        self._channel_buckets: Dict[int, TokenBucket] = {}
+        # future -> (timer, item) das mensagens reagendadas (canal sem token ou nova tentativa)
+        self._deferred: Dict[asyncio.Future, Tuple[asyncio.TimerHandle, Tuple]] = {}
+        
+        # Métricas
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Número de mensagens aguardando um worker."""
+        return self._queue.qsize() if self._queue else 0
+    
+    def get_stats(self) -> Dict:
+        """Retorna métricas de entrega (profundidade da fila, latências, contadores)."""
+        avg_latency = self._latency_total / self.delivered if self.delivered else 0.0
+        return {
+            "queue_depth": self.queue_depth,
+            "deferred": len(self._deferred),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "avg_latency": round(avg_latency, 3),
+            "max_latency": round(self.max_latency, 3),
+            "last_latency": round(self.last_latency, 3),
+        }
+    
+    def start(self):
+        """Inicia os workers (precisa de um event loop em execução)."""
+        if self._worker_tasks:
+            return
+        
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i), name=f"delivery-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"📮 Fila de entrega iniciada ({self.workers} workers)")
+    
+    async def stop(self):
+        """
+        Cancela os workers.
+        
+        Mensagens ainda na fila ou reagendadas nunca chegaram ao Discord e são
+        descartadas como falha (None). Envios em andamento terminam em
+        DeliveryInterruptedError (ver _worker).
+        """
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        
+        for handle, item in self._deferred.values():
+            handle.cancel()
+            if not item[2].done():
+                item[2].set_result(None)
+        self._deferred.clear()
+        
+        while self._queue and not self._queue.empty():
+            future = self._queue.get_nowait()[2]
+            if not future.done():
+                future.set_result(None)
+    
+    async def send(self, channel, embed: nextcord.Embed) -> Optional[nextcord.Message]:
+        """
+        Enfileira um embed para o canal e aguarda a entrega.
+        
+        Args:
+            channel: Canal de texto do Discord
+            embed: Embed a enviar
+        
+        Returns:
+            Mensagem enviada ou None se a entrega falhou
+        
+        Raises:
+            DeliveryInterruptedError: O envio foi cancelado no meio (resultado desconhecido)
+        """
+        if not self._worker_tasks:
+            self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((channel, embed, future, time.monotonic(), 0))
+        return await future
+    
+    def _channel_bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            # Descartar buckets ociosos para não crescer indefinidamente
+            if len(self._channel_buckets) > 1000:
+                self._channel_buckets = {
+                    cid: b for cid, b in self._channel_buckets.items() if not b.idle
+                }
+            bucket = TokenBucket(self.CHANNEL_CAPACITY, self.CHANNEL_PERIOD)
+            self._channel_buckets[channel_id] = bucket
+        return bucket
+    
+    def _defer(self, item: Tuple, delay: float):
+        """Devolve a mensagem à fila após `delay` segundos, sem ocupar um worker."""
+        future = item[2]
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, item)
+        self._deferred[future] = (handle, item)
+    
+    def _requeue(self, item: Tuple):
+        self._deferred.pop(item[2], None)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._defer(item, 0.1)
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int, base: float) -> Optional[float]:
+        """
+        Retorna o atraso antes da próxima tentativa ou None se não é seguro repetir.
+        
+        Só repete quando a mensagem com certeza não foi publicada e o nextcord
+        ainda não repetiu a requisição por conta própria.
+        """
+        if isinstance(error, nextcord.HTTPException):
+            if error.status >= 500 and error.status not in NEXTCORD_RETRIED_STATUSES:
+                return base * (2 ** attempt)
+            # 429/500/502/504 (já repetidos pelo nextcord), 403/404 etc: não adianta repetir
+            return None
+        if isinstance(error, aiohttp.ClientConnectorError):
+            # A conexão nem foi aberta: a mensagem não chegou ao Discord
+            return base * (2 ** attempt)
+        # Timeouts e conexões derrubadas: a mensagem pode ter sido publicada
+        return None
+    
+    async def _deliver(self, channel, embed: nextcord.Embed, attempt: int) -> Tuple[Optional[nextcord.Message], Optional[float]]:
+        """
+        Envia a mensagem uma vez.
+        
+        Returns:
+            Tupla (mensagem ou None, atraso para nova tentativa ou None)
+        """
+        try:
+            return await channel.send(embed=embed), None
+        except Exception as e:
+            delay = self._retry_delay(e, attempt, self.BACKOFF_BASE)
+            if delay is None or attempt >= self.MAX_RETRIES:
+                logger.error(f"✗ Falha ao entregar mensagem em #{channel.id}: {type(e).__name__}: {e}")
+                return None, None
+            
+            logger.warning(f"⚠️ Erro transitório em #{channel.id} ({type(e).__name__}), "
+                          f"nova tentativa em {delay:.1f}s")
+            return None, delay
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            item = await self._queue.get()
+            channel, embed, future, enqueued_at, attempt = item
+            sending = False
+            try:
+                if future.done():
+                    continue
+                
+                # Canal sem token: reagendar em vez de prender o worker
+                wait = self._channel_bucket(channel.id).try_acquire()
+                if wait:
+                    self._defer(item, wait)
+                    continue
+                
+                await self._global_bucket.acquire()
+                sending = True
+                message, retry_in = await self._deliver(channel, embed, attempt)
+                sending = False
+                if retry_in is not None:
+                    self.retried += 1
+                    self._defer((channel, embed, future, enqueued_at, attempt + 1), retry_in)
+                    continue
+                
+                latency = time.monotonic() - enqueued_at
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                if message is not None:
+                    self.delivered += 1
+                    self._latency_total += latency
+                else:
+                    self.failed += 1
+                
+                if not future.done():
+                    future.set_result(message)
+            except asyncio.CancelledError:
+                if not future.done():
+                    if sending:
+                        # O Discord pode já ter publicado: não é falha (não reenviar)
+                        future.set_exception(DeliveryInterruptedError(
+                            f"envio em #{channel.id} cancelado durante a requisição"
+                        ))
+                    else:
+                        future.set_result(None)
+                raise
+            except Exception as e:
+                logger.error(f"✗ Erro no worker de entrega {worker_id}: {e}")
+                self.failed += 1
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,142 @@
+"""
+Transporte HTTP compartilhado pelos serviços externos (PandaScore, Twitch, YouTube).
+
+Uma única ClientSession com pool de conexões limitado, keep-alive e cache
+de DNS: as requisições reaproveitam conexões TLS já abertas em vez de
+pagar um handshake a cada chamada. Timeouts padrão evitam que uma API
+lenta prenda o scheduler indefinidamente.
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPTransport:
+    """Sessão aiohttp compartilhada com métricas de pool (conexões novas x reutilizadas)."""
+    
+    # Pool de conexões
+    POOL_LIMIT = 50
+    POOL_LIMIT_PER_HOST = 10
+    KEEPALIVE_TIMEOUT = 60
+    DNS_CACHE_TTL = 300
+    
+    # Timeouts padrão por requisição (chamadas podem sobrescrever com timeout=...)
+    TOTAL_TIMEOUT = 15
+    CONNECT_TIMEOUT = 5
+    
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        
+        # Métricas
+        self.requests = 0
+        self.errors = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self._latency_total = 0.0
+        self._connect_total = 0.0
+    
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, ctx, params):
+            ctx.started_at = time.monotonic()
+        
+        async def on_request_end(session, ctx, params):
+            self.requests += 1
+            self._latency_total += time.monotonic() - ctx.started_at
+        
+        async def on_request_exception(session, ctx, params):
+            self.errors += 1
+        
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_started_at = time.monotonic()
+        
+        async def on_connection_create_end(session, ctx, params):
+            self.connections_created += 1
+            self._connect_total += time.monotonic() - ctx.connect_started_at
+        
+        async def on_connection_reuseconn(session, ctx, params):
+            self.connections_reused += 1
+        
+        async def on_dns_cache_hit(session, ctx, params):
+            self.dns_cache_hits += 1
+        
+        async def on_dns_cache_miss(session, ctx, params):
+            self.dns_cache_misses += 1
+        
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_create_start.append(on_connection_create_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Retorna a sessão compartilhada, criando-a na primeira chamada (precisa de event loop)."""
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.POOL_LIMIT,
+                limit_per_host=self.POOL_LIMIT_PER_HOST,
+                keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=self.DNS_CACHE_TTL,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=aiohttp.ClientTimeout(total=self.TOTAL_TIMEOUT, connect=self.CONNECT_TIMEOUT),
+                trace_configs=[self._trace_config()],
+            )
+            logger.info(f"🌐 Transporte HTTP iniciado (pool {self.POOL_LIMIT}, {self.POOL_LIMIT_PER_HOST}/host)")
+        return self._session
+    
+    def get_stats(self) -> Dict:
+        """Retorna métricas do pool (requisições, conexões novas/reutilizadas, DNS, latências)."""
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / acquired, 3) if acquired else 0.0,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+            "avg_latency": round(self._latency_total / self.requests, 3) if self.requests else 0.0,
+            "avg_connect": round(self._connect_total / self.connections_created, 3) if self.connections_created else 0.0,
+        }
+    
+    async def close(self):
+        """Fecha a sessão e todas as conexões do pool."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("✓ Transporte HTTP fechado")
+        self._session = None
+        self._connector = None
+
+
+# Instância global (singleton)
+_transport: Optional[HTTPTransport] = None
+
+
+def get_http_transport() -> HTTPTransport:
+    """Obtém a instância global do transporte HTTP."""
+    global _transport
+    if _transport is None:
+        _transport = HTTPTransport()
+    return _transport
+
+
+async def close_http_transport():
+    """Fecha o transporte HTTP global (chamado no desligamento do bot)."""
+    if _transport:
+        await _transport.close()
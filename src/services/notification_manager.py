@@ -3,13 +3,19 @@ Gerenciador de notificações e lembretes de partidas.
 """
 
 import asyncio
+import hashlib
+import heapq
+import json
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from nextcord.ext import tasks
 import nextcord
 
 from src.database.cache_manager import MatchCacheManager
+from src.services.delivery_queue import DeliveryInterruptedError, DeliveryQueue
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +26,30 @@ class NotificationManager:
     # Minutos antes do início da partida para enviar lembretes
     REMINDER_TIMES = [60, 30, 15, 5, 0]  # 1h, 30min, 15min, 5min, em tempo real
     
+    # Linhas por INSERT multi-VALUES (4 parâmetros por linha, abaixo do limite do SQLite)
+    BULK_INSERT_ROWS = 200
+    
+    # Recarga completa dos prazos a partir do banco (rede de segurança)
+    RESYNC_SECONDS = 300
+    # Nova tentativa após falha de envio
+    RETRY_DELAY_SECONDS = 60
+    
+    # Estados da coluna `sent` (match_reminders / match_result_notifications)
+    SENT_PENDING = 0
+    SENT_DONE = 1
+    SENT_CLAIMED = 2  # reservado por um ciclo de envio em andamento
+    
+    # IDs por cláusula IN (...) nas atualizações em lote
+    IN_CHUNK_SIZE = 500
+    
+    # Tentativas de gravar o resultado de um ciclo de envio (falha de rede no commit)
+    COMMIT_RETRIES = 3
+    COMMIT_BACKOFF = 0.5
+    
+    # Cache de embeds renderizados (compartilhados entre servidores com o mesmo timezone)
+    EMBED_CACHE_SIZE = 256
+    EMBED_CACHE_TTL = 300
+    
     def __init__(self, bot: "nextcord.ext.commands.Bot", cache_manager: MatchCacheManager):
         """
         Inicializa o gerenciador de notificações.
@@ -32,8 +62,148 @@ class NotificationManager:
         self.cache_manager = cache_manager
         self.is_running = False
         
+        # Min-heap com os horários (locais) dos próximos lembretes/resultados
+        self._deadlines: List[datetime] = []
+        self._deadlines_loaded_at = 0.0
+        self._wake_event = asyncio.Event()
+        
+        # LRU: (tipo, match_id, digest, variante, timezone, digest dos streams) -> (criado em, embed)
+        self._embed_cache: "OrderedDict[tuple, Tuple[float, nextcord.Embed]]" = OrderedDict()
+        
+        # Entrega paralela com rate limit por canal
+        self.delivery = DeliveryQueue()
+        
         logger.info("📬 NotificationManager inicializado")
     
+    @staticmethod
+    def _embed_cache_key(kind: str, match_id: int, match_data: str, variant, timezone: str,
+                         streams_digest: str = "") -> tuple:
+        """
+        Monta a chave do cache de embeds.
+        
+        Os digests mudam quando o JSON da partida ou a lista de streams
+        (campo 📡 Streams do embed, ver _load_match_streams) mudam.
+        """
+        digest = hashlib.sha1(match_data.encode() if isinstance(match_data, str) else match_data).hexdigest()
+        return (kind, match_id, digest, variant, timezone, streams_digest)
+    
+    async def _load_match_streams(self, match_ids: List[int]) -> Dict[int, Tuple[List[Dict], str]]:
+        """
+        Busca os streams das partidas de um ciclo de envio (uma consulta por bloco).
+        
+        Returns:
+            Dict match_id -> (streams, digest dos streams), compartilhado por todas as guilds
+        """
+        streams_by_match = await self.cache_manager.get_streams_for_matches(match_ids)
+        return {
+            match_id: (streams, hashlib.sha1(json.dumps(streams, sort_keys=True, default=str).encode()).hexdigest())
+            for match_id, streams in streams_by_match.items()
+        }
+    
+    def _get_cached_embed(self, key: tuple) -> Optional[nextcord.Embed]:
+        """
+        Retorna uma cópia de um embed já renderizado (ainda dentro do TTL) ou None.
+        
+        O horário do embed (timestamp) é o do envio, não o da renderização.
+        """
+        entry = self._embed_cache.get(key)
+        if entry is None:
+            return None
+        
+        created_at, embed = entry
+        if time.monotonic() - created_at > self.EMBED_CACHE_TTL:
+            del self._embed_cache[key]
+            return None
+        
+        self._embed_cache.move_to_end(key)
+        embed = embed.copy()
+        if embed.timestamp:
+            embed.timestamp = datetime.now().astimezone()
+        return embed
+    
+    def _store_embed(self, key: tuple, embed: nextcord.Embed):
+        """Guarda um embed renderizado, removendo o menos usado se o cache estiver cheio."""
+        self._embed_cache[key] = (time.monotonic(), embed)
+        self._embed_cache.move_to_end(key)
+        while len(self._embed_cache) > self.EMBED_CACHE_SIZE:
+            self._embed_cache.popitem(last=False)
+    
+    def _schedule_deadline(self, scheduled_time: datetime):
+        """Registra um horário de envio e acorda o dispatcher se ele for o mais próximo."""
+        heapq.heappush(self._deadlines, scheduled_time)
+        if self._deadlines[0] == scheduled_time:
+            self._wake_event.set()
+    
+    async def _load_deadlines(self) -> int:
+        """
+        Recarrega o heap com os horários de todos os envios pendentes.
+        
+        Returns:
+            int: Número de horários distintos carregados
+        """
+        client = await self.cache_manager.get_client()
+        result = await client.execute(
+            """
+            SELECT scheduled_time FROM match_reminders mr
+            WHERE mr.sent = 0
+            AND EXISTS (SELECT 1 FROM matches_cache mc WHERE mc.match_id = mr.match_id)
+            UNION
+            SELECT scheduled_time FROM match_result_notifications mrn
+            WHERE mrn.sent = 0
+            AND EXISTS (SELECT 1 FROM matches_cache mc WHERE mc.match_id = mrn.match_id)
+            """
+        )
+        
+        deadlines = []
+        for row in result.rows or []:
+            value = row[0]
+            if isinstance(value, bytes):
+                value = value.decode()
+            try:
+                deadlines.append(datetime.fromisoformat(value))
+            except (TypeError, ValueError):
+                continue
+        
+        heapq.heapify(deadlines)
+        self._deadlines = deadlines
+        self._deadlines_loaded_at = time.monotonic()
+        self._wake_event.set()
+        return len(deadlines)
+    
+    async def _sleep_until_next_deadline(self):
+        """Dorme até o próximo prazo, um novo agendamento mais próximo ou o próximo resync."""
+        self._wake_event.clear()
+        
+        timeout = self.RESYNC_SECONDS - (time.monotonic() - self._deadlines_loaded_at)
+        if self._deadlines:
+            timeout = min(timeout, (self._deadlines[0] - datetime.now()).total_seconds())
+        
+        if timeout <= 0:
+            return
+        
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    @staticmethod
+    def _parse_match_time(begin_at) -> datetime:
+        """Converte begin_at (ISO UTC da API) para datetime local sem tzinfo."""
+        if isinstance(begin_at, str):
+            # Parse com timezone UTC e conversão para hora local
+            match_time_utc = datetime.fromisoformat(begin_at.replace('Z', '+00:00'))
+            return match_time_utc.astimezone().replace(tzinfo=None)
+        return begin_at
+    
+    def _reminder_slots(self, match_time: datetime, now: datetime) -> List[Tuple[int, datetime]]:
+        """Retorna (minutos antes, horário) dos lembretes que ainda estão no futuro."""
+        slots = []
+        for minutes_before in self.REMINDER_TIMES:
+            scheduled_time = match_time - timedelta(minutes=minutes_before)
+            if scheduled_time >= now:
+                slots.append((minutes_before, scheduled_time))
+        return slots
+    
     async def setup_reminders_for_match(self, guild_id: int, match: Dict) -> bool:
         """
         Cria lembretes para uma partida específica.
@@ -64,15 +234,7 @@ class NotificationManager:
                 logger.debug(f"⏭️ Partida {match_id}: Sem begin_at - Pulada")
                 return False
             
-            # Converter string ISO para datetime
-            if isinstance(begin_at, str):
-                from datetime import timezone
-                # Parse com timezone UTC
-                match_time_utc = datetime.fromisoformat(begin_at.replace('Z', '+00:00'))
-                # Converter para hora local
-                match_time = match_time_utc.astimezone().replace(tzinfo=None)
-            else:
-                match_time = begin_at
+            match_time = self._parse_match_time(begin_at)
             
             # Verificar se a partida ainda não começou
             now = datetime.now()
@@ -87,14 +249,7 @@ class NotificationManager:
             
             # Criar lembretes para cada intervalo
             scheduled_count = 0
-            for minutes_before in self.REMINDER_TIMES:
-                scheduled_time = match_time - timedelta(minutes=minutes_before)
-                
-                # Só agendar se for no futuro
-                if scheduled_time < now:
-                    logger.debug(f"  ⏭️ Lembrete de {minutes_before}min já passou para partida {match_id}")
-                    continue
-                
+            for minutes_before, scheduled_time in self._reminder_slots(match_time, now):
                 try:
                     # Tentar inserir (ignorar se já existe)
                     await client.execute(
@@ -107,6 +262,8 @@ class NotificationManager:
                         [guild_id, match_id, minutes_before, scheduled_time.isoformat()]
                     )
                     
+                    self._schedule_deadline(scheduled_time)
+                    
                     time_until_reminder = scheduled_time - now
                     logger.info(f"  ✅ Agendado: {minutes_before}min ANTES | Lembrete em: {time_until_reminder}")
                     scheduled_count += 1
@@ -169,6 +326,200 @@ class NotificationManager:
         logger.info(f"✓ {count} partidas com lembretes agendados para guild {guild_id}")
         return count
     
+    async def schedule_reminders_bulk(self, matches: List[Dict], guild_ids: Optional[List[int]] = None) -> int:
+        """
+        Agenda lembretes de várias partidas para vários servidores de uma vez.
+        
+        Monta o conjunto (guild, partida, intervalo) em memória e grava tudo
+        com INSERTs multi-VALUES em um único batch, em vez de um INSERT por
+        lembrete. Lembretes já existentes são ignorados (ON CONFLICT).
+        
+        Args:
+            matches: Partidas a agendar (normalmente só as recém-adicionadas)
+            guild_ids: Servidores alvo (padrão: notify_upcoming ou notify_live ativos)
+            
+        Returns:
+            int: Número de lembretes novos gravados
+        """
+        try:
+            if guild_ids is None:
+                guild_configs = self.cache_manager.guild_configs
+                if not guild_configs.loaded:
+                    await guild_configs.load()
+                guild_ids = guild_configs.get_guild_ids("notify_upcoming", "notify_live")
+            
+            if not guild_ids or not matches:
+                return 0
+            
+            now = datetime.now()
+            match_slots = []
+            for match in matches:
+                match_id = match.get('id')
+                begin_at = match.get('begin_at')
+                if not match_id or not begin_at or match.get('status') not in ['not_started', 'running']:
+                    continue
+                
+                slots = self._reminder_slots(self._parse_match_time(begin_at), now)
+                match_slots.extend(
+                    (match_id, minutes_before, scheduled_time)
+                    for minutes_before, scheduled_time in slots
+                )
+            
+            rows = [
+                (guild_id, match_id, minutes_before, scheduled_time.isoformat())
+                for guild_id in guild_ids
+                for match_id, minutes_before, scheduled_time in match_slots
+            ]
+            if not rows:
+                return 0
+            
+            statements = []
+            for i in range(0, len(rows), self.BULK_INSERT_ROWS):
+                chunk = rows[i:i + self.BULK_INSERT_ROWS]
+                values = ", ".join("(?, ?, ?, ?, 0)" for _ in chunk)
+                statements.append((
+                    f"""
+                    INSERT INTO match_reminders 
+                    (guild_id, match_id, reminder_minutes_before, scheduled_time, sent)
+                    VALUES {values}
+                    ON CONFLICT(guild_id, match_id, reminder_minutes_before) DO NOTHING
+                    """,
+                    [value for row in chunk for value in row]
+                ))
+            
+            client = await self.cache_manager.get_client()
+            results = await client.batch(statements)
+            inserted = sum(result.rows_affected or 0 for result in results)
+            
+            for scheduled_time in {slot[2] for slot in match_slots}:
+                self._schedule_deadline(scheduled_time)
+            
+            logger.info(f"📅 {inserted} lembrete(s) agendado(s) para {len(guild_ids)} servidor(es) "
+                       f"({len(rows)} candidatos, {len(statements)} statement(s))")
+            return inserted
+            
+        except Exception as e:
+            logger.error(f"Erro ao agendar lembretes em lote: {e}")
+            return 0
+    
+    def _build_sent_updates(self, table: str, ids: List[int], sent: int, sent_at: Optional[str] = None) -> List[Tuple[str, List]]:
+        """Monta UPDATEs `sent = ?` em blocos de IN_CHUNK_SIZE IDs."""
+        statements = []
+        for i in range(0, len(ids), self.IN_CHUNK_SIZE):
+            chunk = ids[i:i + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            if sent_at is None:
+                statements.append((f"UPDATE {table} SET sent = ? WHERE id IN ({placeholders})", [sent, *chunk]))
+            else:
+                statements.append((
+                    f"UPDATE {table} SET sent = ?, sent_at = ? WHERE id IN ({placeholders})",
+                    [sent, sent_at, *chunk]
+                ))
+        return statements
+    
+    async def _claim_rows(self, client, table: str, ids: List[int]) -> set:
+        """
+        Reserva as linhas vencidas (sent = 2) antes do envio.
+        
+        Só linhas ainda pendentes são reservadas; as que outro ciclo já
+        reservou ou enviou ficam de fora e não devem ser enviadas. Se o bot
+        cair durante a entrega, as linhas reservadas não voltam a ser
+        enviadas (ver _settle_claimed_rows), evitando mensagens duplicadas.
+        
+        Returns:
+            set: IDs efetivamente reservados por este ciclo
+        """
+        statements = [
+            (sql + " AND sent = ? RETURNING id", args + [self.SENT_PENDING])
+            for sql, args in self._build_sent_updates(table, ids, self.SENT_CLAIMED)
+        ]
+        results = await client.batch(statements)
+        return {row[0] for result in results for row in result.rows}
+    
+    async def _commit_delivery_results(self, client, table: str, delivered_ids: List[int], failed_ids: List[int], sent_at: str):
+        """
+        Grava o resultado de um ciclo de envio (falhas → 0, enviados → 1).
+        
+        Falhas e enviados vão em batches separados, cada um repetido até
+        COMMIT_RETRIES vezes: se a marcação dos enviados falhar, as falhas
+        já voltaram para a fila e não ficam reservadas (sent = 2) para
+        _settle_claimed_rows descartar no próximo início.
+        """
+        error = None
+        for statements in (
+            self._build_sent_updates(table, failed_ids, self.SENT_PENDING),
+            self._build_sent_updates(table, delivered_ids, self.SENT_DONE, sent_at),
+        ):
+            if not statements:
+                continue
+            try:
+                await self._batch_with_retry(client, statements)
+            except Exception as e:
+                error = e
+        
+        if error:
+            raise error
+    
+    async def _batch_with_retry(self, client, statements: List[tuple]):
+        """Executa um batch repetindo com backoff em caso de erro (ex: falha de rede)."""
+        for attempt in range(self.COMMIT_RETRIES):
+            try:
+                await client.batch(statements)
+                return
+            except Exception as e:
+                if attempt == self.COMMIT_RETRIES - 1:
+                    raise
+                delay = self.COMMIT_BACKOFF * (2 ** attempt)
+                logger.warning(f"⚠️ Erro ao gravar resultado do envio ({e}), nova tentativa em {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def _settle_claimed_rows(self) -> int:
+        """
+        Resolve linhas que ficaram reservadas (sent = 2) por um ciclo interrompido.
+        
+        Não há como saber se a mensagem chegou ao Discord; elas são
+        consideradas enviadas para nunca duplicar uma notificação.
+        
+        Trade-off: uma linha reservada cujo envio falhou é descartada aqui
+        (a notificação some em silêncio em vez de sair duplicada). Isso só
+        acontece se o bot cair durante o ciclo ou se o banco ficar
+        indisponível em todas as tentativas de _commit_delivery_results.
+        
+        Returns:
+            int: Número de linhas resolvidas
+        """
+        client = await self.cache_manager.get_client()
+        results = await client.batch([
+            (f"UPDATE {table} SET sent = ?, sent_at = COALESCE(sent_at, ?) WHERE sent = ?",
+             [self.SENT_DONE, datetime.now().isoformat(), self.SENT_CLAIMED])
+            for table in ("match_reminders", "match_result_notifications")
+        ])
+        return sum(result.rows_affected or 0 for result in results)
+    
+    async def _attach_match_data(self, client, rows) -> List[tuple]:
+        """
+        Anexa match_data às linhas vencidas (match_id na coluna 2).
+        
+        Busca o JSON uma vez por partida distinta em vez de juntá-lo a cada
+        linha. Linhas cuja partida não está mais no cache são ignoradas
+        (mesmo comportamento do antigo JOIN com matches_cache).
+        
+        Returns:
+            Lista de tuplas (colunas da linha..., match_data)
+        """
+        match_ids = list({row[2] for row in rows})
+        match_data = {}
+        for i in range(0, len(match_ids), self.IN_CHUNK_SIZE):
+            chunk = match_ids[i:i + self.IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            result = await client.execute(
+                f"SELECT match_id, match_data FROM matches_cache WHERE match_id IN ({placeholders})",
+                chunk
+            )
+            match_data.update((row[0], row[1]) for row in result.rows)
+        
+        return [tuple(row) + (match_data[row[2]],) for row in rows if row[2] in match_data]
+    
     async def send_pending_reminders(self) -> int:
         """
         Envia lembretes pendentes.
@@ -181,76 +532,75 @@ class NotificationManager:
             now = datetime.now()
             now_str = now.strftime('%H:%M:%S')
             
-            # Buscar TODOS os lembretes pendentes
+            # Buscar apenas os lembretes pendentes que já venceram
+            # (comparação direta de scheduled_time usa idx_reminders_pending)
             result = await client.execute(
                 """
-                SELECT mr.id, mr.guild_id, mr.match_id, mr.reminder_minutes_before,
-                       mr.scheduled_time, mc.match_data
-                FROM match_reminders mr
-                JOIN matches_cache mc ON mr.match_id = mc.match_id
-                WHERE mr.sent = 0
-                ORDER BY mr.scheduled_time ASC
+                SELECT id, guild_id, match_id, reminder_minutes_before, scheduled_time
+                FROM match_reminders
+                WHERE sent = 0
+                AND scheduled_time <= ?
+                ORDER BY scheduled_time ASC
                 """,
-                []
+                [now.isoformat()]
             )
             
-            all_reminders = result.rows if result.rows else []
+            # match_data só das partidas que serão notificadas agora
+            due_reminders = await self._attach_match_data(client, result.rows or [])
             sent_count = 0
-            vencidos = 0
-            pendentes = 0
             
             # Log inicial
-            logger.info(f"   📊 Total de lembretes pendentes (não enviados): {len(all_reminders)}")
+            logger.info(f"   📊 Lembretes vencidos (não enviados): {len(due_reminders)}")
             
-            if not all_reminders:
-                logger.info(f"   ✅ Nenhum lembrete pendente no banco de dados")
+            if not due_reminders:
+                logger.info(f"   ✅ Nenhum lembrete vencido no banco de dados")
                 return 0
             
-            for reminder in all_reminders:
-                reminder_id = reminder[0]
-                guild_id = reminder[1]
+            # Reservar as linhas antes de enviar (proteção contra envio duplicado)
+            claimed = await self._claim_rows(client, "match_reminders", [reminder[0] for reminder in due_reminders])
+            due_reminders = [reminder for reminder in due_reminders if reminder[0] in claimed]
+            if not due_reminders:
+                logger.info(f"   ✅ Lembretes vencidos já reservados por outro ciclo")
+                return 0
+            
+            # Streams (e digest para o cache de embeds) uma vez por partida, não por guild
+            match_streams = await self._load_match_streams(list({reminder[2] for reminder in due_reminders}))
+            
+            # Enviar todos em paralelo (a fila de entrega limita concorrência e taxa)
+            sends = []
+            for reminder in due_reminders:
                 match_id = reminder[2]
                 minutes_before = reminder[3]
-                scheduled_time_str = reminder[4]
-                match_data = reminder[5]
                 
-                # Converter scheduled_time para datetime
-                scheduled_time = datetime.fromisoformat(scheduled_time_str)
-                time_until = scheduled_time - now
-                total_seconds = time_until.total_seconds()
+                # Atraso em relação ao horário agendado
+                scheduled_time = datetime.fromisoformat(reminder[4])
+                late_seconds = (now - scheduled_time).total_seconds()
+                logger.info(f"   🚀 ENVIANDO AGORA: Match {match_id} | {minutes_before}min antes | Vencido há {int(late_seconds)}s")
                 
-                # Verificar se já venceu
-                if total_seconds <= 0:
-                    vencidos += 1
-                    logger.info(f"   🚀 ENVIANDO AGORA: Match {match_id} | {minutes_before}min antes | Vencido há {abs(int(total_seconds))}s")
-                    
-                    # Enviar notificação
-                    if await self._send_reminder_notification(guild_id, match_id, match_data, minutes_before):
-                        # Marcar como enviado
-                        try:
-                            await client.execute(
-                                """
-                                UPDATE match_reminders 
-                                SET sent = 1, sent_at = ?
-                                WHERE id = ?
-                                """,
-                                [now.isoformat(), reminder_id]
-                            )
-                            sent_count += 1
-                            logger.info(f"      ✅ Sucesso: Lembrete marcado como enviado (ID: {reminder_id})")
-                        except Exception as e:
-                            logger.error(f"      ❌ Erro ao marcar como enviado: {e}")
-                    else:
-                        logger.warning(f"      ⚠️ Falha ao enviar notificação")
-                else:
-                    # Ainda não venceu
-                    pendentes += 1
-                    remaining_minutes = int(total_seconds / 60)
-                    remaining_seconds = int(total_seconds % 60)
-                    logger.info(f"   ⏳ Aguardando: Match {match_id} | {minutes_before}min | Falta {remaining_minutes}m {remaining_seconds}s")
-            
-            # Log final detalhado
-            logger.info(f"   📈 RESUMO: {vencidos} vencidos, {pendentes} ainda pendentes, {sent_count} enviados")
+                sends.append(self._send_reminder_notification(
+                    reminder[1], match_id, reminder[5], minutes_before, match_streams=match_streams[match_id]
+                ))
+            
+            results = await asyncio.gather(*sends)
+            
+            # None = envio interrompido (pode ter sido publicado): fica reservado, sem novo envio
+            delivered_ids = [reminder[0] for reminder, delivered in zip(due_reminders, results) if delivered]
+            failed_ids = [reminder[0] for reminder, delivered in zip(due_reminders, results) if delivered is False]
+            
+            # Marcar enviados (e liberar falhas) em um único batch
+            try:
+                await self._commit_delivery_results(client, "match_reminders", delivered_ids, failed_ids, now.isoformat())
+                sent_count = len(delivered_ids)
+                logger.info(f"      ✅ {sent_count} lembrete(s) marcado(s) como enviado(s)")
+            except Exception as e:
+                logger.error(f"      ❌ Erro ao marcar como enviado: {e}")
+            
+            if failed_ids:
+                logger.warning(f"      ⚠️ {len(failed_ids)} lembrete(s) falharam (nova tentativa em {self.RETRY_DELAY_SECONDS}s)")
+                self._schedule_deadline(now + timedelta(seconds=self.RETRY_DELAY_SECONDS))
+            
+            # Log final
+            logger.info(f"   📈 RESUMO: {len(due_reminders)} vencidos, {sent_count} enviados")
             
             return sent_count
             
@@ -265,8 +615,9 @@ class NotificationManager:
         guild_id: int, 
         match_id: int, 
         match_data: str,
-        minutes_before: int
-    ) -> bool:
+        minutes_before: int,
+        match_streams: Optional[Tuple[List[Dict], str]] = None
+    ) -> Optional[bool]:
         """
         Envia uma notificação de lembrete.
         
@@ -275,13 +626,13 @@ class NotificationManager:
             match_id: ID da partida
             match_data: JSON da partida
             minutes_before: Quantos minutos antes do início
+            match_streams: (streams, digest) já buscados no ciclo (buscados aqui se None)
             
         Returns:
-            bool: True se enviado com sucesso
+            True se enviado, False se falhou (pode ser reenviado) ou None se o
+            envio foi interrompido no meio (não reenviar)
         """
         try:
-            import json
-            
             logger.info(f"      [NOTIF-INIT] Iniciando envio para guild {guild_id}, match {match_id}")
             
             # 1. Verificar se guild existe
@@ -292,19 +643,15 @@ class NotificationManager:
             
             logger.info(f"      [NOTIF-OK] ✅ Guild encontrada: '{guild.name}' (ID: {guild_id})")
             
-            # 2. Buscar configuração da guild (incluindo timezone)
-            client = await self.cache_manager.get_client()
-            result = await client.execute(
-                "SELECT notification_channel_id, timezone FROM guild_config WHERE guild_id = ?",
-                [guild_id]
-            )
+            # 2. Buscar configuração da guild (incluindo timezone) do cache em memória
+            config = await self.cache_manager.guild_configs.get(guild_id)
             
-            if not result.rows:
+            if not config:
                 logger.error(f"      [NOTIF-ERR] ❌ Guild {guild_id} SEM configuração no banco")
                 return False
             
-            channel_id = result.rows[0][0]
-            timezone = result.rows[0][1] or "America/Sao_Paulo"
+            channel_id = config["notification_channel_id"]
+            timezone = config["timezone"] or "America/Sao_Paulo"
             
             # 3. Verificar se channel_id foi configurado
             if not channel_id:
@@ -321,23 +668,38 @@ class NotificationManager:
             
             logger.info(f"      [NOTIF-OK] ✅ Canal encontrado: #{channel.name}")
             
-            # 5. Parsear dados da partida
-            try:
-                match = json.loads(match_data)
-                logger.info(f"      [NOTIF-OK] ✅ Dados da partida parseados")
-            except Exception as e:
-                logger.error(f"      [NOTIF-ERR] ❌ Erro ao fazer parse do JSON: {e}")
-                return False
-            
-            # 6. Criar embed
             # Converter timezone para string (libSQL retorna bytes)
             tz_str = timezone.decode() if isinstance(timezone, bytes) else str(timezone or "America/Sao_Paulo")
-            embed = await self._create_reminder_embed(match, minutes_before, timezone=tz_str)
-            logger.info(f"      [NOTIF-OK] ✅ Embed criado")
             
-            # 7. Enviar mensagem
+            # 5/6. Reaproveitar embed já renderizado para (partida, lembrete, timezone, streams)
+            if match_streams is None:
+                match_streams = (await self._load_match_streams([match_id]))[match_id]
+            streams, streams_digest = match_streams
+            embed_key = self._embed_cache_key("reminder", match_id, match_data, minutes_before, tz_str, streams_digest)
+            embed = self._get_cached_embed(embed_key)
+            
+            if embed is not None:
+                logger.info(f"      [NOTIF-OK] ✅ Embed reaproveitado do cache")
+            else:
+                # 5. Parsear dados da partida
+                try:
+                    match = json.loads(match_data)
+                    logger.info(f"      [NOTIF-OK] ✅ Dados da partida parseados")
+                except Exception as e:
+                    logger.error(f"      [NOTIF-ERR] ❌ Erro ao fazer parse do JSON: {e}")
+                    return False
+                
+                # 6. Criar embed
+                embed = await self._create_reminder_embed(match, minutes_before, timezone=tz_str, streams=streams)
+                self._store_embed(embed_key, embed)
+                logger.info(f"      [NOTIF-OK] ✅ Embed criado")
+            
+            # 7. Enviar mensagem (via fila de entrega com rate limit)
             try:
-                message = await channel.send(embed=embed)
+                message = await self.delivery.send(channel, embed)
+                if message is None:
+                    logger.error(f"      [NOTIF-ERR] ❌ Entrega no Discord falhou após novas tentativas")
+                    return False
                 logger.info(f"      [NOTIF-SUCCESS] ✅ ENVIADA COM SUCESSO!")
                 logger.info(f"         Guild: {guild.name} ({guild_id})")
                 logger.info(f"         Canal: #{channel.name} ({channel_id})")
@@ -345,6 +707,9 @@ class NotificationManager:
                 logger.info(f"         Lembrete: {minutes_before} minutos antes")
                 logger.info(f"         MSG ID: {message.id}")
                 return True
+            except DeliveryInterruptedError as e:
+                logger.warning(f"      [NOTIF-WARN] ⚠️ Envio interrompido, resultado desconhecido: {e}")
+                return None
             except Exception as e:
                 logger.error(f"      [NOTIF-ERR] ❌ Erro ao enviar no Discord: {type(e).__name__}: {e}")
                 return False
@@ -355,8 +720,9 @@ class NotificationManager:
             logger.error(traceback.format_exc())
             return False
     
-    async def _create_reminder_embed(self, match: Dict, minutes_before: int, timezone: str = "America/Sao_Paulo") -> nextcord.Embed:
-        """Cria um embed para notificação de lembrete com informações de streams."""
+    async def _create_reminder_embed(self, match: Dict, minutes_before: int, timezone: str = "America/Sao_Paulo",
+                                     streams: Optional[List[Dict]] = None) -> nextcord.Embed:
+        """Cria um embed para notificação de lembrete com informações de streams (buscados se None)."""
         
         from src.utils.timezone_manager import TimezoneManager
         
@@ -416,7 +782,8 @@ class NotificationManager:
             match_id = match.get("id")
             if match_id:
                 from src.utils.embeds import format_streams_field
-                streams = await self.cache_manager.get_match_streams(match_id)
+                if streams is None:
+                    streams = await self.cache_manager.get_match_streams(match_id)
                 if streams:
                     formatted_streams = format_streams_field(streams)
                     if formatted_streams:
@@ -436,6 +803,9 @@ class NotificationManager:
         """
         Agenda uma notificação de RESULTADO para ser enviada IMEDIATAMENTE.
         
+        Uma notificação já reservada (em envio) ou enviada não é reaberta,
+        senão o resultado sairia duplicado.
+        
         Args:
             guild_id: ID do servidor Discord
             match_id: ID da partida
@@ -452,14 +822,16 @@ class NotificationManager:
                 """
                 INSERT INTO match_result_notifications
                 (guild_id, match_id, scheduled_time, sent)
-                VALUES (?, ?, ?, 0)
+                VALUES (?, ?, ?, ?)
                 ON CONFLICT(guild_id, match_id) DO UPDATE SET
-                    scheduled_time = excluded.scheduled_time,
-                    sent = 0
+                    scheduled_time = excluded.scheduled_time
+                WHERE match_result_notifications.sent = ?
                 """,
-                [guild_id, match_id, now.isoformat()]
+                [guild_id, match_id, now.isoformat(), self.SENT_PENDING, self.SENT_PENDING]
             )
             
+            self._schedule_deadline(now)
+            
             logger.info(f"📬 Resultado agendado: Guild {guild_id}, Match {match_id}")
             return True
             
@@ -479,21 +851,19 @@ class NotificationManager:
             client = await self.cache_manager.get_client()
             now = datetime.now()
             
-            # Buscar notificações de resultado pendentes
+            # Buscar notificações de resultado vencidas (usa idx_result_notif_pending)
             result = await client.execute(
                 """
-                SELECT mrn.id, mrn.guild_id, mrn.match_id,
-                       mrn.scheduled_time, mc.match_data
-                FROM match_result_notifications mrn
-                JOIN matches_cache mc ON mrn.match_id = mc.match_id
-                WHERE mrn.sent = 0
-                AND datetime(mrn.scheduled_time) <= datetime(?)
-                ORDER BY mrn.scheduled_time ASC
+                SELECT id, guild_id, match_id, scheduled_time
+                FROM match_result_notifications
+                WHERE sent = 0
+                AND scheduled_time <= ?
+                ORDER BY scheduled_time ASC
                 """,
                 [now.isoformat()]
             )
             
-            result_notifications = result.rows if result.rows else []
+            result_notifications = await self._attach_match_data(client, result.rows or [])
             sent_count = 0
             
             logger.info(f"   📊 {len(result_notifications)} notificação(ões) de resultado pendente(s)")
@@ -502,33 +872,46 @@ class NotificationManager:
                 logger.debug(f"   ✅ Nenhuma notificação de resultado para enviar")
                 return 0
             
+            # Reservar as linhas antes de enviar (proteção contra envio duplicado)
+            claimed = await self._claim_rows(client, "match_result_notifications", [n[0] for n in result_notifications])
+            result_notifications = [n for n in result_notifications if n[0] in claimed]
+            if not result_notifications:
+                logger.debug(f"   ✅ Resultados vencidos já reservados por outro ciclo")
+                return 0
+            
+            # Streams (e digest para o cache de embeds) uma vez por partida, não por guild
+            match_streams = await self._load_match_streams(list({n[2] for n in result_notifications}))
+            
+            # Enviar todos em paralelo (a fila de entrega limita concorrência e taxa)
+            sends = []
             for notification in result_notifications:
-                notif_id = notification[0]
                 guild_id = notification[1]
                 match_id = notification[2]
-                scheduled_time_str = notification[3]
-                match_data = notification[4]
                 
                 logger.info(f"   🚀 ENVIANDO RESULTADO: Match {match_id} para Guild {guild_id}")
-                
-                # Enviar notificação
-                if await self._send_result_notification(guild_id, match_id, match_data):
-                    # Marcar como enviado
-                    try:
-                        await client.execute(
-                            """
-                            UPDATE match_result_notifications
-                            SET sent = 1, sent_at = ?
-                            WHERE id = ?
-                            """,
-                            [now.isoformat(), notif_id]
-                        )
-                        sent_count += 1
-                        logger.info(f"      ✅ Resultado marcado como enviado")
-                    except Exception as e:
-                        logger.error(f"      ❌ Erro ao marcar como enviado: {e}")
-                else:
-                    logger.warning(f"      ⚠️ Falha ao enviar resultado")
+                sends.append(self._send_result_notification(
+                    guild_id, match_id, notification[4], match_streams=match_streams[match_id]
+                ))
+            
+            results = await asyncio.gather(*sends)
+            
+            # None = envio interrompido (pode ter sido publicado): fica reservado, sem novo envio
+            delivered_ids = [n[0] for n, delivered in zip(result_notifications, results) if delivered]
+            failed_ids = [n[0] for n, delivered in zip(result_notifications, results) if delivered is False]
+            
+            # Marcar enviados (e liberar falhas) em um único batch
+            try:
+                await self._commit_delivery_results(
+                    client, "match_result_notifications", delivered_ids, failed_ids, now.isoformat()
+                )
+                sent_count = len(delivered_ids)
+                logger.info(f"      ✅ {sent_count} resultado(s) marcado(s) como enviado(s)")
+            except Exception as e:
+                logger.error(f"      ❌ Erro ao marcar como enviado: {e}")
+            
+            if failed_ids:
+                logger.warning(f"      ⚠️ {len(failed_ids)} resultado(s) falharam (nova tentativa em {self.RETRY_DELAY_SECONDS}s)")
+                self._schedule_deadline(now + timedelta(seconds=self.RETRY_DELAY_SECONDS))
             
             logger.info(f"   📈 Total de resultados enviados: {sent_count}")
             return sent_count
@@ -543,8 +926,9 @@ class NotificationManager:
         self,
         guild_id: int,
         match_id: int,
-        match_data: str
-    ) -> bool:
+        match_data: str,
+        match_streams: Optional[Tuple[List[Dict], str]] = None
+    ) -> Optional[bool]:
         """
         Envia uma notificação de RESULTADO para Discord.
         
@@ -552,12 +936,13 @@ class NotificationManager:
             guild_id: ID do servidor
             match_id: ID da partida
             match_data: JSON da partida com resultado
+            match_streams: (streams, digest) já buscados no ciclo (buscados aqui se None)
             
         Returns:
-            bool: True se enviado com sucesso
+            True se enviado, False se falhou (pode ser reenviado) ou None se o
+            envio foi interrompido no meio (não reenviar)
         """
         try:
-            import json
             from src.utils.embeds import create_result_embed
             
             logger.info(f"      [RESULT-INIT] Iniciando envio para guild {guild_id}, match {match_id}")
@@ -570,19 +955,15 @@ class NotificationManager:
             
             logger.info(f"      [RESULT-OK] ✅ Guild encontrada: '{guild.name}'")
             
-            # 2. Buscar configuração da guild (incluindo timezone)
-            client = await self.cache_manager.get_client()
-            result = await client.execute(
-                "SELECT notification_channel_id, timezone FROM guild_config WHERE guild_id = ?",
-                [guild_id]
-            )
+            # 2. Buscar configuração da guild (incluindo timezone) do cache em memória
+            config = await self.cache_manager.guild_configs.get(guild_id)
             
-            if not result.rows:
+            if not config:
                 logger.error(f"      [RESULT-ERR] ❌ Guild {guild_id} SEM configuração")
                 return False
             
-            channel_id = result.rows[0][0]
-            timezone = result.rows[0][1] or "America/Sao_Paulo"
+            channel_id = config["notification_channel_id"]
+            timezone = config["timezone"] or "America/Sao_Paulo"
             
             # 3. Verificar se channel_id foi configurado
             if not channel_id:
@@ -599,47 +980,63 @@ class NotificationManager:
             
             logger.info(f"      [RESULT-OK] ✅ Canal: #{channel.name}")
             
-            # 5. Parsear dados da partida
-            try:
-                match = json.loads(match_data)
-                logger.info(f"      [RESULT-OK] ✅ Dados parseados")
-            except Exception as e:
-                logger.error(f"      [RESULT-ERR] ❌ Erro ao parsear JSON: {e}")
-                return False
-            
-            # 6. Criar embed de resultado com timezone
             # Converter timezone para string (libSQL retorna bytes)
             tz_str = timezone.decode() if isinstance(timezone, bytes) else str(timezone or "America/Sao_Paulo")
-            embed = create_result_embed(match, timezone=tz_str)
             
-            # NOVO: Adicionar streams se disponíveis
-            try:
-                match_id = match.get("id")
-                if match_id:
-                    from src.utils.embeds import format_streams_field
-                    streams = await self.cache_manager.get_match_streams(match_id)
-                    if streams:
-                        formatted_streams = format_streams_field(streams)
-                        if formatted_streams:
-                            embed.add_field(
-                                name="📡 Streams",
-                                value=formatted_streams,
-                                inline=False
-                            )
-            except Exception as e:
-                logger.debug(f"Erro ao adicionar streams à notificação de resultado: {e}")
+            # 5/6. Reaproveitar embed já renderizado para (partida, timezone, streams)
+            if match_streams is None:
+                match_streams = (await self._load_match_streams([match_id]))[match_id]
+            streams, streams_digest = match_streams
+            embed_key = self._embed_cache_key("result", match_id, match_data, None, tz_str, streams_digest)
+            embed = self._get_cached_embed(embed_key)
             
-            logger.info(f"      [RESULT-OK] ✅ Embed criado")
+            if embed is not None:
+                logger.info(f"      [RESULT-OK] ✅ Embed reaproveitado do cache")
+            else:
+                # 5. Parsear dados da partida
+                try:
+                    match = json.loads(match_data)
+                    logger.info(f"      [RESULT-OK] ✅ Dados parseados")
+                except Exception as e:
+                    logger.error(f"      [RESULT-ERR] ❌ Erro ao parsear JSON: {e}")
+                    return False
+                
+                # 6. Criar embed de resultado com timezone
+                embed = create_result_embed(match, timezone=tz_str)
+                
+                # NOVO: Adicionar streams se disponíveis
+                try:
+                    if match.get("id"):
+                        from src.utils.embeds import format_streams_field
+                        if streams:
+                            formatted_streams = format_streams_field(streams)
+                            if formatted_streams:
+                                embed.add_field(
+                                    name="📡 Streams",
+                                    value=formatted_streams,
+                                    inline=False
+                                )
+                except Exception as e:
+                    logger.debug(f"Erro ao adicionar streams à notificação de resultado: {e}")
+                
+                self._store_embed(embed_key, embed)
+                logger.info(f"      [RESULT-OK] ✅ Embed criado")
             
-            # 7. Enviar mensagem
+            # 7. Enviar mensagem (via fila de entrega com rate limit)
             try:
-                message = await channel.send(embed=embed)
+                message = await self.delivery.send(channel, embed)
+                if message is None:
+                    logger.error(f"      [RESULT-ERR] ❌ Entrega no Discord falhou após novas tentativas")
+                    return False
                 logger.info(f"      [RESULT-SUCCESS] ✅ ENVIADA COM SUCESSO!")
                 logger.info(f"         Guild: {guild.name} ({guild_id})")
                 logger.info(f"         Canal: #{channel.name} ({channel_id})")
                 logger.info(f"         Partida: {match_id}")
                 logger.info(f"         MSG ID: {message.id}")
                 return True
+            except DeliveryInterruptedError as e:
+                logger.warning(f"      [RESULT-WARN] ⚠️ Envio interrompido, resultado desconhecido: {e}")
+                return None
             except Exception as e:
                 logger.error(f"      [RESULT-ERR] ❌ Erro ao enviar: {type(e).__name__}: {e}")
                 return False
@@ -651,38 +1048,76 @@ class NotificationManager:
             return False
     
     def start_reminder_loop(self):
-        """Inicia o loop de verificação de lembretes."""
+        """Inicia o dispatcher de lembretes."""
         if not self.is_running:
             self.is_running = True
             self._reminder_loop.start()
-            logger.info("🔄 Loop de lembretes INICIADO | Verificando a cada 1 minuto")
+            logger.info("🔄 Dispatcher de lembretes INICIADO | Acorda no horário de cada envio")
     
     def stop_reminder_loop(self):
-        """Para o loop de verificação de lembretes."""
+        """Para o dispatcher de lembretes."""
         if self.is_running:
             self.is_running = False
-            self._reminder_loop.stop()
+            # cancel (e não stop): a iteração atual pode estar dormindo até o próximo prazo
+            self._reminder_loop.cancel()
             logger.info("⏹️ Loop de lembretes PARADO")
     
-    @tasks.loop(minutes=1)
+    @tasks.loop(seconds=0)
     async def _reminder_loop(self):
-        """Loop que verifica lembretes e resultados a cada minuto."""
-        now = datetime.now().strftime('%H:%M:%S')
-        logger.info(f"🔍 [VERIFICAÇÃO] Checando notificações - {now}")
-        
-        # Enviar lembretes de INÍCIO
-        count_reminders = await self.send_pending_reminders()
-        
-        # ⭐ NOVO: Enviar notificações de RESULTADO
-        count_results = await self.send_pending_result_notifications()
+        """
+        Dorme até o próximo lembrete/resultado vencer e envia apenas os vencidos.
         
-        if count_reminders == 0 and count_results == 0:
-            logger.info(f"   ℹ️ Nenhuma notificação neste momento")
+        Os horários ficam em um min-heap alimentado pelos agendamentos; o banco
+        só é consultado quando algo venceu (e no resync periódico).
+        """
+        try:
+            if time.monotonic() - self._deadlines_loaded_at >= self.RESYNC_SECONDS:
+                count = await self._load_deadlines()
+                logger.debug(f"🔁 {count} horário(s) de envio pendente(s) recarregado(s)")
+            
+            await self._sleep_until_next_deadline()
+            
+            now = datetime.now()
+            if not self._deadlines or self._deadlines[0] > now:
+                # Acordado por novo agendamento ou resync
+                return
+            
+            while self._deadlines and self._deadlines[0] <= now:
+                heapq.heappop(self._deadlines)
+            
+            now_str = now.strftime('%H:%M:%S')
+            logger.info(f"🔍 [VERIFICAÇÃO] Enviando notificações vencidas - {now_str}")
+            
+            # Enviar lembretes de INÍCIO
+            count_reminders = await self.send_pending_reminders()
+            
+            # ⭐ NOVO: Enviar notificações de RESULTADO
+            count_results = await self.send_pending_result_notifications()
+            
+            if count_reminders == 0 and count_results == 0:
+                logger.info(f"   ℹ️ Nenhuma notificação neste momento")
+            else:
+                stats = self.delivery.get_stats()
+                logger.info(f"   📮 Entrega: fila {stats['queue_depth']} | {stats['delivered']} entregues | "
+                           f"{stats['failed']} falhas | {stats['retried']} retries | "
+                           f"latência média {stats['avg_latency']}s (máx {stats['max_latency']}s)")
+            
+            logger.info(f"✅ [VERIFICAÇÃO CONCLUÍDA] {now_str}")
         
-        logger.info(f"✅ [VERIFICAÇÃO CONCLUÍDA] {now}")
+        except Exception as e:
+            logger.error(f"❌ Erro no dispatcher de lembretes: {type(e).__name__}: {e}")
+            await asyncio.sleep(5)
     
     @_reminder_loop.before_loop
     async def before_reminder_loop(self):
-        """Aguarda o bot ficar pronto antes de iniciar."""
+        """Aguarda o bot ficar pronto e carrega os horários pendentes."""
         await self.bot.wait_until_ready()
-        logger.info("✅ Bot pronto | Verificação de lembretes ATIVA")
+        try:
+            settled = await self._settle_claimed_rows()
+            if settled:
+                logger.warning(f"⚠️ {settled} notificação(ões) reservada(s) por um ciclo interrompido marcada(s) como enviada(s)")
+            
+            count = await self._load_deadlines()
+            logger.info(f"✅ Bot pronto | {count} horário(s) de envio pendente(s) carregado(s)")
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar lembretes pendentes: {e}")
@@ -4,19 +4,121 @@ Fornece métodos para buscar dados de partidas de CS2.
 """
 
 import aiohttp
+import asyncio
 import os
-from typing import List, Optional, Dict
+import time
+from collections import OrderedDict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from src.services.http_transport import get_http_transport
+
 logger = logging.getLogger(__name__)
 
 
+class PandaScoreError(Exception):
+    """Falha ao buscar na PandaScore (HTTP, conexão, timeout) e sem resposta em cache para servir."""
+
+
+class PandaScoreRateLimitError(PandaScoreError):
+    """Rate limit da PandaScore esgotado e sem resposta em cache para servir."""
+
+
+class PandaScoreRateLimiter:
+    """
+    Token bucket compartilhado por todas as chamadas do cliente.
+    
+    O orçamento é reabastecido continuamente (requests_per_hour) e cada
+    prioridade só consome tokens acima de uma reserva: backfill para cedo e
+    deixa sobra para o polling ao vivo. Um 429 bloqueia o bucket inteiro
+    até o Retry-After.
+    """
+    
+    # Tokens que precisam sobrar no bucket para a prioridade poder consumir
+    PRIORITY_RESERVE = {"live": 0, "normal": 5, "backfill": 20}
+    # Espera máxima por um token antes de desistir da requisição
+    PRIORITY_MAX_WAIT = {"live": 15.0, "normal": 30.0, "backfill": 10.0}
+    
+    def __init__(self, requests_per_hour: int = 1000, burst: int = 60):
+        self.capacity = burst
+        self.rate = requests_per_hour / 3600.0
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        return now
+    
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+    
+    async def acquire(self, priority: str = "normal") -> bool:
+        """
+        Aguarda um token para a prioridade informada.
+        
+        Returns:
+            True se o token foi consumido, False se a espera passaria de
+            PRIORITY_MAX_WAIT (o chamador decide o fallback)
+        """
+        reserve = self.PRIORITY_RESERVE.get(priority, self.PRIORITY_RESERVE["normal"])
+        deadline = time.monotonic() + self.PRIORITY_MAX_WAIT.get(priority, 30.0)
+        
+        while True:
+            now = self._refill()
+            if now < self.blocked_until:
+                wait = self.blocked_until - now
+            elif self._tokens >= reserve + 1:
+                self._tokens -= 1
+                return True
+            else:
+                wait = (reserve + 1 - self._tokens) / self.rate
+            
+            if now + wait > deadline:
+                return False
+            
+            # Acordar periodicamente: um Retry-After ou novos headers podem mudar a espera
+            await asyncio.sleep(min(wait, 1.0))
+    
+    def block_for(self, seconds: float):
+        """Suspende todas as requisições por `seconds` (ex: Retry-After de um 429)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def update_from_headers(self, headers):
+        """Ajusta o bucket ao saldo informado pela API (X-Rate-Limit-Remaining)."""
+        remaining = headers.get("X-Rate-Limit-Remaining")
+        try:
+            remaining = int(remaining)
+        except (TypeError, ValueError):
+            return
+        self._refill()
+        self._tokens = min(self._tokens, float(remaining))
+
+
 class PandaScoreClient:
     """Cliente assíncrono para a API PandaScore."""
     
     BASE_URL = "https://api.pandascore.co"
     
+    # Cache de respostas: TTL (segundos) por endpoint; após o TTL a resposta é
+    # revalidada com If-None-Match/If-Modified-Since quando a API envia validadores
+    RESPONSE_TTLS = {
+        "/csgo/matches/running": 15,
+        "/csgo/matches/upcoming": 60,
+        "/csgo/matches/past": 30,
+    }
+    DEFAULT_RESPONSE_TTL = 30
+    RESPONSE_CACHE_SIZE = 128
+    
+    # 429: novas tentativas com backoff exponencial (ou Retry-After quando enviado)
+    MAX_RATE_LIMIT_RETRIES = 2
+    BACKOFF_BASE = 2.0
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         Inicializa o cliente PandaScore.
@@ -28,54 +130,206 @@ class PandaScoreClient:
         if not self.api_key:
             raise ValueError("PandaScore API key não configurada!")
         
-        self.session: Optional[aiohttp.ClientSession] = None
         self._headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Accept": "application/json"
         }
+        
+        # (endpoint, params) -> {"data", "etag", "last_modified", "fetched_at"}
+        self._response_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self.cache_stats = {
+            "hits": 0, "misses": 0, "not_modified": 0, "stale": 0, "rate_limited": 0, "coalesced": 0,
+            "errors": 0
+        }
+        
+        # (endpoint, params) -> task da requisição em andamento (single-flight)
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        
+        # Orçamento compartilhado por scheduler, cobertura temporal e cogs
+        self.rate_limiter = PandaScoreRateLimiter(
+            requests_per_hour=int(os.getenv("PANDASCORE_REQUESTS_PER_HOUR", "1000"))
+        )
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Retorna ou cria uma sessão HTTP."""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(headers=self._headers)
-        return self.session
+        """Retorna a sessão HTTP compartilhada (pool de conexões do transporte)."""
+        return await get_http_transport().get_session()
+    
+    @staticmethod
+    def _copy_response(data: List[Dict]) -> List[Dict]:
+        """Cópia rasa por item: chamadores adicionam chaves (ex: formatted_streams) sem afetar o cache."""
+        return [dict(item) if isinstance(item, dict) else item for item in data]
     
-    async def _request(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict]:
+    def get_cache_stats(self) -> Dict:
+        """Retorna contadores do cache de respostas (hits, misses, not_modified, stale, rate_limited, coalesced, errors, entries)."""
+        return {
+            **self.cache_stats,
+            "entries": len(self._response_cache),
+            "inflight": len(self._inflight),
+            "tokens": int(self.rate_limiter.tokens),
+        }
+    
+    def _store_response(self, key: Tuple, data: List[Dict], headers) -> None:
+        self._response_cache[key] = {
+            "data": data,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.monotonic(),
+        }
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _stale_or_raise(self, key: Tuple, endpoint: str, reason: str,
+                        error: type = PandaScoreRateLimitError) -> List[Dict]:
+        """Serve a última resposta conhecida ou sinaliza que a busca falhou (nunca [])."""
+        if issubclass(error, PandaScoreRateLimitError):
+            self.cache_stats["rate_limited"] += 1
+        else:
+            self.cache_stats["errors"] += 1
+        entry = self._response_cache.get(key)
+        if entry:
+            self.cache_stats["stale"] += 1
+            logger.warning(f"⚠️ {reason}: servindo resposta em cache de {endpoint}")
+            return entry["data"]
+        raise error(f"{reason}: {endpoint}")
+    
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        try:
+            return max(float(headers.get("Retry-After")), 0.0)
+        except (TypeError, ValueError):
+            return None
+    
+    async def _request(self, endpoint: str, params: Optional[Dict] = None, priority: str = "normal") -> List[Dict]:
         """
         Faz requisição à API PandaScore.
         
+        Respostas ficam em cache por (endpoint, params). Dentro do TTL do
+        endpoint a resposta é servida da memória; depois dele é feita uma
+        requisição condicional (ETag/Last-Modified) e um 304 reaproveita o
+        corpo já decodificado.
+        
+        Chamadas concorrentes com o mesmo (endpoint, params) compartilham
+        uma única requisição em andamento (single-flight): cada chamador
+        recebe sua própria cópia do resultado.
+        
+        Toda requisição consome um token do rate limiter compartilhado.
+        Um 429 é repetido com backoff (Retry-After quando enviado); se o
+        orçamento se esgota, a última resposta em cache é servida e, sem
+        ela, PandaScoreRateLimitError é lançada (em vez de [] — que seria
+        lido como "nenhuma partida"). Erros HTTP (exceto 404), de conexão e
+        timeouts seguem a mesma regra com PandaScoreError.
+        
         Args:
             endpoint: Endpoint da API (ex: '/csgo/matches/upcoming')
             params: Parâmetros query string
+            priority: "live", "normal" ou "backfill" (reserva de tokens)
             
         Returns:
             Lista de dicionários com os dados retornados
+            
+        Raises:
+            PandaScoreRateLimitError: Rate limit esgotado e nada em cache
+            PandaScoreError: Falha na requisição e nada em cache
         """
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        entry = self._response_cache.get(key)
+        ttl = self.RESPONSE_TTLS.get(endpoint, self.DEFAULT_RESPONSE_TTL)
+        
+        if entry and time.monotonic() - entry["fetched_at"] < ttl:
+            self.cache_stats["hits"] += 1
+            self._response_cache.move_to_end(key)
+            logger.debug(f"✓ Cache hit: {endpoint}")
+            return self._copy_response(entry["data"])
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, endpoint, params, priority))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish_inflight(key, t))
+        else:
+            self.cache_stats["coalesced"] += 1
+            logger.debug(f"✓ Requisição compartilhada (em andamento): {endpoint}")
+        
+        # shield: o cancelamento de um chamador não cancela a requisição dos demais
+        data = await asyncio.shield(task)
+        return self._copy_response(data)
+    
+    def _finish_inflight(self, key: Tuple, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Marcar a exceção como lida caso todos os chamadores tenham sido cancelados
+        if not task.cancelled():
+            task.exception()
+    
+    async def _fetch(self, key: Tuple, endpoint: str, params: Optional[Dict], priority: str) -> List[Dict]:
+        """Executa a requisição HTTP (com rate limit e revalidação) e atualiza o cache de respostas."""
+        entry = self._response_cache.get(key)
+        
+        headers = dict(self._headers)
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        
         session = await self._get_session()
         url = f"{self.BASE_URL}{endpoint}"
         
-        try:
-            async with session.get(url, params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                logger.info(f"✓ Requisição bem-sucedida: {endpoint}")
-                return data if isinstance(data, list) else [data]
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            if not await self.rate_limiter.acquire(priority):
+                return self._stale_or_raise(key, endpoint, f"Orçamento de requisições esgotado ({priority})")
+            
+            try:
+                async with session.get(url, params=params, headers=headers) as response:
+                    self.rate_limiter.update_from_headers(response.headers)
+                    
+                    if response.status == 429:
+                        delay = self._retry_after(response.headers)
+                        if delay is None:
+                            delay = self.BACKOFF_BASE * (2 ** attempt)
+                        self.rate_limiter.block_for(delay)
+                        logger.warning(f"⚠️ Rate limit (429) em {endpoint}: aguardando {delay:.0f}s "
+                                      f"(tentativa {attempt + 1}/{self.MAX_RATE_LIMIT_RETRIES + 1})")
+                        continue
+                    
+                    if response.status == 304 and entry:
+                        entry["fetched_at"] = time.monotonic()
+                        self._response_cache.move_to_end(key)
+                        self.cache_stats["not_modified"] += 1
+                        logger.info(f"✓ Não modificado (304): {endpoint}")
+                        return entry["data"]
+                    
+                    response.raise_for_status()
+                    data = await response.json()
+                    data = data if isinstance(data, list) else [data]
+                    
+                    self.cache_stats["misses"] += 1
+                    self._store_response(key, data, response.headers)
+                    logger.info(f"✓ Requisição bem-sucedida: {endpoint}")
+                    return data
+                    
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"✗ Erro HTTP {e.status}: {endpoint}")
+                if e.status == 404:
+                    return []  # Recurso inexistente (ex: partida não encontrada)
+                if e.status == 401:
+                    logger.error("Token da API inválido ou expirado!")
+                return self._stale_or_raise(key, endpoint, f"Erro HTTP {e.status}", PandaScoreError)
                 
-        except aiohttp.ClientResponseError as e:
-            logger.error(f"✗ Erro HTTP {e.status}: {endpoint}")
-            if e.status == 401:
-                logger.error("Token da API inválido ou expirado!")
-            elif e.status == 429:
-                logger.error("Rate limit excedido! Aguarde alguns minutos.")
-            return []
+            except aiohttp.ClientError as e:
+                logger.error(f"✗ Erro de conexão: {e}")
+                return self._stale_or_raise(key, endpoint, "Erro de conexão", PandaScoreError)
+            
+            except asyncio.TimeoutError:
+                logger.error(f"✗ Timeout: {endpoint}")
+                return self._stale_or_raise(key, endpoint, "Timeout", PandaScoreError)
             
-        except aiohttp.ClientError as e:
-            logger.error(f"✗ Erro de conexão: {e}")
-            return []
+            except Exception as e:
+                logger.error(f"✗ Erro inesperado: {e}")
+                return self._stale_or_raise(key, endpoint, "Erro inesperado", PandaScoreError)
         
-        except Exception as e:
-            logger.error(f"✗ Erro inesperado: {e}")
-            return []
+        logger.error(f"✗ Rate limit excedido em {endpoint} após {self.MAX_RATE_LIMIT_RETRIES + 1} tentativas")
+        return self._stale_or_raise(key, endpoint, "Rate limit excedido")
     
     async def get_upcoming_matches(self, per_page: int = 10) -> List[Dict]:
         """
@@ -102,9 +356,10 @@ class PandaScoreClient:
             Lista de partidas em andamento
         """
         params = {"filter[status]": "running"}
-        return await self._request("/csgo/matches/running", params)
+        return await self._request("/csgo/matches/running", params, priority="live")
     
-    async def get_past_matches(self, hours: int = 24, per_page: int = 10, page: int = 1) -> List[Dict]:
+    async def get_past_matches(self, hours: int = 24, per_page: int = 10, page: int = 1,
+                               priority: str = "normal") -> List[Dict]:
         """
         Busca partidas finalizadas recentemente.
         
@@ -112,6 +367,7 @@ class PandaScoreClient:
             hours: Buscar partidas das últimas X horas (não usado na API)
             per_page: Número de partidas a retornar por página
             page: Número da página (padrão: 1)
+            priority: Prioridade no rate limiter ("backfill" para cobertura histórica)
             
         Returns:
             Lista de partidas finalizadas
@@ -127,7 +383,7 @@ class PandaScoreClient:
             "per_page": actual_per_page,
             "page": page
         }
-        return await self._request("/csgo/matches/past", params)
+        return await self._request("/csgo/matches/past", params, priority=priority)
     
     async def get_canceled_matches(self, per_page: int = 10) -> List[Dict]:
         """
@@ -160,7 +416,7 @@ class PandaScoreClient:
         return result[0] if result else None
     
     async def close(self):
-        """Fecha a sessão HTTP."""
-        if self.session and not self.session.closed:
-            await self.session.close()
-            logger.info("✓ Sessão PandaScore fechada")
+        """Cancela requisições em andamento (a sessão é fechada com o transporte HTTP)."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        logger.info("✓ Cliente PandaScore encerrado")
@@ -5,27 +5,38 @@ Usamos isso quando a API PandaScore não retorna raw_url (raro),
 para encontrar automaticamente streams do jogo sendo transmitido.
 """
 
-import aiohttp
+import asyncio
 import os
 import logging
-from typing import Optional, List, Dict
+import time
+from bisect import bisect_right
+from typing import Optional, List, Dict, Set, Tuple
 from datetime import datetime, timedelta
 
+from src.services.http_transport import get_http_transport
+
 logger = logging.getLogger(__name__)
 
 
 class TwitchSearchService:
     """Busca streams na Twitch de forma automatizada."""
     
-    # Cache para evitar múltiplas buscas da mesma query em curto prazo
-    _search_cache: Dict[str, tuple] = {}  # {query: (result, timestamp)}
-    CACHE_DURATION = 300  # 5 minutos
+    # Snapshot da categoria Counter-Strike (game_id 32399 inclui CS2)
+    CS_GAME_ID = "32399"
+    STREAMS_PAGE_SIZE = 100
+    MAX_SNAPSHOT_PAGES = 5
+    SNAPSHOT_TTL = 60  # segundos
     
     def __init__(self):
         self.client_id = os.getenv("TWITCH_CLIENT_ID")
         self.client_secret = os.getenv("TWITCH_CLIENT_SECRET")
         self.access_token = None
         self.token_expires_at = None
+        
+        self._snapshot: List[Dict] = []
+        self._snapshot_at: Optional[float] = None
+        self._snapshot_index: Optional["StreamTitleIndex"] = None
+        self._snapshot_lock = asyncio.Lock()
     
     async def _get_access_token(self) -> Optional[str]:
         """
@@ -37,26 +48,26 @@ class TwitchSearchService:
             return self.access_token
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://id.twitch.tv/oauth2/token"
-                params = {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "grant_type": "client_credentials"
-                }
+            session = await get_http_transport().get_session()
+            url = "https://id.twitch.tv/oauth2/token"
+            params = {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials"
+            }
+            
+            async with session.post(url, params=params) as response:
+                if response.status != 200:
+                    logger.error(f"Erro ao obter token Twitch: {response.status}")
+                    return None
+                
+                data = await response.json()
+                self.access_token = data.get("access_token")
+                expires_in = data.get("expires_in", 3600)
+                self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 60)
                 
-                async with session.post(url, params=params) as response:
-                    if response.status != 200:
-                        logger.error(f"Erro ao obter token Twitch: {response.status}")
-                        return None
-                    
-                    data = await response.json()
-                    self.access_token = data.get("access_token")
-                    expires_in = data.get("expires_in", 3600)
-                    self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 60)
-                    
-                    logger.debug(f"✅ Token Twitch obtido, válido por {expires_in}s")
-                    return self.access_token
+                logger.debug(f"✅ Token Twitch obtido, válido por {expires_in}s")
+                return self.access_token
         
         except Exception as e:
             logger.error(f"❌ Erro ao obter token Twitch: {e}")
@@ -67,22 +78,25 @@ class TwitchSearchService:
         championship: str,
         team1_name: str,
         team2_name: str,
-        language: str = "pt"
+        language: str = "pt",
+        snapshot: Optional[List[Dict]] = None
     ) -> Optional[Dict]:
         """
         Busca streams na Twitch para uma partida específica.
         
-        Estratégia de busca (em ordem de prioridade):
-        1. Procura por "championship team1 team2"
-        2. Procura por "team1 vs team2"
-        3. Procura apenas pelo "championship"
-        4. Procura por "Counter-Strike 2" ou "CS2" (fallback por game)
+        A partida é pontuada contra o snapshot da categoria Counter-Strike
+        (get_category_snapshot); quem processa várias partidas deve buscar o
+        snapshot uma vez e passá-lo em `snapshot`.
+        
+        Pontuação por título: palavras do campeonato e dos times, com bônus
+        por viewers e idioma (ver _find_best_match).
         
         Args:
             championship: Nome do campeonato (ex: "ESL Pro League")
             team1_name: Nome do time 1
             team2_name: Nome do time 2
             language: Idioma preferido dos streams (fallback: "en" se não achar)
+            snapshot: Streams da categoria já buscadas (None = usar/atualizar o snapshot em cache)
         
         Returns:
             Dict com dados do stream ou None se não encontrado
@@ -96,36 +110,22 @@ class TwitchSearchService:
             }
         """
         
-        # Construir queries em ordem de prioridade
-        queries = [
-            f"{championship} {team1_name} {team2_name}",
-            f"{team1_name} vs {team2_name}",
-            f"{championship} live",
-            championship,
-            "Counter-Strike 2",  # Fallback: procurar por CS2
-            "CS2"
-        ]
-        
-        token = await self._get_access_token()
-        if not token:
-            logger.warning("❌ Não conseguiu obter token Twitch para busca de streams")
-            return None
-        
         try:
-            # ESTRATÉGIA: Usar game_id é mais confiável que busca textual
-            # Counter-Strike (genérico) = game_id 32399
-            # Vamos primeiro tentar busca por categoria + scoring no código
+            if snapshot is None:
+                snapshot = await self.get_category_snapshot()
             
-            logger.debug(f"🎮 Buscando streams de Counter-Strike (game_id=32399)...")
+            if not snapshot:
+                logger.debug("❌ Nenhuma stream disponível no snapshot da categoria")
+                return None
             
-            result = await self._search_twitch_api(
-                token=token,
+            # Scoring local (sem requisição por partida)
+            result = self._find_best_match(
+                streams=snapshot,
                 query="counter-strike 2",  # Fallback descritivo
                 language=language,
                 championship=championship,
                 team1=team1_name,
-                team2=team2_name,
-                game_id="32399"  # Counter-Strike genérico inclui CS2
+                team2=team2_name
             )
             
             if result:
@@ -139,76 +139,105 @@ class TwitchSearchService:
             logger.error(f"❌ Erro ao buscar streams na Twitch: {e}")
             return None
     
-    async def _search_twitch_api(
-        self,
-        token: str,
-        query: str,
-        language: str,
-        championship: str = "",
-        team1: str = "",
-        team2: str = "",
-        game_id: Optional[str] = None
-    ) -> Optional[Dict]:
+    async def get_category_snapshot(self, force: bool = False) -> List[Dict]:
         """
-        Realiza a busca na API Twitch.
+        Retorna as streams ao vivo da categoria Counter-Strike.
         
-        Se game_id for fornecido, usa busca estruturada por categoria (MELHOR).
-        Senão, usa busca textual por query (MENOS CONFIÁVEL - latência de indexação).
+        Pagina o cursor da API (até MAX_SNAPSHOT_PAGES × 100 streams), então
+        streams fora do top 100 por viewers também são encontradas. O
+        resultado é reaproveitado por SNAPSHOT_TTL segundos: um ciclo do
+        scheduler pontua todas as partidas contra a mesma lista.
+        
+        Args:
+            force: Ignorar o snapshot em cache
+        
+        Returns:
+            Lista de streams (formato /helix/streams); o último snapshot
+            válido se a API falhar
         """
-        logger.debug(f"🔍 Consulta à API Twitch: '{query}'" + (f" (game_id={game_id})" if game_id else ""))
+        async with self._snapshot_lock:
+            if not force and self._snapshot_at and time.monotonic() - self._snapshot_at < self.SNAPSHOT_TTL:
+                return self._snapshot
+            
+            token = await self._get_access_token()
+            if not token:
+                logger.warning("❌ Não conseguiu obter token Twitch para busca de streams")
+                return self._snapshot
+            
+            streams = []
+            seen_ids = set()
+            cursor = None
+            pages = 0
+            
+            for _ in range(self.MAX_SNAPSHOT_PAGES):
+                page = await self._fetch_streams_page(token, self.CS_GAME_ID, cursor)
+                if page is None:
+                    break
+                pages += 1
+                
+                # A ordem por viewers muda durante a paginação: evitar duplicatas
+                for stream in page.get("data", []):
+                    if stream.get("id") not in seen_ids:
+                        seen_ids.add(stream.get("id"))
+                        streams.append(stream)
+                
+                cursor = page.get("pagination", {}).get("cursor")
+                if not cursor or not page.get("data"):
+                    break
+            
+            if pages == 0:
+                return self._snapshot
+            
+            self._snapshot = streams
+            self._snapshot_at = time.monotonic()
+            logger.info(f"📺 Snapshot Twitch: {len(streams)} streams de Counter-Strike ({pages} página(s))")
+            return streams
+    
+    async def _fetch_streams_page(self, token: str, game_id: str, cursor: Optional[str] = None) -> Optional[Dict]:
+        """
+        Busca uma página de /helix/streams da categoria.
         
+        IMPORTANTE: sem filtro de idioma para não excluir streams em outros
+        idiomas (ex: "Betera vs Leo" estava em RU, mas não aparecia com language=pt)
+        
+        Returns:
+            JSON da resposta ({"data": [...], "pagination": {"cursor": ...}}) ou None em erro
+        """
         url = "https://api.twitch.tv/helix/streams"
         headers = {
             "Client-ID": self.client_id,
             "Authorization": f"Bearer {token}"
         }
+        params = {
+            "game_id": game_id,
+            "first": self.STREAMS_PAGE_SIZE,
+        }
+        if cursor:
+            params["after"] = cursor
         
-        # Estratégia: preferir filtros estruturados
-        if game_id:
-            # MELHOR: Busca estruturada por categoria
-            # IMPORTANTE: Removemos language filter para não excluir streams em outros idiomas
-            # Exemplo: "Betera vs Leo" estava em RU, mas não aparecia com language=pt
-            params = {
-                "game_id": game_id,
-                "first": 100,  # Aumentado para 100 para mais opções
-            }
-        else:
-            # FALLBACK: Busca textual (tem latência de indexação)
-            # NOTE: Este endpoint /streams não suporta 'query' para texto livre
-            # Estamos usando como fallback, mas pode não funcionar bem
-            params = {
-                "first": 100,  # Aumentado para 100 para mais opções
-            }
+        logger.debug(f"🎮 Buscando streams de Counter-Strike (game_id={game_id})" + (" [próxima página]" if cursor else ""))
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status != 200:
-                        logger.error(f"❌ Erro ao buscar streams: {response.status}")
-                        return None
-                    
-                    data = await response.json()
-                    streams = data.get("data", [])
-                    
-                    if not streams:
-                        logger.debug(f"❌ Nenhuma stream retornada pela API")
-                        return None
-                    
-                    # Encontrar o melhor match usando scoring
-                    best_match = self._find_best_match(
-                        streams=streams,
-                        query=query,
-                        language=language,
-                        championship=championship,
-                        team1=team1,
-                        team2=team2
-                    )
-                    return best_match
+            session = await get_http_transport().get_session()
+            async with session.get(url, headers=headers, params=params) as response:
+                if response.status != 200:
+                    logger.error(f"❌ Erro ao buscar streams: {response.status}")
+                    return None
+                
+                return await response.json()
         
         except Exception as e:
             logger.error(f"❌ Erro ao consultar API Twitch: {e}")
             return None
     
+    def _index_for(self, streams: List[Dict]) -> "StreamTitleIndex":
+        """Índice do snapshot atual (construído uma vez) ou um índice novo para outra lista."""
+        if streams is self._snapshot:
+            if self._snapshot_index is None or self._snapshot_index.streams is not streams:
+                self._snapshot_index = StreamTitleIndex(streams)
+            return self._snapshot_index
+        return StreamTitleIndex(streams)
+    
     def _find_best_match(
         self,
         streams: List[Dict],
@@ -226,175 +255,24 @@ class TwitchSearchService:
         
         Sistema de Pontuação por Palavras:
         - Cada palavra é quebrada e comparada individualmente
-        - Exemplo: "Dust2.dk Ligaen" = ["dust2", "dk", "ligaen"]
+        - Exemplo: "Dust2.dk Ligaen" = ["dust2.dk", "dust2", "ligaen"]
         - Busca em "POWER Ligaen" encontra: "ligaen" (+10 pts)
         - Busca por time "Prestige" em "Prestige vs..." = +20 pts
         
-        Score Mínimo Requerido: 15 pts (para aceitar stream)
-        
-        Pontuação:
-        - Cada palavra do campeonato: +10 pts
-        - Cada time encontrado: +20 pts
+        Pontuação (ver StreamTitleIndex):
+        - Cada palavra do campeonato: +10 pts (+5 se parcial)
+        - Cada palavra de time: +20 pts (+10 se parcial, > 3 caracteres)
+        - Ambos os times + campeonato: +200 pts
         - Viewers: até +100 pts
         - Idioma correto: +50 pts
         """
+        ranked = self._index_for(streams).rank(championship, team1, team2, language)
         
-        query_lower = query.lower()
-        championship_lower = championship.lower().strip()
-        team1_lower = team1.lower().strip()
-        team2_lower = team2.lower().strip()
-        
-        matching_streams = []
-        MIN_SCORE = 10  # Score mínimo para aceitar stream (reduzido para ser mais flexível)
-        FALLBACK_MIN_SCORE = 10  # Score mais baixo para fallback (quando nada encontrado)
-        
-        logger.debug(f"🔍 Filtrando streams com scoring: championship='{championship}', team1='{team1}', team2='{team2}'")
-        logger.debug(f"   Score mínimo requerido: {MIN_SCORE} pts")
-        
-        # Função para quebrar e extrair palavras-chave
-        def extract_keywords(text: str) -> List[str]:
-            """Extrai palavras-chave de um texto."""
-            if not text:
-                return []
-            
-            # Converter para minúsculas e remover pontuação
-            text = text.lower()
-            words = text.split()
-            
-            keywords = []
-            for word in words:
-                # Remover pontuação
-                clean_word = word.strip('.,;:!?)[]"\'|')
-                if clean_word:
-                    keywords.append(clean_word)
-                    
-                    # Se tem ponto, também adicionar a parte antes do ponto
-                    if "." in clean_word:
-                        base = clean_word.split(".")[0].strip()
-                        if base:
-                            keywords.append(base)
-            
-            return keywords
-        
-        # Função para calcular score de relevância
-        def calculate_relevance_score(title: str, championship: str, team1: str, team2: str) -> int:
-            """
-            Calcula score de relevância do título.
-            Retorna score baseado em palavras encontradas.
-            
-            BONUS SPECIAL: Se encontra AMBOS os times + campeonato = +200 pontos!
-            Isso garante que matches reais (ex: "Betera vs Leo | CCT Europe")
-            sejam favorecidos sobre false positives (ex: "leo_drinks is back!")
-            """
-            score = 0
-            title_keywords = extract_keywords(title)
-            title_lower = title.lower()
-            
-            championship_found = False
-            team1_found = False
-            team2_found = False
-            
-            # Score por campeonato (cada palavra do campeonato)
-            if championship:
-                champ_keywords = extract_keywords(championship)
-                for champ_word in champ_keywords:
-                    if champ_word in title_keywords:
-                        logger.debug(f"      ✓ Campeonato: encontrou '{champ_word}' em '{title[:50]}...' +10 pts")
-                        score += 10
-                        championship_found = True
-                    elif champ_word in title_lower:
-                        # Partial match (substring)
-                        logger.debug(f"      ✓ Campeonato: encontrou parcial '{champ_word}' +5 pts")
-                        score += 5
-                        championship_found = True
-            
-            # Score por time 1 (cada palavra do time)
-            if team1:
-                team1_keywords = extract_keywords(team1)
-                for team1_word in team1_keywords:
-                    if team1_word in title_keywords:
-                        logger.debug(f"      ✓ Time 1: encontrou '{team1_word}' +20 pts")
-                        score += 20
-                        team1_found = True
-                    elif team1_word in title_lower and len(team1_word) > 3:
-                        # Partial match (substring) mas só se > 3 caracteres
-                        logger.debug(f"      ✓ Time 1: encontrou parcial '{team1_word}' +10 pts")
-                        score += 10
-                        team1_found = True
-            
-            # Score por time 2 (cada palavra do time)
-            if team2:
-                team2_keywords = extract_keywords(team2)
-                for team2_word in team2_keywords:
-                    if team2_word in title_keywords:
-                        logger.debug(f"      ✓ Time 2: encontrou '{team2_word}' +20 pts")
-                        score += 20
-                        team2_found = True
-                    elif team2_word in title_lower and len(team2_word) > 3:
-                        # Partial match (substring) mas só se > 3 caracteres
-                        logger.debug(f"      ✓ Time 2: encontrou parcial '{team2_word}' +10 pts")
-                        score += 10
-                        team2_found = True
-            
-            # BONUS ESPECIAL: Encontrou ambos os times AND campeonato
-            if team1_found and team2_found and championship_found:
-                bonus = 200
-                logger.debug(f"      🎁 BONUS ESPECIAL: Ambos times + campeonato encontrados! +{bonus} pts")
-                score += bonus
-            
-            return score
-        
-        # Filtrar streams que correspondam à query
-        for stream in streams:
-            title = stream.get("title", "")
-            
-            # Calcular score de relevância
-            relevance_score = calculate_relevance_score(title, championship_lower, team1_lower, team2_lower)
-            
-            # Definir score mínimo dinâmico:
-            # - Se tem campeonato OU times: requer MIN_SCORE (rigoroso)
-            # - Se NÃO tem campeonato E NÃO tem times: aceita qualquer stream de CS2 (fallback relaxado)
-            min_score_required = MIN_SCORE if (championship or team1 or team2) else 0
-            
-            # Se score abaixo do mínimo, pula
-            if relevance_score < min_score_required:
-                logger.debug(f"❌ Stream descartada: '{stream.get('user_login')}' - score {relevance_score} < {min_score_required}")
-                continue
-            
-            # Pontuação total
-            score = relevance_score
-            
-            # Bônus por viewers (mais viewers = melhor)
-            viewer_count = stream.get("viewer_count", 0)
-            viewer_bonus = min(viewer_count // 100, 100)  # Máx 100 pontos
-            score += viewer_bonus
-            if viewer_bonus > 0:
-                logger.debug(f"   ✓ Viewers ({viewer_count}): +{viewer_bonus} ({stream.get('user_login')})")
-            
-            # Bônus por idioma correto
-            if stream.get("language") == language:
-                score += 50
-                logger.debug(f"   ✓ Idioma correto: +50 ({stream.get('user_login')})")
-            
-            matching_streams.append({
-                "stream": stream,
-                "score": score
-            })
-            logger.debug(f"   ✅ Score final: {score} ({stream.get('user_login')})")
-        
-        if not matching_streams:
-            logger.warning(f"⚠️ Nenhum stream encontrado com score mínimo ({MIN_SCORE})")
-            logger.debug(f"   Tentando fallback com score mais baixo ({FALLBACK_MIN_SCORE})")
+        if not ranked:
+            logger.warning(f"⚠️ Nenhum stream encontrado com score mínimo ({StreamTitleIndex.MIN_SCORE})")
             return None
         
-        # Se encontrou com score normal, usar normalmente
-        # Se não, tentar com score mais baixo (já testado acima como fallback)
-        
-        # Retornar stream com maior score
-        best_match = max(matching_streams, key=lambda x: x["score"])
-        best = best_match["stream"]
-        best_score = best_match["score"]
-        
+        best_score, best = ranked[0]
         logger.info(f"✅ Melhor match: {best.get('user_login')} (score: {best_score}, viewers: {best.get('viewer_count')})")
         
         return {
@@ -407,6 +285,151 @@ class TwitchSearchService:
         }
 
 
+def extract_keywords(text: str) -> List[str]:
+    """
+    Extrai palavras-chave de um texto (minúsculas, sem pontuação).
+    
+    Palavras com ponto também geram a parte antes do ponto
+    ("dust2.dk" → "dust2.dk", "dust2").
+    """
+    if not text:
+        return []
+    
+    keywords = []
+    for word in text.lower().split():
+        clean_word = word.strip('.,;:!?)[]"\'|')
+        if clean_word:
+            keywords.append(clean_word)
+            
+            if "." in clean_word:
+                base = clean_word.split(".")[0].strip()
+                if base:
+                    keywords.append(base)
+    
+    return keywords
+
+
+class StreamTitleIndex:
+    """
+    Índice invertido dos títulos de um snapshot de streams.
+    
+    Os títulos são tokenizados uma única vez (token → posições das streams).
+    Buscas parciais (substring) varrem um único texto concatenado e são
+    memorizadas por palavra, então pontuar muitas partidas contra o mesmo
+    snapshot custa poucas operações por palavra-chave da partida.
+    """
+    
+    MIN_SCORE = 10  # Score mínimo quando há campeonato ou times
+    SEPARATOR = "\n"  # Não aparece em palavras-chave (split por whitespace)
+    
+    def __init__(self, streams: List[Dict]):
+        self.streams = streams
+        self._postings: Dict[str, Set[int]] = {}
+        self._substring_cache: Dict[str, Set[int]] = {}
+        
+        titles = []
+        for position, stream in enumerate(streams):
+            title_lower = (stream.get("title") or "").lower().replace(self.SEPARATOR, " ")
+            titles.append(title_lower)
+            for token in extract_keywords(title_lower):
+                self._postings.setdefault(token, set()).add(position)
+        
+        # Texto único com as posições iniciais de cada título (para busca parcial)
+        self._blob = self.SEPARATOR.join(titles)
+        self._starts = []
+        offset = 0
+        for title_lower in titles:
+            self._starts.append(offset)
+            offset += len(title_lower) + len(self.SEPARATOR)
+    
+    def exact(self, word: str) -> Set[int]:
+        """Streams cujo título contém `word` como palavra."""
+        return self._postings.get(word, set())
+    
+    def containing(self, word: str) -> Set[int]:
+        """Streams cujo título contém `word` como substring."""
+        cached = self._substring_cache.get(word)
+        if cached is not None:
+            return cached
+        
+        positions = set()
+        index = self._blob.find(word)
+        while index != -1:
+            position = bisect_right(self._starts, index) - 1
+            positions.add(position)
+            # Pular para o próximo título: uma ocorrência basta
+            next_start = self._starts[position + 1] if position + 1 < len(self._starts) else len(self._blob)
+            index = self._blob.find(word, next_start)
+        
+        self._substring_cache[word] = positions
+        return positions
+    
+    def _score_words(self, words: List[str], scores: Dict[int, int], exact_points: int,
+                     partial_points: int, min_partial_len: int = 0) -> Set[int]:
+        found = set()
+        for word in words:
+            exact = self.exact(word)
+            for position in exact:
+                scores[position] = scores.get(position, 0) + exact_points
+            found |= exact
+            
+            if len(word) > min_partial_len:
+                partial = self.containing(word) - exact
+                for position in partial:
+                    scores[position] = scores.get(position, 0) + partial_points
+                found |= partial
+        return found
+    
+    def relevance(self, championship: str, team1: str, team2: str) -> Dict[int, int]:
+        """
+        Score de relevância por posição de stream (só streams com alguma palavra encontrada).
+        
+        Mesmas regras de _find_best_match: campeonato +10/+5, times +20/+10
+        (parcial só com > 3 caracteres) e +200 se ambos os times e o
+        campeonato aparecem.
+        """
+        scores: Dict[int, int] = {}
+        championship_found = self._score_words(extract_keywords(championship), scores, 10, 5)
+        team1_found = self._score_words(extract_keywords(team1), scores, 20, 10, min_partial_len=3)
+        team2_found = self._score_words(extract_keywords(team2), scores, 20, 10, min_partial_len=3)
+        
+        for position in championship_found & team1_found & team2_found:
+            scores[position] += 200
+        
+        return scores
+    
+    def rank(self, championship: str, team1: str, team2: str, language: str) -> List[Tuple[int, Dict]]:
+        """
+        Retorna (score final, stream) das streams aceitas, do melhor para o pior.
+        
+        Score final = relevância + bônus de viewers (até 100) + 50 se o idioma
+        coincide. Empates mantêm a ordem do snapshot (mais viewers primeiro).
+        """
+        championship = championship.lower().strip()
+        team1 = team1.lower().strip()
+        team2 = team2.lower().strip()
+        
+        if championship or team1 or team2:
+            relevance = self.relevance(championship, team1, team2)
+            candidates = sorted(p for p, score in relevance.items() if score >= self.MIN_SCORE)
+        else:
+            # Sem critérios: qualquer stream da categoria serve (fallback relaxado)
+            relevance = {}
+            candidates = range(len(self.streams))
+        
+        ranked = []
+        for position in candidates:
+            stream = self.streams[position]
+            score = relevance.get(position, 0)
+            score += min(stream.get("viewer_count", 0) // 100, 100)
+            if stream.get("language") == language:
+                score += 50
+            ranked.append((score, position))
+        
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, self.streams[position]) for score, position in ranked]
+
+
 # Instância global (singleton)
 _twitch_service: Optional[TwitchSearchService] = None
 
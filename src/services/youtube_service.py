@@ -7,32 +7,32 @@ import aiohttp
 import asyncio
 import os
 import logging
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from urllib.parse import urlparse, parse_qs
 
+from src.services.http_transport import get_http_transport
+
 logger = logging.getLogger(__name__)
 
 
 class YouTubeService:
     """Serviço para buscar informações de canais/lives do YouTube via API v3."""
     
+    # videos.list aceita até 50 IDs por chamada (1 unidade de quota por chamada)
+    VIDEOS_BATCH_SIZE = 50
+    
     def __init__(self):
         self.api_key = os.getenv("YOUTUBE_API_KEY")
         if not self.api_key:
             logger.warning("⚠️ YOUTUBE_API_KEY não configurada no .env")
         self.base_url = "https://www.googleapis.com/youtube/v3"
-        self._session = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Obtém ou cria a sessão HTTP."""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
+        """Obtém a sessão HTTP compartilhada (pool de conexões do transporte)."""
+        return await get_http_transport().get_session()
     
     async def close(self):
-        """Fecha a sessão HTTP."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """Nada a liberar: a sessão pertence ao transporte HTTP compartilhado."""
     
     @staticmethod
     def _extract_channel_id_from_url(url: str) -> Optional[str]:
@@ -108,12 +108,10 @@ class YouTubeService:
                 logger.warning(f"❌ Não consegui extrair ID da URL: {url}")
                 return await self._extract_channel_name_fallback(url)
             
-            session = await self._get_session()
-            
             # Se é um vídeo (sem prefixo ou é youtu.be), buscar o canal do vídeo
             # Este é o caso mais comum e mais confiável
             if not identifier.startswith(("@", "c:", "id:")):
-                channel_name = await self._get_channel_from_video(session, identifier)
+                channel_name = (await self.get_channel_names([identifier])).get(identifier)
                 if channel_name:
                     return channel_name
                 else:
@@ -127,34 +125,55 @@ class YouTubeService:
             logger.error(f"❌ Erro ao buscar nome do canal YouTube ({url}): {e}")
             return await self._extract_channel_name_fallback(url)
     
-    async def _get_channel_from_video(self, session: aiohttp.ClientSession, video_id: str) -> Optional[str]:
-        """Busca o nome do canal a partir do ID de um vídeo."""
-        try:
+    async def get_channel_names(self, video_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Busca o nome do canal de vários vídeos em lote (videos.list com até 50 IDs).
+        
+        Args:
+            video_ids: IDs de vídeos do YouTube
+            
+        Returns:
+            Dict video_id -> nome do canal (None se o vídeo não existe/é privado).
+            IDs de lotes que falharam (erro HTTP, timeout) ficam de fora.
+        """
+        names: Dict[str, Optional[str]] = {}
+        if not self.api_key or not video_ids:
+            return names
+        
+        session = await self._get_session()
+        unique_ids = list(dict.fromkeys(video_ids))
+        
+        for start in range(0, len(unique_ids), self.VIDEOS_BATCH_SIZE):
+            chunk = unique_ids[start:start + self.VIDEOS_BATCH_SIZE]
             params = {
                 "part": "snippet",
-                "id": video_id,
+                "id": ",".join(chunk),
+                "fields": "items(id,snippet/channelTitle)",
                 "key": self.api_key
             }
             
-            async with session.get(f"{self.base_url}/videos", params=params, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
+            try:
+                async with session.get(f"{self.base_url}/videos", params=params, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                    if resp.status != 200:
+                        logger.warning(f"⚠️ YouTube API retornou status {resp.status} para {len(chunk)} vídeo(s)")
+                        continue
+                    
                     data = await resp.json()
-                    if data.get("items"):
-                        channel_title = data["items"][0].get("snippet", {}).get("channelTitle")
-                        if channel_title:
-                            logger.debug(f"✅ Nome do canal obtido via vídeo: {channel_title}")
-                            return channel_title
-                else:
-                    logger.warning(f"⚠️ YouTube API retornou status {resp.status} para vídeo {video_id}")
+                    found = {
+                        item.get("id"): item.get("snippet", {}).get("channelTitle")
+                        for item in data.get("items", [])
+                    }
+                    for video_id in chunk:
+                        names[video_id] = found.get(video_id) or None
+                    
+                    logger.debug(f"✅ {len(found)}/{len(chunk)} canais obtidos via videos.list")
             
-            return None
-            
-        except asyncio.TimeoutError:
-            logger.warning(f"⏱️ Timeout ao buscar vídeo {video_id}")
-            return None
-        except Exception as e:
-            logger.error(f"Erro ao buscar canal do vídeo {video_id}: {e}")
-            return None
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Timeout ao buscar {len(chunk)} vídeo(s) no YouTube")
+            except Exception as e:
+                logger.error(f"Erro ao buscar canais de {len(chunk)} vídeo(s): {e}")
+        
+        return names
     
     async def _get_channel_by_handle(self, session: aiohttp.ClientSession, handle: str) -> Optional[str]:
         """Busca o nome do canal a partir do handle (@)."""
@@ -284,10 +303,3 @@ def get_youtube_service() -> YouTubeService:
     if _youtube_service is None:
         _youtube_service = YouTubeService()
     return _youtube_service
-
-
-async def close_youtube_service():
-    """Fecha a sessão do serviço YouTube."""
-    global _youtube_service
-    if _youtube_service:
-        await _youtube_service.close()